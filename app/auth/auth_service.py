@@ -1,7 +1,15 @@
+from datetime import datetime, timedelta
 from fastapi import HTTPException
+from app.crud.revoked_tokens import revoke_token
 from app.crud.users import create_user, verify_user
 from app.crud.users import update_last_login
-from app.utils.security import create_access_token
+from app.utils.security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    decode_token,
+    evict_token,
+    token_digest,
+)
 
 
 async def register_user(data):
@@ -14,10 +22,23 @@ async def login_user(email: str, password: str):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    await update_last_login(user["id"])
+    # Buffered write, not on the response path: login costs bcrypt plus one read
+    update_last_login(user["id"])
 
     token = create_access_token(
         {"user_id": user["id"], "role": user["role"], "tenant_id": user["tenantId"]}
     )
 
     return {"access_token": token, "token_type": "bearer", "user": user}
+
+
+async def logout_user(token: str):
+    claims = decode_token(token)
+
+    if "exp" in claims:
+        expires_at = datetime.utcfromtimestamp(claims["exp"])
+    else:
+        expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    await revoke_token(token_digest(token), expires_at)
+    evict_token(token)
@@ -1,7 +1,7 @@
 from fastapi import Depends
 from app.auth.router import oauth2_scheme
-from app.db.database import db
-from app.utils.security import decode_token
+from app.crud.users import find_user_with_role_tenant
+from app.utils.security import decode_token, token_digest
 from bson import ObjectId
 from fastapi import HTTPException
 
@@ -9,38 +9,26 @@ from fastapi import HTTPException
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     payload = decode_token(token)
 
-    # Allow multiple valid statuses (active for teachers/admins, studying for students)
-    user = await db.users.find_one(
+    # Allow multiple valid statuses (active for teachers/admins, studying for students).
+    # tenantId is stored in the role-specific collection (teachers, students, admins),
+    # which is joined in the same query, as is the revocation check: decoded
+    # claims are cached per worker, revocation is not.
+    user = await find_user_with_role_tenant(
         {
             "_id": ObjectId(payload["user_id"]),
             "status": {"$in": ["active", "studying"]}
-        }
+        },
+        token_digest=token_digest(token),
     )
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found or inactive")
 
-    # tenantId is stored in the role-specific collection (teachers, students, admins)
-    # not in the users collection, so we need to fetch it based on user role
-    tenant_id = user.get("tenantId")  # Check users collection first
-    
-    if not tenant_id:
-        user_id = user["_id"]
-        role = user["role"]
-        
-        # Fetch tenantId from the role-specific collection
-        if role == "teacher":
-            role_doc = await db.teachers.find_one({"userId": user_id})
-            if role_doc:
-                tenant_id = role_doc.get("tenantId")
-        elif role == "student":
-            role_doc = await db.students.find_one({"userId": user_id})
-            if role_doc:
-                tenant_id = role_doc.get("tenantId")
-        elif role == "admin":
-            role_doc = await db.admins.find_one({"userId": user_id})
-            if role_doc:
-                tenant_id = role_doc.get("tenantId")
+    if user["tokenRevoked"]:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    # Check users collection first, then the role profile
+    tenant_id = user.get("tenantId") or user.get("roleTenantId")
 
     return {
         "user_id": str(user["_id"]),
@@ -1 +1,161 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
 TENANT_ID = "691eaf8f6a01d7ff35403568"
+
+# -------------------------
+# Background jobs
+# -------------------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# A "running" job whose heartbeat is older than this is assumed orphaned
+# (worker restarted mid-job) and is re-queued on startup.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+
+# Course cascade delete: documents per batch and pause between batches
+CASCADE_BATCH_SIZE = int(os.getenv("CASCADE_BATCH_SIZE", "500"))
+CASCADE_BATCH_PAUSE_SECONDS = float(os.getenv("CASCADE_BATCH_PAUSE_SECONDS", "0.05"))
+
+# -------------------------
+# Course document cache (per worker process)
+# -------------------------
+COURSE_CACHE_SIZE = int(os.getenv("COURSE_CACHE_SIZE", "2048"))
+COURSE_CACHE_TTL_SECONDS = float(os.getenv("COURSE_CACHE_TTL_SECONDS", "30"))
+# Remember unknown course ids briefly so 404 storms don't reach Mongo; 0 disables
+COURSE_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("COURSE_NEGATIVE_CACHE_TTL_SECONDS", "5"))
+
+# -------------------------
+# Password hashing worker pool
+# -------------------------
+# "thread" (bcrypt releases the GIL) or "process"
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Requests waiting for a hashing slot beyond this are rejected with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# -------------------------
+# Password hashing policy
+# -------------------------
+# New hashes use this scheme; hashes in any other scheme, or with different
+# cost parameters, are upgraded transparently on the next successful login.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")  # bcrypt | argon2
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", "19456"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+# -------------------------
+# Write-behind buffer (lastLogin / lastActive timestamps)
+# -------------------------
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "5"))
+# Flush early once this many documents have pending updates
+WRITE_BEHIND_MAX_ENTRIES = int(os.getenv("WRITE_BEHIND_MAX_ENTRIES", "1000"))
+
+# -------------------------
+# Batched activity event ingestion (POST /studentPerformance/{tenantId}/events)
+# -------------------------
+# How long the first queued request waits for others to share its batch write
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "0.05"))
+# Write a batch early once it holds this many events
+INGEST_MAX_BATCH_EVENTS = int(os.getenv("INGEST_MAX_BATCH_EVENTS", "5000"))
+# Requests allowed to wait for a batch; beyond that callers wait up to the timeout, then get 503
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+INGEST_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("INGEST_ENQUEUE_TIMEOUT_SECONDS", "0.5"))
+
+# -------------------------
+# In-memory leaderboards and live streams (GET /studentPerformance/{tenantId}/leaderboard/stream)
+# -------------------------
+# Largest top-N a stream subscriber may watch
+LEADERBOARD_STREAM_MAX_LIMIT = int(os.getenv("LEADERBOARD_STREAM_MAX_LIMIT", "100"))
+# Rankings pick up points awarded by other workers this often (reads only the
+# studentPerformance documents whose updatedAt moved since the last sync); 0 disables
+# it for single-worker setups
+LEADERBOARD_RESYNC_SECONDS = float(os.getenv("LEADERBOARD_RESYNC_SECONDS", "30"))
+# ... and are fully reconciled (one projected scan of studentPerformance) this often, to
+# catch documents changed without updatedAt (deletes, manual edits); 0 disables it
+LEADERBOARD_FULL_RESYNC_SECONDS = float(os.getenv("LEADERBOARD_FULL_RESYNC_SECONDS", "3600"))
+# Comment line sent on idle streams so proxies keep them open
+LEADERBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("LEADERBOARD_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# -------------------------
+# Weekly leaderboards (pointsThisWeek rollover into weeklyLeaderboards)
+# -------------------------
+# Weeks start on this weekday (0 = Monday) at this hour, UTC
+WEEKLY_ROLLOVER_WEEKDAY = int(os.getenv("WEEKLY_ROLLOVER_WEEKDAY", "0"))
+WEEKLY_ROLLOVER_HOUR_UTC = int(os.getenv("WEEKLY_ROLLOVER_HOUR_UTC", "0"))
+# Rows archived per tenant and week
+WEEKLY_LEADERBOARD_KEEP = int(os.getenv("WEEKLY_LEADERBOARD_KEEP", "100"))
+
+# -------------------------
+# Admin dashboard counters (tenantStats)
+# -------------------------
+# Counters are recounted from the source collections this often; 0 disables it
+TENANT_STATS_RECONCILE_SECONDS = float(os.getenv("TENANT_STATS_RECONCILE_SECONDS", "3600"))
+
+# -------------------------
+# Subscriptions (cached per worker process; plan quotas are checked against them)
+# -------------------------
+SUBSCRIPTION_CACHE_SIZE = int(os.getenv("SUBSCRIPTION_CACHE_SIZE", "4096"))
+# How long another worker may serve a subscription's old plan/status after it is updated
+SUBSCRIPTION_CACHE_TTL_SECONDS = float(os.getenv("SUBSCRIPTION_CACHE_TTL_SECONDS", "60"))
+# Active subscriptions past expiry_date are flipped to "expired" this often; 0 disables it
+SUBSCRIPTION_SWEEP_SECONDS = float(os.getenv("SUBSCRIPTION_SWEEP_SECONDS", "300"))
+
+# -------------------------
+# Verified JWT claims cache (per worker process)
+# -------------------------
+# Entries never outlive the token's own exp; 0 disables the cache
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL_SECONDS = float(os.getenv("JWT_CACHE_TTL_SECONDS", "300"))
+
+# -------------------------
+# Rate limiting and load shedding
+# -------------------------
+# "local" (per worker process) or "mongo" (shared across workers, one extra write per request)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+# Token buckets: requests per second refill and burst size; a rate of 0 disables the limit.
+# Requests carrying a token are limited per tenant (per user for tenant-less roles),
+# anonymous requests (login, signup) per client address.
+RATE_LIMIT_TENANT_RPS = float(os.getenv("RATE_LIMIT_TENANT_RPS", "50"))
+RATE_LIMIT_TENANT_BURST = int(os.getenv("RATE_LIMIT_TENANT_BURST", "100"))
+# Off by default: behind a proxy or load balancer every anonymous request has the
+# proxy's address and would share one bucket. Set RATE_LIMIT_CLIENT_IP_HEADER first.
+RATE_LIMIT_CLIENT_RPS = float(os.getenv("RATE_LIMIT_CLIENT_RPS", "0"))
+RATE_LIMIT_CLIENT_BURST = int(os.getenv("RATE_LIMIT_CLIENT_BURST", "20"))
+# Header the trusted proxy puts the client address in (e.g. X-Forwarded-For, X-Real-IP);
+# empty: use the connecting address. Only set it if clients can't reach the app directly,
+# or they can pick their own bucket. For a list, the entry RATE_LIMIT_PROXY_HOPS from the
+# end is used (1: the address the last proxy saw).
+RATE_LIMIT_CLIENT_IP_HEADER = os.getenv("RATE_LIMIT_CLIENT_IP_HEADER", "").strip().lower()
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+
+# Concurrent requests allowed per top-level route ("/courses", "/quiz-submissions", ...).
+# Keep the sum of the busiest routes below the Motor pool size (maxPoolSize, 100 by default).
+ROUTE_CONCURRENCY_DEFAULT = int(os.getenv("ROUTE_CONCURRENCY_DEFAULT", "32"))
+# Per-route overrides, e.g. "courses=48,quiz-submissions=16"; 0 means unlimited
+ROUTE_CONCURRENCY_LIMITS = os.getenv("ROUTE_CONCURRENCY_LIMITS", "")
+# How long a request may wait for a slot before it is shed with 503
+ROUTE_CONCURRENCY_WAIT_SECONDS = float(os.getenv("ROUTE_CONCURRENCY_WAIT_SECONDS", "0.1"))
+
+# -------------------------
+# Metrics
+# -------------------------
+# Bearer token required by GET /metrics; empty leaves it open (e.g. when only reachable internally)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Mongo commands at or above this are logged with their (redacted) query shape
+MONGO_SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_QUERY_MS", "100"))
+# Recent latencies kept per collection/command for percentiles
+MONGO_STATS_SAMPLE_SIZE = int(os.getenv("MONGO_STATS_SAMPLE_SIZE", "1024"))
+# Distinct query shapes tracked for GET /system/queries
+MONGO_STATS_MAX_SHAPES = int(os.getenv("MONGO_STATS_MAX_SHAPES", "500"))
+
+# -------------------------
+# Request profiling
+# -------------------------
+# Off by default: the profiling middleware is not even installed unless enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "2"))
+# Profiles kept in memory per worker for GET /system/profiles
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "20"))
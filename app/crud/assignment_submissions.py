@@ -84,6 +84,7 @@
 
 
 from app.db.database import db
+from app.crud import tenant_stats
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Optional
@@ -118,6 +119,7 @@ async def create_submission(data, student_id: str, tenant_id: str):
     }
 
     result = await db.assignmentSubmissions.insert_one(submission)
+    await tenant_stats.increment(tenant_id, pendingSubmissions=1)
     doc = await db.assignmentSubmissions.find_one({"_id": result.inserted_id})
     return serialize_submission(doc)
 
@@ -161,13 +163,25 @@ async def grade_submission(
     if feedback is not None:
         updates["feedback"] = feedback
 
-    await db.assignmentSubmissions.update_one(
+    # first grading takes it off the pending count; re-grading doesn't
+    result = await db.assignmentSubmissions.update_one(
         {
             "_id": ObjectId(submission_id),
             "tenantId": ObjectId(tenant_id),
+            "gradedAt": None,
         },
         {"$set": updates},
     )
+    if result.modified_count:
+        await tenant_stats.increment(tenant_id, pendingSubmissions=-1)
+    else:
+        await db.assignmentSubmissions.update_one(
+            {
+                "_id": ObjectId(submission_id),
+                "tenantId": ObjectId(tenant_id),
+            },
+            {"$set": updates},
+        )
 
     doc = await db.assignmentSubmissions.find_one(
         {
@@ -179,10 +193,15 @@ async def grade_submission(
 
 
 async def delete_submission(submission_id: str, tenant_id: str):
-    result = await db.assignmentSubmissions.delete_one(
+    deleted = await db.assignmentSubmissions.find_one_and_delete(
         {
             "_id": ObjectId(submission_id),
             "tenantId": ObjectId(tenant_id),
-        }
+        },
+        projection={"gradedAt": 1},
     )
-    return result.deleted_count > 0
+    if deleted is None:
+        return False
+    if deleted.get("gradedAt") is None:
+        await tenant_stats.increment(tenant_id, pendingSubmissions=-1)
+    return True
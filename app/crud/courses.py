@@ -2,7 +2,38 @@ from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from app.db.database import get_courses_collection, get_students_collection, db
+from app.crud import tenant_stats
 from app.schemas.courses import CourseCreate, CourseUpdate
+from app.services.course_cache import course_cache
+from app.services.course_cascade import JOB_TYPE as CASCADE_JOB_TYPE
+from app.services.jobs import job_runner
+from app.services.quotas import quotas
+from app.utils.mongo import (
+    NOT_FOUND,
+    OTHER_TENANT,
+    find_in_tenant,
+    lookup_error,
+    object_id_refs,
+    ref_variants,
+)
+
+
+# Course fields a caller may project (see CourseResponse)
+COURSE_FIELDS = {
+    "title",
+    "description",
+    "category",
+    "status",
+    "courseCode",
+    "duration",
+    "thumbnailUrl",
+    "modules",
+    "teacherId",
+    "tenantId",
+    "enrolledStudents",
+    "createdAt",
+    "updatedAt",
+}
 
 
 def serialize_course(course: dict) -> dict:
@@ -77,6 +108,7 @@ class CourseCRUD:
 
         Raises:
             ValueError: If tenant/teacher not found or validation fails
+            HTTPException: 403 if the tenant's plan allows no more courses
         """
         course_dict = course_data.dict()
 
@@ -97,14 +129,10 @@ class CourseCRUD:
             raise ValueError(f"Tenant not found with ID: {course_dict['tenantId']}")
 
         #  Check if teacher exists and belongs to the same tenant
-        teacher = await db.teachers.find_one({"_id": teacher_id, "tenantId": tenant_id})
+        teacher, found = await find_in_tenant(db.teachers, teacher_id, tenant_id, {"_id": 1})
 
         if not teacher:
-            # Check if teacher exists in a different tenant
-            teacher_exists = await db.teachers.find_one({"_id": teacher_id})
-            if teacher_exists:
-                raise ValueError("Teacher found but belongs to different tenant")
-            raise ValueError(f"Teacher not found with ID: {course_dict['teacherId']}")
+            raise ValueError(lookup_error("Teacher", course_dict["teacherId"], found))
 
         #  Store both IDs as ObjectId (teacherId was string before)
         course_dict["tenantId"] = tenant_id
@@ -115,9 +143,17 @@ class CourseCRUD:
         course_dict["updatedAt"] = datetime.utcnow()
         course_dict["enrolledStudents"] = 0
 
+        # Take a slot of the tenant's plan (403 when full); given back if the insert fails
+        await quotas.reserve(tenant_id, "courses")
+
         # Insert into MongoDB
-        result = await self.collection.insert_one(course_dict)
+        try:
+            result = await self.collection.insert_one(course_dict)
+        except Exception:
+            await quotas.release(tenant_id, "courses")
+            raise
         course_id = result.inserted_id
+        course_cache.invalidate(course_id)
 
         #  Update teacher's assignedCourses array
         await db.teachers.update_one(
@@ -135,6 +171,21 @@ class CourseCRUD:
 
         return course_dict
 
+    async def _load_course(self, course_obj_id: ObjectId) -> Optional[dict]:
+        """Fetch a course by _id only and convert ObjectIds for the response"""
+        course = await self.collection.find_one({"_id": course_obj_id})
+        if not course:
+            return None
+
+        course["_id"] = str(course["_id"])
+        course["tenantId"] = str(course["tenantId"])
+
+        #  Handle teacherId as ObjectId (was string before)
+        if "teacherId" in course and isinstance(course["teacherId"], ObjectId):
+            course["teacherId"] = str(course["teacherId"])
+
+        return course
+
     async def get_course_by_id(self, course_id: str, tenantId: str) -> dict:
         """Get a course by ID with proper error handling"""
 
@@ -152,34 +203,27 @@ class CourseCRUD:
                 "course": None,
             }
 
-        # Query with tenantId as ObjectId
-        course = await self.collection.find_one(
-            {"_id": ObjectId(course_id), "tenantId": ObjectId(tenantId)}
+        course_obj_id = ObjectId(course_id)
+
+        # Read-through cache keyed by course id; the tenant check below runs on
+        # every hit, and one lookup is enough to tell "missing" from "other tenant"
+        course = await course_cache.get(
+            course_obj_id, lambda: self._load_course(course_obj_id)
         )
 
         if not course:
-            course_exists = await self.collection.find_one({"_id": ObjectId(course_id)})
-
-            if course_exists:
-                return {
-                    "success": False,
-                    "message": "Course found but belongs to different tenant",
-                    "course": None,
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"Course not found with ID: {course_id}",
-                    "course": None,
-                }
-
-        # Convert ObjectIds to strings for JSON response
-        course["_id"] = str(course["_id"])
-        course["tenantId"] = str(course["tenantId"])
+            return {
+                "success": False,
+                "message": lookup_error("Course", course_id, NOT_FOUND),
+                "course": None,
+            }
 
-        #  Handle teacherId as ObjectId (was string before)
-        if "teacherId" in course and isinstance(course["teacherId"], ObjectId):
-            course["teacherId"] = str(course["teacherId"])
+        if course["tenantId"] != str(ObjectId(tenantId)):
+            return {
+                "success": False,
+                "message": lookup_error("Course", course_id, OTHER_TENANT),
+                "course": None,
+            }
 
         return {
             "success": True,
@@ -298,6 +342,7 @@ class CourseCRUD:
             {"$set": cleaned_data},
             return_document=ReturnDocument.AFTER,
         )
+        course_cache.invalidate(ObjectId(course_id))
 
         if result:
             result["_id"] = str(result["_id"])
@@ -311,14 +356,17 @@ class CourseCRUD:
 
     async def delete_course(self, course_id: str, tenantId: str) -> dict:
         """
-        Delete a course and clean up all references
+        Delete a course and schedule clean-up of everything that references it
 
         This method:
         1. Validates IDs
-        2. Gets the course to find teacher and enrolled students
+        2. Gets the course to find the teacher
         3. Deletes the course
         4. Removes from teacher's assignedCourses
-        5. Removes from all students' enrolledCourses
+        5. Enqueues a cascade job (app/services/course_cascade.py) that removes
+           quizzes, assignments, submissions, enrollments and courseStats in batches
+
+        Returns the job id so callers can poll GET /jobs/{job_id}.
         """
 
         if not ObjectId.is_valid(course_id):
@@ -337,21 +385,14 @@ class CourseCRUD:
         tenant_obj_id = ObjectId(tenantId)
 
         # Get the course first to access teacher ID
-        course = await self.collection.find_one(
-            {"_id": course_obj_id, "tenantId": tenant_obj_id}
+        course, found = await find_in_tenant(
+            self.collection, course_obj_id, tenant_obj_id, {"teacherId": 1, "enrolledStudents": 1}
         )
 
         if not course:
-            # Check if course exists in different tenant
-            course_exists = await self.collection.find_one({"_id": course_obj_id})
-            if course_exists:
-                return {
-                    "success": False,
-                    "message": "Course found but belongs to different tenant",
-                }
             return {
                 "success": False,
-                "message": f"Course not found with ID: {course_id}",
+                "message": lookup_error("Course", course_id, found),
             }
 
         # Get teacher ID before deleting
@@ -362,47 +403,41 @@ class CourseCRUD:
             {"_id": course_obj_id, "tenantId": tenant_obj_id}
         )
 
-        if delete_result.deleted_count > 0:
-            #  Remove course from teacher's assignedCourses array
-            if teacher_id:
-                # Ensure teacher_id is ObjectId
-                if isinstance(teacher_id, str):
-                    teacher_id = ObjectId(teacher_id)
-
-                teacher_update_result = await db.teachers.update_one(
-                    {"_id": teacher_id},
-                    {
-                        "$pull": {"assignedCourses": course_obj_id},
-                        "$set": {"updatedAt": datetime.utcnow()},
-                    },
-                )
-
-                print(
-                    f" Teacher update: Modified {teacher_update_result.modified_count} document(s)"
-                )
-
-            #  Remove course from all enrolled students' enrolledCourses
-            students_update_result = await self.students_collection.update_many(
-                {
-                    "enrolledCourses": course_id
-                },  # Course ID stored as string in students
+        course_cache.invalidate(course_obj_id)
+
+        if delete_result.deleted_count == 0:
+            # This shouldn't happen, but handle it just in case
+            return {"success": False, "message": "Failed to delete course"}
+
+        # submissions are recounted once the cascade job has removed them
+        await tenant_stats.increment(
+            tenant_obj_id, courses=-1, activeEnrollments=-course.get("enrolledStudents", 0)
+        )
+
+        #  Remove course from teacher's assignedCourses array
+        if teacher_id:
+            # Ensure teacher_id is ObjectId
+            if isinstance(teacher_id, str):
+                teacher_id = ObjectId(teacher_id)
+
+            await db.teachers.update_one(
+                {"_id": teacher_id},
                 {
-                    "$pull": {"enrolledCourses": course_id},
+                    "$pull": {"assignedCourses": course_obj_id},
                     "$set": {"updatedAt": datetime.utcnow()},
                 },
             )
 
-            print(
-                f" Students update: Modified {students_update_result.modified_count} document(s)"
-            )
-
-            return {
-                "success": True,
-                "message": f"Course deleted successfully. Updated {teacher_update_result.modified_count if teacher_id else 0} teacher and {students_update_result.modified_count} students.",
-            }
+        # Dependents can be large: clean them up in the background
+        job_id = await job_runner.enqueue(
+            CASCADE_JOB_TYPE, {"courseId": course_id}, tenant_id=tenant_obj_id
+        )
 
-        # This shouldn't happen, but handle it just in case
-        return {"success": False, "message": "Failed to delete course"}
+        return {
+            "success": True,
+            "message": "Course deleted. Related data is being cleaned up in the background.",
+            "jobId": job_id,
+        }
 
     async def enroll_student(
         self, course_id: str, student_id: str, tenantId: str
@@ -429,53 +464,45 @@ class CourseCRUD:
 
         tenant_object_id = ObjectId(tenantId)
 
-        # Check course with ObjectId tenantId
-        course = await self.collection.find_one(
-            {"_id": ObjectId(course_id), "tenantId": tenant_object_id}
+        # Check course belongs to the tenant
+        course, found = await find_in_tenant(
+            self.collection, ObjectId(course_id), tenant_object_id, {"_id": 1}
         )
 
         if not course:
-            course_exists = await self.collection.find_one({"_id": ObjectId(course_id)})
-            if course_exists:
-                return {
-                    "success": False,
-                    "message": "Course found but belongs to different tenant",
-                }
             return {
                 "success": False,
-                "message": f"Course not found with ID: {course_id}",
+                "message": lookup_error("Course", course_id, found),
             }
 
-        # Check student with ObjectId tenantId
-        student = await self.students_collection.find_one(
-            {"_id": ObjectId(student_id), "tenantId": tenant_object_id}
+        # Check student belongs to the tenant
+        student, found = await find_in_tenant(
+            self.students_collection,
+            ObjectId(student_id),
+            tenant_object_id,
+            {"enrolledCourses": 1},
         )
 
         if not student:
-            student_exists = await self.students_collection.find_one(
-                {"_id": ObjectId(student_id)}
-            )
-            if student_exists:
-                return {
-                    "success": False,
-                    "message": "Student found but belongs to different tenant",
-                }
             return {
                 "success": False,
-                "message": f"Student not found with ID: {student_id}",
+                "message": lookup_error("Student", student_id, found),
             }
 
-        enrolled_courses = student.get("enrolledCourses", [])
-        if course_id in enrolled_courses:
+        course_object_id = ObjectId(course_id)
+
+        enrolled_courses = object_id_refs(student.get("enrolledCourses", []))
+        if course_object_id in enrolled_courses:
             return {
                 "success": False,
                 "message": "Student is already enrolled in this course",
             }
 
+        # Course references are stored as ObjectId (same as teachers.assignedCourses)
         await self.students_collection.update_one(
             {"_id": ObjectId(student_id), "tenantId": tenant_object_id},
             {
-                "$addToSet": {"enrolledCourses": course_id},
+                "$addToSet": {"enrolledCourses": course_object_id},
                 "$set": {"updatedAt": datetime.utcnow()},
             },
         )
@@ -484,6 +511,8 @@ class CourseCRUD:
             {"_id": ObjectId(course_id), "tenantId": tenant_object_id},
             {"$inc": {"enrolledStudents": 1}, "$set": {"updatedAt": datetime.utcnow()}},
         )
+        course_cache.invalidate(course_object_id)
+        await tenant_stats.increment(tenant_object_id, activeEnrollments=1)
 
         return {"success": True, "message": "Successfully enrolled in course"}
 
@@ -524,56 +553,45 @@ class CourseCRUD:
         tenant_object_id = ObjectId(tenantId)
 
         # Check if course exists (with tenant isolation)
-        course = await self.collection.find_one(
-            {"_id": ObjectId(course_id), "tenantId": tenant_object_id}
+        course, found = await find_in_tenant(
+            self.collection, ObjectId(course_id), tenant_object_id, {"_id": 1}
         )
 
         if not course:
-            # Check if course exists in a different tenant
-            course_exists = await self.collection.find_one({"_id": ObjectId(course_id)})
-            if course_exists:
-                return {
-                    "success": False,
-                    "message": "Course found but belongs to different tenant",
-                }
             return {
                 "success": False,
-                "message": f"Course not found with ID: {course_id}",
+                "message": lookup_error("Course", course_id, found),
             }
 
         # Check if student exists (with tenant isolation)
-        student = await self.students_collection.find_one(
-            {"_id": ObjectId(student_id), "tenantId": tenant_object_id}
+        student, found = await find_in_tenant(
+            self.students_collection,
+            ObjectId(student_id),
+            tenant_object_id,
+            {"enrolledCourses": 1},
         )
 
         if not student:
-            # Check if student exists in a different tenant
-            student_exists = await self.students_collection.find_one(
-                {"_id": ObjectId(student_id)}
-            )
-            if student_exists:
-                return {
-                    "success": False,
-                    "message": "Student found but belongs to different tenant",
-                }
             return {
                 "success": False,
-                "message": f"Student not found with ID: {student_id}",
+                "message": lookup_error("Student", student_id, found),
             }
 
+        course_object_id = ObjectId(course_id)
+
         # Check if student is actually enrolled in this course
-        enrolled_courses = student.get("enrolledCourses", [])
-        if course_id not in enrolled_courses:
+        enrolled_courses = object_id_refs(student.get("enrolledCourses", []))
+        if course_object_id not in enrolled_courses:
             return {
                 "success": False,
                 "message": "Student is not enrolled in this course",
             }
 
-        # Remove course from student's enrolledCourses array
+        # Remove course from student's enrolledCourses array (either stored form)
         await self.students_collection.update_one(
             {"_id": ObjectId(student_id), "tenantId": tenant_object_id},
             {
-                "$pull": {"enrolledCourses": course_id},
+                "$pull": {"enrolledCourses": {"$in": ref_variants(course_object_id)}},
                 "$set": {"updatedAt": datetime.utcnow()},
             },
         )
@@ -586,11 +604,38 @@ class CourseCRUD:
                 "$set": {"updatedAt": datetime.utcnow()},
             },
         )
+        course_cache.invalidate(course_object_id)
+        await tenant_stats.increment(tenant_object_id, activeEnrollments=-1)
 
         return {"success": True, "message": "Successfully unenrolled from course"}
 
-    async def get_student_courses(self, student_id: str, tenantId: str) -> dict:
-        """Get all courses a student is enrolled in"""
+    async def get_student_courses(
+        self, student_id: str, tenantId: str, skip: int = 0, limit: int = 100
+    ) -> dict:
+        """Get the courses a student is enrolled in (one page, full documents)"""
+        return await self.get_student_courses_page(
+            student_id, tenantId, skip=skip, limit=limit
+        )
+
+    async def get_student_courses_page(
+        self,
+        student_id: str,
+        tenantId: str,
+        skip: int = 0,
+        limit: int = 20,
+        fields: Optional[List[str]] = None,
+        include_progress: bool = False,
+    ) -> dict:
+        """
+        Get one page of a student's enrolled courses in a single aggregation.
+
+        - Only courses belonging to the student's tenant are joined
+        - fields: optional projection of course fields (id is always returned)
+        - include_progress: joins completionPercentage / lastActive from
+          studentPerformanceHistory.courseStats in the same round trip
+
+        Returns total (enrolled courses in tenant) alongside the page.
+        """
 
         if not ObjectId.is_valid(student_id):
             return {
@@ -606,65 +651,121 @@ class CourseCRUD:
                 "courses": [],
             }
 
-        # Query with ObjectId tenantId
-        student = await self.students_collection.find_one(
-            {"_id": ObjectId(student_id), "tenantId": ObjectId(tenantId)}
-        )
-
-        if not student:
-            student_exists = await self.students_collection.find_one(
-                {"_id": ObjectId(student_id)}
-            )
-
-            if student_exists:
+        if fields:
+            unknown = set(fields) - COURSE_FIELDS
+            if unknown:
                 return {
                     "success": False,
-                    "message": "Student found but belongs to different tenant",
-                    "courses": [],
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"Student not found with ID: {student_id}",
+                    "message": f"Invalid field(s): {', '.join(sorted(unknown))}",
                     "courses": [],
                 }
 
-        enrolled_courses = student.get("enrolledCourses", [])
+        student_obj_id = ObjectId(student_id)
+        tenant_obj_id = ObjectId(tenantId)
 
-        if not enrolled_courses or len(enrolled_courses) == 0:
-            return {
-                "success": True,
-                "message": "Student is not enrolled in any courses",
-                "courses": [],
-            }
+        course_pipeline = [
+            {"$match": {"tenantId": tenant_obj_id}},
+            {"$sort": {"title": 1, "_id": 1}},
+            {
+                "$facet": {
+                    "total": [{"$count": "count"}],
+                    "items": [{"$skip": skip}, {"$limit": limit}]
+                    + ([{"$project": {f: 1 for f in fields}}] if fields else []),
+                }
+            },
+        ]
 
-        course_ids = [
-            ObjectId(cid) for cid in enrolled_courses if ObjectId.is_valid(cid)
+        # Match on _id only and classify the tenant in Python, so a miss costs
+        # the same single round trip (the joins below are tenant-scoped anyway)
+        pipeline = [
+            {"$match": {"_id": student_obj_id}},
+            {
+                "$project": {
+                    "tenantId": 1,
+                    # Legacy string references are converted server-side
+                    "enrolledCourses": {
+                        "$map": {
+                            "input": {"$ifNull": ["$enrolledCourses", []]},
+                            "in": {
+                                "$convert": {
+                                    "input": "$$this",
+                                    "to": "objectId",
+                                    "onError": None,
+                                    "onNull": None,
+                                }
+                            },
+                        }
+                    }
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "courses",
+                    "localField": "enrolledCourses",
+                    "foreignField": "_id",
+                    "pipeline": course_pipeline,
+                    "as": "page",
+                }
+            },
         ]
 
-        if not course_ids:
+        if include_progress:
+            pipeline.append(
+                {
+                    "$lookup": {
+                        "from": "studentPerformanceHistory",
+                        "pipeline": [
+                            {"$match": {"studentId": student_obj_id, "tenantId": tenant_obj_id}},
+                            {"$project": {"_id": 0, "courseStats": 1}},
+                            {"$limit": 1},
+                        ],
+                        "as": "performance",
+                    }
+                }
+            )
+
+        docs = await self.students_collection.aggregate(pipeline).to_list(length=1)
+
+        if not docs or str(docs[0].get("tenantId")) != str(tenant_obj_id):
             return {
-                "success": True,
-                "message": "Student has invalid course enrollments",
+                "success": False,
+                "message": lookup_error(
+                    "Student", student_id, OTHER_TENANT if docs else NOT_FOUND
+                ),
                 "courses": [],
             }
 
-        cursor = self.collection.find({"_id": {"$in": course_ids}})
-        courses = await cursor.to_list(length=100)
+        page = docs[0]["page"][0] if docs[0].get("page") else {}
+        courses = page.get("items", [])
+        total = page["total"][0]["count"] if page.get("total") else 0
+
+        progress = {}
+        if include_progress and docs[0].get("performance"):
+            for stat in docs[0]["performance"][0].get("courseStats", []):
+                progress[str(stat.get("courseId"))] = stat
 
         # Convert ObjectIds to strings
         for course in courses:
             course["_id"] = str(course["_id"])
-            course["tenantId"] = str(course["tenantId"])
 
-            #  UPDATED: Handle teacherId as ObjectId
-            if "teacherId" in course and isinstance(course["teacherId"], ObjectId):
+            if isinstance(course.get("tenantId"), ObjectId):
+                course["tenantId"] = str(course["tenantId"])
+
+            if isinstance(course.get("teacherId"), ObjectId):
                 course["teacherId"] = str(course["teacherId"])
 
+            if include_progress:
+                stat = progress.get(course["_id"], {})
+                course["progress"] = stat.get("completionPercentage", 0)
+                course["lastActive"] = stat.get("lastActive")
+
         return {
             "success": True,
-            "message": f"Found {len(courses)} enrolled courses",
+            "message": f"Found {len(courses)} enrolled courses (total: {total})",
             "courses": courses,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
         }
 
 
@@ -1,47 +1,33 @@
 from bson import ObjectId
 from app.db.database import db
-from app.crud.users import serialize_user
 from app.crud.students import serialize_student
 from app.crud.teachers import serialize_teacher
 from app.crud.courses import serialize_course
+from app.services.tenant_stats import tenant_dashboard
 
 
-async def get_all_students(tenant_id: str):
-    students = []
+async def get_summary(tenant_id: str):
+    """Counts and averages for the tenant, from its tenantStats document."""
+    return await tenant_dashboard(tenant_id)
 
-    async for s in db.students.find({"tenantId": ObjectId(tenant_id)}):
-        user = await db.users.find_one(
-            {"_id": s["userId"], "tenantId": ObjectId(tenant_id)}
-        )
 
-        if not user:
-            continue
+async def _with_users(collection, tenant_id: str, skip: int, limit: int, serialize):
+    """One page of profiles, their users fetched with a single $in query."""
+    profiles = await collection.find({"tenantId": ObjectId(tenant_id)}).sort("_id", 1).skip(skip).limit(limit).to_list(length=limit)
 
-        students.append({**serialize_student(s), "user": serialize_user(user)})
+    # the profile's tenantId is authoritative; users.tenantId isn't set by every enrollment path
+    users = {u["_id"]: u async for u in db.users.find({"_id": {"$in": [p["userId"] for p in profiles]}})}
+    return [serialize(p, users[p["userId"]]) for p in profiles if p["userId"] in users]
 
-    return students
 
+async def get_all_students(tenant_id: str, skip: int = 0, limit: int = 50):
+    return await _with_users(db.students, tenant_id, skip, limit, serialize_student)
 
-async def get_all_teachers(tenant_id: str):
-    teachers = []
 
-    async for t in db.teachers.find({"tenantId": ObjectId(tenant_id)}):
-        user = await db.users.find_one(
-            {"_id": t["userId"], "tenantId": ObjectId(tenant_id)}
-        )
+async def get_all_teachers(tenant_id: str, skip: int = 0, limit: int = 50):
+    return await _with_users(db.teachers, tenant_id, skip, limit, serialize_teacher)
 
-        if not user:
-            continue
 
-        teachers.append({**serialize_teacher(t), "user": serialize_user(user)})
-
-    return teachers
-
-
-async def get_all_courses(tenant_id: str):
-    courses = []
-
-    async for c in db.courses.find({"tenantId": ObjectId(tenant_id)}):
-        courses.append(serialize_course(c))
-
-    return courses
+async def get_all_courses(tenant_id: str, skip: int = 0, limit: int = 50):
+    cursor = db.courses.find({"tenantId": ObjectId(tenant_id)}).sort("_id", 1).skip(skip).limit(limit)
+    return [serialize_course(c) async for c in cursor]
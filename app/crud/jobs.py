@@ -0,0 +1,109 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+from app.db.database import db
+
+
+# Job lifecycle: queued -> running -> completed | failed
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def serialize_job(job: dict) -> dict:
+    return {
+        "id": str(job["_id"]),
+        "type": job["type"],
+        "tenantId": str(job["tenantId"]) if job.get("tenantId") else None,
+        "params": job.get("params", {}),
+        "status": job["status"],
+        "progress": job.get("progress", {}),
+        "error": job.get("error"),
+        "createdAt": job.get("createdAt"),
+        "startedAt": job.get("startedAt"),
+        "finishedAt": job.get("finishedAt"),
+        "updatedAt": job.get("updatedAt"),
+    }
+
+
+async def create_job(job_type: str, params: dict, tenant_id: Optional[ObjectId] = None):
+    now = datetime.utcnow()
+    doc = {
+        "type": job_type,
+        "tenantId": tenant_id,
+        "params": params,
+        "status": QUEUED,
+        "progress": {},
+        "error": None,
+        "createdAt": now,
+        "startedAt": None,
+        "finishedAt": None,
+        "updatedAt": now,
+    }
+    result = await db.jobs.insert_one(doc)
+    return result.inserted_id
+
+
+async def get_job(job_id: str, tenant_id: Optional[str] = None):
+    # malformed ids can't match a job: not found, like an unknown one
+    if not ObjectId.is_valid(job_id) or (tenant_id and not ObjectId.is_valid(tenant_id)):
+        return None
+
+    query = {"_id": ObjectId(job_id)}
+    if tenant_id:
+        query["tenantId"] = ObjectId(tenant_id)
+
+    job = await db.jobs.find_one(query)
+    return serialize_job(job) if job else None
+
+
+async def claim_job(job_id: ObjectId):
+    """Atomically move a queued job to running; None if someone else has it."""
+    now = datetime.utcnow()
+    return await db.jobs.find_one_and_update(
+        {"_id": job_id, "status": QUEUED},
+        {"$set": {"status": RUNNING, "startedAt": now, "updatedAt": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def add_progress(job_id: ObjectId, counts: dict):
+    """Increment progress counters; also serves as the job heartbeat."""
+    await db.jobs.update_one(
+        {"_id": job_id},
+        {
+            "$inc": {f"progress.{k}": v for k, v in counts.items()},
+            "$set": {"updatedAt": datetime.utcnow()},
+        },
+    )
+
+
+async def finish_job(job_id: ObjectId, error: Optional[str] = None):
+    now = datetime.utcnow()
+    await db.jobs.update_one(
+        {"_id": job_id},
+        {
+            "$set": {
+                "status": FAILED if error else COMPLETED,
+                "error": error,
+                "finishedAt": now,
+                "updatedAt": now,
+            }
+        },
+    )
+
+
+async def requeue_stale_jobs(stale_seconds: int):
+    """Put jobs orphaned by a restarted worker back in the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    await db.jobs.update_many(
+        {"status": RUNNING, "updatedAt": {"$lt": cutoff}},
+        {"$set": {"status": QUEUED, "updatedAt": datetime.utcnow()}},
+    )
+
+
+async def get_queued_job_ids():
+    cursor = db.jobs.find({"status": QUEUED}, {"_id": 1}).sort("createdAt", 1)
+    return [j["_id"] async for j in cursor]
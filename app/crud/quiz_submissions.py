@@ -1,6 +1,7 @@
 from bson import ObjectId
 from datetime import datetime
 from app.db.database import db
+from app.crud import tenant_stats
 from typing import Optional, Tuple
 
 # --- helper: serialize submission for API ---
@@ -87,6 +88,7 @@ async def submit_and_grade_submission(payload):
             "gradingDetails": per_question_details  # optional: store per-question correctness
         }}
     )
+    await tenant_stats.increment(data["tenantId"], quizScoreSum=percentage, quizScoreCount=1)
 
     # Fetch updated submission and return serialized
     updated = await db.quizSubmissions.find_one({"_id": res.inserted_id})
@@ -390,7 +392,15 @@ async def get_by_student(student_id, sort=None):
 async def delete_submission(_id):
     """ Delete a submission by ID """
 
-    result = await db.quizSubmissions.delete_one({"_id": ObjectId(_id)})
+    deleted = await db.quizSubmissions.find_one_and_delete(
+        {"_id": ObjectId(_id)}, projection={"tenantId": 1, "status": 1, "percentage": 1}
+    )
 
     # Return True only if 1 document was deleted
-    return result.deleted_count > 0
\ No newline at end of file
+    if deleted is None:
+        return False
+    if deleted.get("status") == "graded":
+        await tenant_stats.increment(
+            deleted.get("tenantId"), quizScoreSum=-(deleted.get("percentage") or 0), quizScoreCount=-1
+        )
+    return True
\ No newline at end of file
@@ -5,6 +5,7 @@ from datetime import datetime
 
 from fastapi import HTTPException, status
 from app.db.database import db
+from app.services.quotas import quotas
 
 def _ensure_objectid(_id: str, name: str = "id"):
     if not ObjectId.is_valid(_id):
@@ -62,8 +63,17 @@ async def create_quiz(request):
         "deletedAt": None
     })
 
+    # AI generation spends one of the tenant's monthly ai_credits (403 when used up);
+    # given back if the insert fails
+    credit_month = await quotas.use_ai_credit(data["tenantId"]) if data.get("aiGenerated") else None
+
     # Insert into MongoDB
-    res = await db.quizzes.insert_one(data)
+    try:
+        res = await db.quizzes.insert_one(data)
+    except Exception:
+        if credit_month:
+            await quotas.release_ai_credit(data["tenantId"], credit_month)
+        raise
 
     # Fetch inserted document
     new_quiz = await db.quizzes.find_one({"_id": res.inserted_id})
@@ -0,0 +1,14 @@
+from datetime import datetime
+from app.db.database import db
+
+
+# Revoked (logged out) tokens are keyed by token digest and expire with the
+# token itself through the TTL index on expiresAt (see app/db/indexes.py).
+
+
+async def revoke_token(digest: bytes, expires_at: datetime):
+    await db.revokedTokens.update_one(
+        {"_id": digest},
+        {"$setOnInsert": {"expiresAt": expires_at, "revokedAt": datetime.utcnow()}},
+        upsert=True,
+    )
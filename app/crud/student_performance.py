@@ -1,9 +1,116 @@
 from bson import ObjectId
 from datetime import datetime
-from app.db.database import student_performance_collection
+from pymongo import ReturnDocument, UpdateOne
+from app.db.database import (
+    student_performance_collection,
+    student_performance_history_collection,
+    weekly_leaderboards_collection,
+)
+from app.crud.study_time import StudyTimeCRUD
+from app.services.rankings import rankings
+from app.services.weekly_rollover import week_boundary
 from app.utils.mongo import fix_object_ids
 
 
+# A student's performance is split in two documents:
+#
+#   studentPerformance         hot counters (points, xp, level), read on
+#                              nearly every request and by the leaderboards
+#   studentPerformanceHistory  cold, growing history: badges, certificates,
+#                              courseStats; read only by their own endpoints
+#
+# (study time lives in the studyTime buckets, see study_time.py). Writes
+# return only the slice they changed, so response sizes stay constant as a
+# student accumulates history.
+
+# Fields that used to live on studentPerformance; documents not yet moved by
+# the split_student_performance migration may still carry them
+LEGACY_HISTORY_FIELDS = {"badges": 0, "certificates": 0, "courseStats": 0, "weeklyStudyTime": 0}
+
+COMPLETION_BADGE = {"name": "Course Completer", "icon": "completion.png"}
+
+
+def _progress_pipeline(course_id: str, completion: int, last_active: str, award_badge: bool | None = None) -> list:
+    """
+    Update pipeline for a studentPerformanceHistory document that sets the course's completion / lastActive, appending the
+    course entry if it is new, and at 100% appends the completion badge unless
+    the course already has one. Re-applying the same event changes nothing.
+    """
+    if award_badge is None:
+        award_badge = completion == 100
+
+    course = {"$literal": course_id}
+    stats = {"$ifNull": ["$courseStats", []]}
+    badges = {"$ifNull": ["$badges", []]}
+    progress = {"completionPercentage": completion, "lastActive": {"$literal": last_active}}
+
+    update = {
+        "courseStats": {
+            "$cond": [
+                {"$in": [course, {"$ifNull": ["$courseStats.courseId", []]}]},
+                {
+                    "$map": {
+                        "input": stats,
+                        "in": {
+                            "$cond": [
+                                {"$eq": ["$$this.courseId", course]},
+                                {"$mergeObjects": ["$$this", progress]},
+                                "$$this",
+                            ]
+                        },
+                    }
+                },
+                {"$concatArrays": [stats, [{"courseId": course, **progress}]]},
+            ]
+        }
+    }
+
+    if award_badge:
+        badge = {"courseId": course, **{k: {"$literal": v} for k, v in COMPLETION_BADGE.items()}, "date": "$$NOW"}
+        update["badges"] = {
+            "$cond": [
+                {"$in": [course, {"$ifNull": ["$badges.courseId", []]}]},
+                badges,
+                {"$concatArrays": [badges, [badge]]},
+            ]
+        }
+
+    return [{"$set": update}]
+
+
+def _student_filter(student_id: str, tenant_id: str) -> dict:
+    return {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)}
+
+
+def _merge_legacy(legacy: list, current: list) -> list:
+    """
+    Entries still on a studentPerformance document the migration hasn't
+    reached, followed by the history's, merged the way the migration will:
+    a legacy entry is dropped if the history already has it or (course stats,
+    completion badges) already has an entry for its course.
+    """
+    courses = {str(entry["courseId"]) for entry in current if entry.get("courseId") is not None}
+
+    def duplicate(entry):
+        course = entry.get("courseId")
+        return entry in current or (course is not None and str(course) in courses)
+
+    return [entry for entry in legacy if not duplicate(entry)] + current
+
+
+async def _history_field(student_id: str, tenant_id: str, field: str) -> list:
+    query = _student_filter(student_id, tenant_id)
+    doc = await student_performance_history_collection.find_one(query, {field: 1, "_id": 0})
+    entries = (doc or {}).get(field, [])
+
+    # not migrated yet (see LEGACY_HISTORY_FIELDS)
+    legacy = await student_performance_collection.find_one({**query, field: {"$exists": True}}, {field: 1, "_id": 0})
+    if legacy:
+        entries = _merge_legacy(legacy.get(field) or [], entries)
+
+    return fix_object_ids(entries)
+
+
 class StudentPerformanceCRUD:
 
     # -----------------------------------------------------------
@@ -20,22 +127,27 @@ class StudentPerformanceCRUD:
             # core points
             "totalPoints": 0,
             "pointsThisWeek": 0,
+            # already counting this week; the next rollover won't need to skip it
+            "pointsWeekStart": week_boundary(datetime.utcnow()).date().isoformat(),
 
             # XP system
             "xp": 0,
             "level": 1,
             "xpToNextLevel": 300,
 
-            # breakdowns
-            "badges": [],
-            "certificates": [],
-            "weeklyStudyTime": [],
-            "courseStats": [],
-
-            "createdAt": datetime.utcnow()
+            "createdAt": datetime.utcnow(),
+            # points writers keep this current; other workers' leaderboards resync from it
+            "updatedAt": datetime.utcnow()
         }
 
         await student_performance_collection.insert_one(doc)
+        # progress writes update the history in place; they never create it
+        await student_performance_history_collection.update_one(
+            _student_filter(student_id, tenant_id),
+            {"$setOnInsert": {"createdAt": doc["createdAt"]}},
+            upsert=True,
+        )
+        rankings.set_points(tenant_id, student_id, 0, student_name)
         return True
 
     # -----------------------------------------------------------
@@ -69,10 +181,10 @@ class StudentPerformanceCRUD:
     @staticmethod
     async def get_student_performance(student_id: str, tenant_id: str):
 
-        doc = await student_performance_collection.find_one({
-            "studentId": ObjectId(student_id),
-            "tenantId": ObjectId(tenant_id)
-        })
+        # hot counters only; history has its own endpoints
+        doc = await student_performance_collection.find_one(
+            _student_filter(student_id, tenant_id), LEGACY_HISTORY_FIELDS
+        )
 
         if not doc:
             return None
@@ -89,7 +201,10 @@ class StudentPerformanceCRUD:
 
         await student_performance_collection.update_one(
             {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"$inc": {"totalPoints": points, "pointsThisWeek": points, "xp": points}}
+            {
+                "$inc": {"totalPoints": points, "pointsThisWeek": points, "xp": points},
+                "$set": {"updatedAt": datetime.utcnow()},
+            }
         )
 
         updated = await StudentPerformanceCRUD.get_student_performance(student_id, tenant_id)
@@ -104,8 +219,61 @@ class StudentPerformanceCRUD:
             }}
         )
 
+        rankings.set_points(tenant_id, student_id, updated["totalPoints"], updated.get("studentName"))
         return updated
 
+    @staticmethod
+    def points_ops(tenant_id: str, events: list[dict]) -> list[UpdateOne]:
+        """One $inc per student for points events ({studentId, points})."""
+
+        now = datetime.utcnow()
+        totals: dict = {}
+        for event in events:
+            totals[event["studentId"]] = totals.get(event["studentId"], 0) + event["points"]
+
+        return [
+            UpdateOne(
+                _student_filter(student_id, tenant_id),
+                {
+                    "$inc": {"totalPoints": points, "pointsThisWeek": points, "xp": points},
+                    "$set": {"updatedAt": now},
+                }
+            )
+            for student_id, points in totals.items() if points
+        ]
+
+    @staticmethod
+    async def recompute_levels(students: list[tuple[str, str]]):
+        """
+        Level up (tenant_id, student_id) students after a bulk points $inc
+        (one read, one bulk write) and publish their new totals to the
+        leaderboards.
+        """
+
+        if not students:
+            return
+
+        cursor = student_performance_collection.find(
+            {"$or": [_student_filter(student_id, tenant_id) for tenant_id, student_id in students]},
+            {"studentId": 1, "tenantId": 1, "studentName": 1, "totalPoints": 1, "xp": 1, "level": 1, "xpToNextLevel": 1}
+        )
+
+        ops = []
+        async for doc in cursor:
+            rankings.set_points(doc["tenantId"], doc["studentId"], doc.get("totalPoints", 0), doc.get("studentName"))
+
+            before = (doc.get("xp", 0), doc.get("level", 1), doc.get("xpToNextLevel"))
+            doc = StudentPerformanceCRUD._update_level_system(doc)
+            if (doc["xp"], doc["level"], doc["xpToNextLevel"]) != before:
+                ops.append(UpdateOne(
+                    # guarded on xp so a concurrent add_points is not overwritten
+                    {"_id": doc["_id"], "xp": before[0]},
+                    {"$set": {"xp": doc["xp"], "level": doc["level"], "xpToNextLevel": doc["xpToNextLevel"]}}
+                ))
+
+        if ops:
+            await student_performance_collection.bulk_write(ops, ordered=False)
+
     # -----------------------------------------------------------
     # BADGES
     # -----------------------------------------------------------
@@ -114,22 +282,18 @@ class StudentPerformanceCRUD:
 
         badge["date"] = datetime.utcnow()
 
-        await student_performance_collection.update_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"$push": {"badges": badge}}
+        await student_performance_history_collection.update_one(
+            _student_filter(student_id, tenant_id),
+            {"$push": {"badges": badge}},
+            upsert=True
         )
 
-        return await StudentPerformanceCRUD.get_student_performance(student_id, tenant_id)
+        return fix_object_ids(badge)
 
     @staticmethod
     async def view_badges(student_id: str, tenant_id: str):
 
-        doc = await student_performance_collection.find_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"badges": 1, "_id": 0}
-        )
-
-        return fix_object_ids(doc.get("badges", [])) if doc else []
+        return await _history_field(student_id, tenant_id, "badges")
 
     # -----------------------------------------------------------
     # CERTIFICATES
@@ -139,22 +303,18 @@ class StudentPerformanceCRUD:
 
         cert["date"] = datetime.utcnow()
 
-        await student_performance_collection.update_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"$push": {"certificates": cert}}
+        await student_performance_history_collection.update_one(
+            _student_filter(student_id, tenant_id),
+            {"$push": {"certificates": cert}},
+            upsert=True
         )
 
-        return await StudentPerformanceCRUD.get_student_performance(student_id, tenant_id)
+        return fix_object_ids(cert)
 
     @staticmethod
     async def view_certificates(student_id: str, tenant_id: str):
 
-        doc = await student_performance_collection.find_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"certificates": 1, "_id": 0}
-        )
-
-        return fix_object_ids(doc.get("certificates", [])) if doc else []
+        return await _history_field(student_id, tenant_id, "certificates")
 
     # -----------------------------------------------------------
     # COURSE STATS
@@ -162,12 +322,7 @@ class StudentPerformanceCRUD:
     @staticmethod
     async def get_course_stats(student_id: str, tenant_id: str):
 
-        doc = await student_performance_collection.find_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"courseStats": 1, "_id": 0}
-        )
-
-        return fix_object_ids(doc.get("courseStats", [])) if doc else []
+        return await _history_field(student_id, tenant_id, "courseStats")
 
     # -----------------------------------------------------------
     # PROGRESS UPDATE + BADGE
@@ -175,43 +330,75 @@ class StudentPerformanceCRUD:
     @staticmethod
     async def update_course_progress(student_id: str, tenant_id: str, course_id: str, completion: int, last_active: str):
 
-        # update OR insert
-        update_result = await student_performance_collection.update_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id), "courseStats.courseId": course_id},
-            {"$set": {
-                "courseStats.$.completionPercentage": completion,
-                "courseStats.$.lastActive": last_active
-            }}
+        # one atomic write: the course entry and, at 100%, the badge.
+        # No history document (created with the performance record): unknown student
+        before = await student_performance_history_collection.find_one_and_update(
+            _student_filter(student_id, tenant_id),
+            _progress_pipeline(course_id, completion, last_active),
+            projection={"_id": 0, "badges": {"$elemMatch": {"courseId": course_id}}},
+            return_document=ReturnDocument.BEFORE,
         )
+        if before is None:
+            return None
 
-        if update_result.modified_count == 0:
-            await student_performance_collection.update_one(
-                {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-                {"$push": {
-                    "courseStats": {
-                        "courseId": course_id,
-                        "completionPercentage": completion,
-                        "lastActive": last_active
-                    }
-                }}
+        badge = None
+        if completion == 100 and not before.get("badges"):
+            badge = {**COMPLETION_BADGE, "courseId": course_id}
+
+        return {
+            "courseStat": {"courseId": course_id, "completionPercentage": completion, "lastActive": last_active},
+            "badgeAwarded": badge,
+        }
+
+    @staticmethod
+    def progress_ops(tenant_id: str, events: list[dict]) -> list[UpdateOne]:
+        """
+        History updates for progress events ({studentId, courseId,
+        completionPercentage, lastActive}, oldest first). Students without a
+        history document are not matched, so nothing is written for them.
+
+        Events for the same student and course collapse into the last one;
+        the completion badge is still awarded if any of them reached 100%.
+        """
+
+        latest: dict = {}
+        completed = set()
+        for event in events:
+            key = (event["studentId"], event["courseId"])
+            latest.pop(key, None)  # keep dict order = order of the last event
+            latest[key] = event
+            if event["completionPercentage"] == 100:
+                completed.add(key)
+
+        return [
+            UpdateOne(
+                _student_filter(student_id, tenant_id),
+                _progress_pipeline(
+                    course_id,
+                    event["completionPercentage"],
+                    event["lastActive"],
+                    award_badge=(student_id, course_id) in completed,
+                ),
             )
+            for (student_id, course_id), event in latest.items()
+        ]
 
-        # Award completion badge (only if 100%)
-        if completion == 100:
-            exists = await student_performance_collection.find_one({
-                "studentId": ObjectId(student_id),
-                "tenantId": ObjectId(tenant_id),
-                "badges.courseId": course_id
-            })
+    @staticmethod
+    async def bulk_update_course_progress(tenant_id: str, events: list[dict]):
+        """
+        Apply many progress events in one bulk_write (see progress_ops).
+        "matched" counts the updates that found the student's history;
+        the rest were for unknown students.
+        """
+
+        ops = StudentPerformanceCRUD.progress_ops(tenant_id, events)
+        if not ops:
+            return {"events": len(events), "applied": 0, "matched": 0}
 
-            if not exists:
-                await StudentPerformanceCRUD.add_badge(student_id, tenant_id, {
-                    "courseId": course_id,
-                    "name": "Course Completer",
-                    "icon": "completion.png"
-                })
+        # each op touches a different course entry, so their order doesn't matter
+        result = await student_performance_history_collection.bulk_write(ops, ordered=False)
 
-        return await StudentPerformanceCRUD.get_student_performance(student_id, tenant_id)
+        return {"events": len(events), "applied": len(ops), "matched": result.matched_count}
 
     # -----------------------------------------------------------
     # WEEKLY TIME
@@ -219,108 +406,73 @@ class StudentPerformanceCRUD:
     @staticmethod
     async def add_weekly_time(student_id: str, tenant_id: str, week_start: str, minutes: int):
 
-        await student_performance_collection.update_one(
-            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)},
-            {"$push": {
-                "weeklyStudyTime": {
-                    "weekStart": week_start,
-                    "minutes": minutes
-                }
-            }}
-        )
+        # adds to the week's total in the student's monthly bucket
+        return await StudyTimeCRUD.add_minutes(student_id, tenant_id, week_start, minutes)
 
-        return await StudentPerformanceCRUD.get_student_performance(student_id, tenant_id)
+    # -----------------------------------------------------------
+    # LEADERBOARDS (served from the in-memory rankings, see services/rankings.py)
+    # -----------------------------------------------------------
+    @staticmethod
+    def _clean(rows: list[dict]) -> list[dict]:
+        return [{"studentName": r["studentName"], "points": r["points"], "rank": r["rank"]} for r in rows]
 
     # -----------------------------------------------------------
     # CLEAN TENANT TOP 5 (rank, name, points)
     # -----------------------------------------------------------
     @staticmethod
     async def tenant_top5(tenant_id: str):
-
-        cursor = student_performance_collection.find({
-            "tenantId": ObjectId(tenant_id)
-        })
-
-        docs = await cursor.to_list(length=None)
-
-        leaderboard = [{
-            "studentName": d.get("studentName"),
-            "points": d.get("totalPoints", 0)
-        } for d in docs]
-
-        leaderboard.sort(key=lambda x: -x["points"])
-
-        top5 = leaderboard[:5]
-
-        for idx, item in enumerate(top5, start=1):
-            item["rank"] = idx
-
-        return top5
+        return StudentPerformanceCRUD._clean(await rankings.top(tenant_id, 5))
 
     # -----------------------------------------------------------
     # CLEAN TENANT FULL LEADERBOARD
     # -----------------------------------------------------------
     @staticmethod
     async def tenant_full(tenant_id: str):
-
-        cursor = student_performance_collection.find({
-            "tenantId": ObjectId(tenant_id)
-        })
-
-        docs = await cursor.to_list(length=None)
-
-        leaderboard = [{
-            "studentName": d.get("studentName"),
-            "points": d.get("totalPoints", 0)
-        } for d in docs]
-
-        leaderboard.sort(key=lambda x: -x["points"])
-
-        for idx, item in enumerate(leaderboard, start=1):
-            item["rank"] = idx
-
-        return leaderboard
+        return StudentPerformanceCRUD._clean(await rankings.top(tenant_id, await rankings.size(tenant_id)))
 
     # -----------------------------------------------------------
     # CLEAN GLOBAL TOP 5
     # -----------------------------------------------------------
     @staticmethod
     async def global_top5():
-
-        cursor = student_performance_collection.find({})
-        docs = await cursor.to_list(length=None)
-
-        leaderboard = [{
-            "studentName": d.get("studentName"),
-            "points": d.get("totalPoints", 0)
-        } for d in docs]
-
-        leaderboard.sort(key=lambda x: -x["points"])
-
-        top5 = leaderboard[:5]
-
-        for idx, item in enumerate(top5, start=1):
-            item["rank"] = idx
-
-        return top5
+        return StudentPerformanceCRUD._clean(rankings.global_top(5))
 
     # -----------------------------------------------------------
     # CLEAN GLOBAL FULL LEADERBOARD
     # -----------------------------------------------------------
     @staticmethod
     async def global_full():
+        return StudentPerformanceCRUD._clean(rankings.global_top())
 
-        cursor = student_performance_collection.find({})
-        docs = await cursor.to_list(length=None)
+    # -----------------------------------------------------------
+    # STUDENT RANK / NEIGHBOURHOOD
+    # -----------------------------------------------------------
+    @staticmethod
+    async def student_rank(student_id: str, tenant_id: str):
+        return await rankings.rank_of(tenant_id, student_id)
 
-        leaderboard = [{
-            "studentName": d.get("studentName"),
-            "points": d.get("totalPoints", 0)
-        } for d in docs]
+    @staticmethod
+    async def students_around(student_id: str, tenant_id: str, radius: int):
+        return await rankings.around(tenant_id, student_id, radius)
 
-        leaderboard.sort(key=lambda x: -x["points"])
+    # -----------------------------------------------------------
+    # WEEKLY LEADERBOARDS (archived by services/weekly_rollover.py)
+    # -----------------------------------------------------------
+    @staticmethod
+    async def weekly_leaderboard(tenant_id: str, week_start: str | None = None):
+        """The archived ranking of one week (default: the latest archived week)."""
+        query = {"tenantId": ObjectId(tenant_id)}
+        if week_start is not None:
+            query["weekStart"] = week_start
 
-        for idx, item in enumerate(leaderboard, start=1):
-            item["rank"] = idx
+        doc = await weekly_leaderboards_collection.find_one(query, {"_id": 0}, sort=[("weekStart", -1)])
+        return fix_object_ids(doc) if doc else None
 
-        return leaderboard
+    @staticmethod
+    async def weekly_leaderboard_weeks(tenant_id: str, limit: int):
+        """Archived weeks, newest first."""
+        cursor = weekly_leaderboards_collection.find(
+            {"tenantId": ObjectId(tenant_id)},
+            {"_id": 0, "weekStart": 1, "weekEnd": 1, "participants": 1},
+        ).sort("weekStart", -1).limit(limit)
+        return await cursor.to_list(length=limit)
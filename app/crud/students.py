@@ -2,8 +2,12 @@ from bson import ObjectId
 from datetime import datetime
 
 from fastapi import HTTPException
+from pymongo import ReturnDocument
 from app.db.database import db
+from app.crud import tenant_stats
 from app.crud.users import serialize_user
+from app.services.quotas import quotas
+from app.utils.mongo import object_id_refs
 
 
 def serialize_student(s, user):
@@ -37,6 +41,9 @@ async def get_student_by_user(user_id: str):
 
 
 async def create_student(user_id: str):
+    # Fetch the user document
+    user = await db.users.find_one({"_id": ObjectId(user_id)})
+
     data = {
         "userId": ObjectId(user_id),
         "enrolledCourses": [],
@@ -45,13 +52,14 @@ async def create_student(user_id: str):
         "createdAt": datetime.utcnow(),
         "updatedAt": datetime.utcnow(),
     }
+    # signed up into a tenant: the profile belongs to it too (counted when
+    # create_user reserved the plan slot)
+    if user and user.get("tenantId"):
+        data["tenantId"] = user["tenantId"]
 
     result = await db.students.insert_one(data)
     student = await db.students.find_one({"_id": result.inserted_id})
 
-    # Fetch the user document
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-
     return serialize_student(student, user)
 
 
@@ -64,6 +72,11 @@ async def update_student_profile(user_id: str, updates: dict):
         if field in updates:
             student_fields[field] = updates[field]
 
+    # course references are stored as ObjectId
+    for field in ["enrolledCourses", "completedCourses"]:
+        if field in student_fields:
+            student_fields[field] = object_id_refs(student_fields[field])
+
     # ---- user fields ----
     for field in ["fullName", "profileImageURL", "contactNo", "country"]:
         if field in updates:
@@ -100,15 +113,33 @@ async def assign_student_to_tenant(student_id: str, tenant_id: str):
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
 
+    previous = await db.students.find_one({"_id": ObjectId(student_id)}, {"tenantId": 1})
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    moving = previous.get("tenantId") != ObjectId(tenant_id)
+    if moving:
+        # a slot of the new tenant's plan (403 when full)
+        await quotas.reserve(tenant_id, "students")
+
     # update student
-    result = await db.students.update_one(
+    previous = await db.students.find_one_and_update(
         {"_id": ObjectId(student_id)},
         {"$set": {"tenantId": ObjectId(tenant_id), "updatedAt": datetime.utcnow()}},
+        projection={"tenantId": 1, "enrolledCourses": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.modified_count == 0:
+    if previous is None:
+        if moving:
+            await quotas.release(tenant_id, "students")
         raise HTTPException(status_code=404, detail="Student not found")
 
+    if moving:
+        enrollments = len(previous.get("enrolledCourses", []))
+        await tenant_stats.increment(previous.get("tenantId"), students=-1, activeEnrollments=-enrollments)
+        await tenant_stats.increment(tenant_id, activeEnrollments=enrollments)
+
     # fetch updated student
     student = await db.students.find_one({"_id": ObjectId(student_id)})
     user = await db.users.find_one({"_id": ObjectId(student["userId"])})
@@ -136,21 +167,26 @@ async def enroll_student_in_course(student_id: str, course_id: str):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
+    enrolled = object_id_refs(student.get("enrolledCourses", []))
+
     # Update tenantId if not set
     if "tenantId" not in student or not student.get("tenantId"):
+        # joining the course's tenant takes a slot of its plan (403 when full)
+        await quotas.reserve(course["tenantId"], "students")
         await db.students.update_one(
             {"_id": ObjectId(student_id)},
             {"$set": {"tenantId": course["tenantId"], "updatedAt": datetime.utcnow()}},
         )
+        await tenant_stats.increment(course["tenantId"], activeEnrollments=len(enrolled))
 
     # Enroll student in course
-    enrolled = student.get("enrolledCourses", [])
-    if str(course["_id"]) not in enrolled:
-        enrolled.append(str(course["_id"]))
+    if course["_id"] not in enrolled:
+        enrolled.append(course["_id"])
         await db.students.update_one(
             {"_id": ObjectId(student_id)},
             {"$set": {"enrolledCourses": enrolled, "updatedAt": datetime.utcnow()}},
         )
+        await tenant_stats.increment(student.get("tenantId") or course["tenantId"], activeEnrollments=1)
 
     # Fetch updated student
     student = await db.students.find_one({"_id": ObjectId(student_id)})
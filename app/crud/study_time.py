@@ -0,0 +1,160 @@
+from bson import ObjectId
+from datetime import date, datetime
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from app.db.database import db
+
+
+# Study time lives in `studyTime`, one bucket document per student per month:
+#
+#   {studentId, tenantId, month: "2025-03",
+#    weeks: {"2025-03-03": 95, "2025-03-10": 40}, totalMinutes: 135}
+#
+# Reporting time for a week $inc's that week's counter in its month's bucket
+# (upserted on first use), so repeated reports for the same week add up
+# instead of appending, and no document grows beyond ~5 counters. Buckets are
+# only created for students with a studentPerformance record.
+#
+# Until the bucket_study_time migration has run, older minutes may still sit
+# in studentPerformance.weeklyStudyTime ([{weekStart, minutes}, ...]); reads
+# fold them in.
+
+study_time_collection = db["studyTime"]
+
+
+def parse_day(value: str, field: str = "weekStart") -> date:
+    try:
+        return datetime.fromisoformat(value).date()
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid {field}, expected YYYY-MM-DD")
+
+
+def month_of(day: date) -> str:
+    return day.strftime("%Y-%m")
+
+
+class StudyTimeCRUD:
+
+    @staticmethod
+    async def existing_students(tenant_id: str, student_ids) -> set[str]:
+        """The ids among student_ids that have a studentPerformance record."""
+        if not student_ids:
+            return set()
+        cursor = db.studentPerformance.find(
+            {"tenantId": ObjectId(tenant_id), "studentId": {"$in": [ObjectId(s) for s in set(student_ids)]}},
+            {"_id": 0, "studentId": 1},
+        )
+        return {str(doc["studentId"]) async for doc in cursor}
+
+    @staticmethod
+    async def add_minutes(student_id: str, tenant_id: str, week_start: str, minutes: int) -> dict | None:
+        """None if the student has no studentPerformance record."""
+        day = parse_day(week_start)
+        week = day.isoformat()
+
+        if not await db.studentPerformance.count_documents(
+            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id)}, limit=1
+        ):
+            return None
+
+        bucket = await study_time_collection.find_one_and_update(
+            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id), "month": month_of(day)},
+            {
+                "$inc": {f"weeks.{week}": minutes, "totalMinutes": minutes},
+                "$set": {"updatedAt": datetime.utcnow()},
+            },
+            upsert=True,
+            projection={"weeks": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return {"weekStart": week, "minutes": bucket["weeks"][week]}
+
+    @staticmethod
+    def add_minutes_ops(tenant_id: str, events: list[dict], known) -> list[UpdateOne]:
+        """
+        Bucket updates for many study-time events ({studentId, weekStart,
+        minutes}): one upsert per student and month, however many events.
+        Events of students not in `known` (see existing_students) are
+        dropped.
+        """
+        buckets: dict = {}
+        for event in events:
+            if event["studentId"] not in known:
+                continue
+            day = parse_day(event["weekStart"])
+            inc = buckets.setdefault((event["studentId"], month_of(day)), {"totalMinutes": 0})
+            inc[f"weeks.{day.isoformat()}"] = inc.get(f"weeks.{day.isoformat()}", 0) + event["minutes"]
+            inc["totalMinutes"] += event["minutes"]
+
+        now = datetime.utcnow()
+        return [
+            UpdateOne(
+                {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id), "month": month},
+                {"$inc": inc, "$set": {"updatedAt": now}},
+                upsert=True,
+            )
+            for (student_id, month), inc in buckets.items()
+        ]
+
+    @staticmethod
+    async def get_range(student_id: str, tenant_id: str, start: str, end: str, granularity: str = "week") -> dict:
+        """
+        Study time between two dates (inclusive), for charts.
+        granularity "week" -> one point per reported week, "month" -> one per month.
+        """
+        first, last = parse_day(start, "from"), parse_day(end, "to")
+        if first > last:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+        cursor = study_time_collection.find(
+            {
+                "studentId": ObjectId(student_id),
+                "tenantId": ObjectId(tenant_id),
+                "month": {"$gte": month_of(first), "$lte": month_of(last)},
+            },
+            {"_id": 0, "month": 1, "weeks": 1, "migratedFrom": 1},
+        )
+
+        buckets = {}
+        async for bucket in cursor:
+            buckets[bucket["month"]] = bucket
+
+        # not migrated yet; skip months whose bucket already absorbed this document
+        legacy = await db.studentPerformance.find_one(
+            {"studentId": ObjectId(student_id), "tenantId": ObjectId(tenant_id), "weeklyStudyTime": {"$exists": True}},
+            {"weeklyStudyTime": 1},
+        )
+        for entry in (legacy or {}).get("weeklyStudyTime") or []:
+            try:
+                day = parse_day(str(entry.get("weekStart"))[:10])
+            except HTTPException:
+                continue
+            bucket = buckets.setdefault(month_of(day), {"month": month_of(day), "weeks": {}})
+            if legacy["_id"] in bucket.get("migratedFrom", ()):
+                continue
+            weeks = bucket["weeks"] = dict(bucket.get("weeks", {}))
+            weeks[day.isoformat()] = weeks.get(day.isoformat(), 0) + int(entry.get("minutes") or 0)
+
+        weeks = []
+        for month in sorted(buckets):
+            for week, minutes in buckets[month].get("weeks", {}).items():
+                if first.isoformat() <= week <= last.isoformat():
+                    weeks.append({"weekStart": week, "month": month, "minutes": minutes})
+        weeks.sort(key=lambda w: w["weekStart"])
+
+        if granularity == "month":
+            months: dict = {}
+            for w in weeks:
+                months[w["month"]] = months.get(w["month"], 0) + w["minutes"]
+            points = [{"month": m, "minutes": total} for m, total in months.items()]
+        else:
+            points = [{"weekStart": w["weekStart"], "minutes": w["minutes"]} for w in weeks]
+
+        return {
+            "from": first.isoformat(),
+            "to": last.isoformat(),
+            "granularity": granularity,
+            "totalMinutes": sum(w["minutes"] for w in weeks),
+            "points": points,
+        }
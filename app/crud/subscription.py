@@ -1,51 +1,97 @@
-# app/routes/subscription.py
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.db.database import db  # your motor/mongodb client
-from app.schemas.subscription import Subscription
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from app.db.database import db
+from app.services.subscriptions import subscription_service
 from bson import ObjectId
+from typing import Optional, Any
 
-router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
 
-# Get all subscriptions
-@router.get("/", response_model=List[Subscription])
-async def get_subscriptions():
-    subscriptions = await db.subscriptions.find().to_list(100)
-    return subscriptions
+# One subscription per tenant, keyed by ObjectId tenantId (unique index, see
+# db/indexes.py). Reads by tenant go through the per-worker cache in
+# services/subscriptions.py; every write here invalidates it.
 
-# Get subscription by tenantId
-@router.get("/{tenant_id}", response_model=Subscription)
+
+def _ensure_objectid(_id: str, name: str = "id"):
+    if not ObjectId.is_valid(_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid ObjectId for {name}",
+        )
+    return ObjectId(_id)
+
+
+# -------------------------
+# Convert MongoDB document → API format (Python dict)
+# -------------------------
+def serialize_subscription(sub: dict) -> dict:
+    sub = dict(sub)
+    sub["_id"] = str(sub["_id"])
+    sub["tenantId"] = str(sub["tenantId"])
+    return sub
+
+
+# -------------------------
+# Get subscriptions (filter, pagination)
+# -------------------------
+async def get_subscriptions(skip: int = 0, limit: int = 50, status: Optional[str] = None):
+    query: dict[str, Any] = {}
+    if status:
+        query["status"] = status
+
+    cursor = db.subscriptions.find(query).sort("_id", 1).skip(skip).limit(limit)
+    return [serialize_subscription(s) for s in await cursor.to_list(length=limit)]
+
+
+# -------------------------
+# Get a tenant's subscription (cached)
+# -------------------------
 async def get_subscription(tenant_id: str):
-    subscription = await db.subscriptions.find_one({"tenantId": tenant_id})
-    if not subscription:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    return subscription
-
-# Create a new subscription
-@router.post("/", response_model=Subscription)
-async def create_subscription(sub: Subscription):
-    sub_dict = sub.dict()
-    result = await db.subscriptions.insert_one(sub_dict)
-    sub_dict["_id"] = str(result.inserted_id)
-    return sub_dict
-
-# Update subscription by tenantId
-@router.put("/{tenant_id}", response_model=Subscription)
-async def update_subscription(tenant_id: str, sub: Subscription):
-    result = await db.subscriptions.update_one(
-        {"tenantId": tenant_id},
-        {"$set": sub.dict()}
-    )
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    updated_sub = await db.subscriptions.find_one({"tenantId": tenant_id})
-    return updated_sub
-
-# Delete subscription by tenantId
-@router.delete("/{tenant_id}")
-async def delete_subscription(tenant_id: str):
-    result = await db.subscriptions.delete_one({"tenantId": tenant_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    return {"detail": "Subscription deleted successfully"}
+    sub = await subscription_service.get(_ensure_objectid(tenant_id, "tenantId"))
+    return serialize_subscription(sub) if sub else None
+
 
+# -------------------------
+# Create a subscription (one per tenant)
+# -------------------------
+async def create_subscription(request):
+    data = request.dict()
+    data["tenantId"] = _ensure_objectid(data["tenantId"], "tenantId")
+
+    try:
+        result = await db.subscriptions.insert_one(data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Tenant already has a subscription",
+        )
+    subscription_service.invalidate(data["tenantId"])
+
+    data["_id"] = result.inserted_id
+    return serialize_subscription(data)
+
+
+# -------------------------
+# Replace a tenant's subscription
+# -------------------------
+async def update_subscription(tenant_id: str, request):
+    tenant_oid = _ensure_objectid(tenant_id, "tenantId")
+    data = request.dict()
+    data["tenantId"] = tenant_oid  # the path decides which tenant
+
+    result = await db.subscriptions.update_one({"tenantId": tenant_oid}, {"$set": data})
+    subscription_service.invalidate(tenant_oid)
+    if result.matched_count == 0:
+        return None
+
+    updated = await db.subscriptions.find_one({"tenantId": tenant_oid})
+    return serialize_subscription(updated) if updated else None
+
+
+# -------------------------
+# Delete a tenant's subscription
+# -------------------------
+async def delete_subscription(tenant_id: str):
+    tenant_oid = _ensure_objectid(tenant_id, "tenantId")
+    result = await db.subscriptions.delete_one({"tenantId": tenant_oid})
+    subscription_service.invalidate(tenant_oid)
+    return result.deleted_count > 0
@@ -35,6 +35,9 @@ async def get_teacher_by_user(user_id: str):
 
 
 async def create_teacher(user_id: str):
+    # Fetch the user document
+    user = await db.users.find_one({"_id": ObjectId(user_id)})
+
     data = {
         "userId": ObjectId(user_id),
         "assignedCourses": [],
@@ -44,13 +47,14 @@ async def create_teacher(user_id: str):
         "createdAt": datetime.utcnow(),
         "updatedAt": datetime.utcnow(),
     }
+    # signed up into a tenant: the profile belongs to it too (counted when
+    # create_user reserved the plan slot)
+    if user and user.get("tenantId"):
+        data["tenantId"] = user["tenantId"]
 
     result = await db.teachers.insert_one(data)
     teacher = await db.teachers.find_one({"_id": result.inserted_id})
 
-    # Fetch the user document
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-
     return serialize_teacher(teacher, user)
 
 
@@ -0,0 +1,177 @@
+import logging
+from bson import ObjectId
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+
+# One `tenantStats` document per tenant backs the admin dashboard:
+#
+#   {tenantId, students, teachers, courses, activeEnrollments,
+#    pendingSubmissions, quizScoreSum, quizScoreCount, updatedAt, reconciledAt}
+#
+# The create/delete/enroll/grade paths $inc it after their own write;
+# reconcile() recounts from the source collections (periodically, see
+# services/tenant_stats.py, and after a course cascade delete). A counter
+# bump that fails, or races a reconcile, is only off until the next one.
+#
+# The same counters are the plan usage checked by services/quotas.py:
+# reserve() increments only while under the limit, as one atomic update.
+# aiCreditsUsed / aiCreditsMonth are not recounted by reconcile().
+
+STAT_FIELDS = (
+    "students",
+    "teachers",
+    "courses",
+    "activeEnrollments",
+    "pendingSubmissions",
+    "quizScoreSum",
+    "quizScoreCount",
+)
+
+
+async def increment(tenant_id, **deltas):
+    """Apply counter deltas; a tenant without a stats document yet is skipped (built on first read)."""
+    if not tenant_id:
+        return
+    try:
+        await db.tenantStats.update_one(
+            {"tenantId": ObjectId(tenant_id)},
+            {"$inc": deltas, "$set": {"updatedAt": datetime.utcnow()}},
+        )
+    except PyMongoError as e:
+        logger.warning("Tenant stats update for %s failed: %s", tenant_id, e)
+
+
+async def _conditional_inc(tenant_id, condition: dict, update: dict) -> bool | None:
+    """True if applied; False if the condition failed; None if the tenant has no stats document."""
+    now = datetime.utcnow()
+    result = await db.tenantStats.update_one(
+        {"tenantId": ObjectId(tenant_id), **condition}, {**update, "$set": {**update.get("$set", {}), "updatedAt": now}}
+    )
+    if result.matched_count:
+        return True
+    if await db.tenantStats.count_documents({"tenantId": ObjectId(tenant_id)}, limit=1):
+        return False
+    return None
+
+
+async def reserve(tenant_id, field: str, limit: int | None) -> bool:
+    """
+    $inc a counter unless it has reached `limit` (None: no limit), in one
+    atomic update. False means the limit is reached. A missing stats
+    document is built first.
+    """
+    condition = {field: {"$lt": limit}} if limit is not None else {}
+    applied = await _conditional_inc(tenant_id, condition, {"$inc": {field: 1}})
+    if applied is None:
+        await reconcile(tenant_id)
+        applied = await _conditional_inc(tenant_id, condition, {"$inc": {field: 1}})
+    return bool(applied)
+
+
+async def use_monthly(tenant_id, field: str, limit: int | None, month: str) -> bool:
+    """
+    Like reserve(), for a counter that starts over every month
+    (`<field>Used` counted in `<field>Month`).
+    """
+    used, period = f"{field}Used", f"{field}Month"
+    if limit is not None and limit < 1:
+        return False
+
+    condition = {period: month, **({used: {"$lt": limit}} if limit is not None else {})}
+    applied = await _conditional_inc(tenant_id, condition, {"$inc": {used: 1}})
+    if applied is None:
+        await reconcile(tenant_id)
+        applied = await _conditional_inc(tenant_id, condition, {"$inc": {used: 1}})
+    if applied:
+        return True
+
+    # first use this month
+    if await _conditional_inc(tenant_id, {period: {"$ne": month}}, {"$set": {period: month, used: 1}}):
+        return True
+
+    # a concurrent request started the month first; count against it
+    return bool(await _conditional_inc(tenant_id, condition, {"$inc": {used: 1}}))
+
+
+async def release_monthly(tenant_id, field: str, month: str):
+    """Give back one use_monthly() use; nothing if the counter has moved on to another month."""
+    used, period = f"{field}Used", f"{field}Month"
+    try:
+        await _conditional_inc(tenant_id, {period: month, used: {"$gt": 0}}, {"$inc": {used: -1}})
+    except PyMongoError as e:
+        logger.warning("Releasing %s for %s failed: %s", used, tenant_id, e)
+
+
+def _sources(match: dict) -> list:
+    def grouped(**fields):
+        return {"$group": {"_id": "$tenantId", **fields}}
+
+    return [
+        (db.students, [
+            {"$match": match},
+            grouped(
+                students={"$sum": 1},
+                activeEnrollments={"$sum": {"$size": {"$ifNull": ["$enrolledCourses", []]}}},
+            ),
+        ]),
+        (db.teachers, [{"$match": match}, grouped(teachers={"$sum": 1})]),
+        (db.courses, [{"$match": match}, grouped(courses={"$sum": 1})]),
+        (db.assignmentSubmissions, [
+            {"$match": {**match, "gradedAt": None}},
+            grouped(pendingSubmissions={"$sum": 1}),
+        ]),
+        (db.quizSubmissions, [
+            {"$match": {**match, "status": "graded"}},
+            grouped(quizScoreSum={"$sum": "$percentage"}, quizScoreCount={"$sum": 1}),
+        ]),
+    ]
+
+
+async def count_stats(tenant_id: ObjectId | None = None) -> dict:
+    """True counts per tenant (one grouped aggregation per source collection)."""
+    match = {"tenantId": tenant_id} if tenant_id else {"tenantId": {"$type": "objectId"}}
+    totals = {}
+    if tenant_id:
+        totals[tenant_id] = dict.fromkeys(STAT_FIELDS, 0)
+
+    for collection, pipeline in _sources(match):
+        async for row in collection.aggregate(pipeline):
+            totals.setdefault(row.pop("_id"), dict.fromkeys(STAT_FIELDS, 0)).update(row)
+    return totals
+
+
+async def reconcile(tenant_id=None) -> int:
+    """Overwrite the counters of one tenant (or all) with recounted values."""
+    tenant_id = ObjectId(tenant_id) if tenant_id else None
+    totals = await count_stats(tenant_id)
+
+    if tenant_id is None:
+        # tenants whose last student/course/... is gone
+        async for doc in db.tenantStats.find({"tenantId": {"$nin": list(totals)}}, {"tenantId": 1}):
+            totals[doc["tenantId"]] = dict.fromkeys(STAT_FIELDS, 0)
+
+    if not totals:
+        return 0
+
+    now = datetime.utcnow()
+    await db.tenantStats.bulk_write(
+        [
+            UpdateOne({"tenantId": t}, {"$set": {**counts, "updatedAt": now, "reconciledAt": now}}, upsert=True)
+            for t, counts in totals.items()
+        ],
+        ordered=False,
+    )
+    return len(totals)
+
+
+async def get_stats(tenant_id: str) -> dict:
+    doc = await db.tenantStats.find_one({"tenantId": ObjectId(tenant_id)}, {"_id": 0})
+    if doc is None:
+        await reconcile(tenant_id)
+        doc = await db.tenantStats.find_one({"tenantId": ObjectId(tenant_id)}, {"_id": 0})
+    return doc
@@ -1,7 +1,14 @@
 from bson import ObjectId
 from datetime import datetime
 from app.db.database import db
-from app.utils.security import hash_password, verify_password
+from app.services.passwords import password_service
+from app.services.quotas import quotas
+from app.services.write_behind import write_behind
+from app.utils.security import password_needs_rehash
+from app.utils.tasks import spawn
+
+# tenantStats counter a new user of this role counts against
+QUOTA_COUNTERS = {"student": "students", "teacher": "teachers"}
 
 
 def serialize_user(u: dict):
@@ -25,9 +32,63 @@ async def get_user_by_email(email: str):
     return await db.users.find_one({"email": email.lower()})
 
 
+# role -> collection holding that role's profile (and the user's tenantId)
+ROLE_COLLECTIONS = {"teacher": "teachers", "student": "students", "admin": "admins"}
+
+
+async def find_user_with_role_tenant(match: dict, token_digest: bytes | None = None):
+    """
+    Fetch one user plus the tenantId stored on their role profile in a single
+    aggregation, instead of a users lookup followed by a role-collection lookup.
+
+    The role's tenantId is returned as "roleTenantId" (None if there is no
+    profile or the role has none, e.g. super-admin). When token_digest is
+    given, "tokenRevoked" says whether that token has been revoked.
+    """
+    pipeline = [{"$match": match}, {"$limit": 1}]
+
+    # Each lookup is an indexed point query on userId; only the user's own
+    # role collection can match.
+    for role, collection in ROLE_COLLECTIONS.items():
+        pipeline.append(
+            {
+                "$lookup": {
+                    "from": collection,
+                    "localField": "_id",
+                    "foreignField": "userId",
+                    "pipeline": [{"$project": {"_id": 0, "tenantId": 1}}, {"$limit": 1}],
+                    "as": f"{role}Profile",
+                }
+            }
+        )
+
+    if token_digest is not None:
+        pipeline.append(
+            {
+                "$lookup": {
+                    "from": "revokedTokens",
+                    "pipeline": [{"$match": {"_id": token_digest}}, {"$project": {"_id": 1}}],
+                    "as": "revokedToken",
+                }
+            }
+        )
+
+    docs = await db.users.aggregate(pipeline).to_list(length=1)
+    if not docs:
+        return None
+
+    user = docs[0]
+    profiles = {role: user.pop(f"{role}Profile", []) for role in ROLE_COLLECTIONS}
+    profile = profiles.get(user["role"])
+    user["roleTenantId"] = profile[0].get("tenantId") if profile else None
+    if token_digest is not None:
+        user["tokenRevoked"] = bool(user.pop("revokedToken", []))
+    return user
+
+
 async def create_user(data: dict):
     data["email"] = data["email"].lower()
-    data["password"] = hash_password(data["password"])
+    data["password"] = await password_service.hash(data["password"])
     data["createdAt"] = datetime.utcnow()
     data["updatedAt"] = datetime.utcnow()
     data["lastLogin"] = None
@@ -35,41 +96,46 @@ async def create_user(data: dict):
     if data.get("tenantId"):
         data["tenantId"] = ObjectId(data["tenantId"])
 
-    result = await db.users.insert_one(data)
+    # Students and teachers take a slot of their tenant's plan (403 when full);
+    # their profile (create_student / create_teacher) is counted by this reservation
+    counter = QUOTA_COUNTERS.get(data.get("role"))
+    if counter and data.get("tenantId"):
+        await quotas.reserve(data["tenantId"], counter)
+
+    try:
+        result = await db.users.insert_one(data)
+    except Exception:
+        if counter and data.get("tenantId"):
+            await quotas.release(data["tenantId"], counter)
+        raise
     new_user = await db.users.find_one({"_id": result.inserted_id})
     return serialize_user(new_user)
 
 
 async def verify_user(email: str, password: str):
-    u = await get_user_by_email(email)
-    if not u or not verify_password(password, u["password"]):
+    # One round trip for the user and the tenantId held by their role profile
+    u = await find_user_with_role_tenant({"email": email.lower()})
+    if not u or not await password_service.verify(password, u["password"]):
         return None
 
-    # After verifying, fetch the role-specific doc to get the tenantId
-    user_id = u["_id"]
-    role = u["role"]
-    tenant_id = None
-
-    if role == "teacher":
-        role_doc = await db.teachers.find_one({"userId": user_id})
-        if role_doc:
-            tenant_id = role_doc.get("tenantId")
-    elif role == "student":
-        role_doc = await db.students.find_one({"userId": user_id})
-        if role_doc:
-            tenant_id = role_doc.get("tenantId")
-    elif role == "admin":
-        role_doc = await db.admins.find_one({"userId": user_id})
-        if role_doc:
-            tenant_id = role_doc.get("tenantId")
-            
-    # Add tenantId to the user object before serializing
-    u["tenantId"] = tenant_id
-    
+    # Upgrade stale hashes (old scheme or cost) without delaying the login
+    if password_needs_rehash(u["password"]):
+        spawn(rehash_password(u["_id"], u["password"], password))
+
+    # tenantId comes from the role-specific doc (teachers / students / admins)
+    u["tenantId"] = u.pop("roleTenantId")
+
     return serialize_user(u)
 
 
-async def update_last_login(user_id: str):
+def update_last_login(user_id: str):
+    # Buffered: repeated logins by the same user collapse into one write
+    write_behind.set("users", {"_id": ObjectId(user_id)}, {"lastLogin": datetime.utcnow()})
+
+
+async def rehash_password(user_id: ObjectId, old_hash: str, password: str):
+    """Store a hash under the current policy; no-op if the password changed meanwhile."""
+    new_hash = await password_service.hash(password)
     await db.users.update_one(
-        {"_id": ObjectId(user_id)}, {"$set": {"lastLogin": datetime.utcnow()}}
+        {"_id": user_id, "password": old_hash}, {"$set": {"password": new_hash}}
     )
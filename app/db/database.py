@@ -1,13 +1,16 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
+from app.db.monitoring import CommandMetricsListener
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
+# Overridable so benchmarks and scripts can run against a scratch database
+MONGO_DB = os.getenv("MONGO_DB", "LMS")
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["LMS"]
+client = AsyncIOMotorClient(MONGO_URI, event_listeners=[CommandMetricsListener()])
+db = client[MONGO_DB]
 
 
 # Tayyaba
@@ -19,6 +22,8 @@ def get_students_collection():
 
 # Eman
 student_performance_collection = db["studentPerformance"]
+student_performance_history_collection = db["studentPerformanceHistory"]
+weekly_leaderboards_collection = db["weeklyLeaderboards"]
 students_collection = db["students"]
 courses_collection = db["courses"]
 assignments_collection = db["assignments"]              
@@ -0,0 +1,75 @@
+"""
+Index definitions for the LMS database.
+
+ensure_indexes() runs once from the application lifespan. create_index is a
+no-op when the index already exists, so restarting workers is cheap.
+"""
+from pymongo import ASCENDING, DESCENDING
+
+from app.db.database import db
+
+
+async def ensure_indexes():
+    # Enrollment references are ObjectIds (see migrations/normalize_enrollment_refs)
+    await db.students.create_index([("enrolledCourses", ASCENDING)])
+    await db.teachers.create_index([("assignedCourses", ASCENDING)])
+
+    await db.courses.create_index([("tenantId", ASCENDING), ("teacherId", ASCENDING)])
+
+    # Per-student performance counters and history (history is joined by the student home page)
+    await db.studentPerformance.create_index([("studentId", ASCENDING), ("tenantId", ASCENDING)])
+    await db.studentPerformanceHistory.create_index(
+        [("studentId", ASCENDING), ("tenantId", ASCENDING)], unique=True
+    )
+
+    # Incremental leaderboard resync (see services/rankings.py)
+    await db.studentPerformance.create_index([("updatedAt", ASCENDING)])
+
+    # Weekly rollover: per-tenant reset and last week's ranking (see services/weekly_rollover.py)
+    await db.studentPerformance.create_index(
+        [("tenantId", ASCENDING), ("lastWeekStart", ASCENDING), ("lastWeekPoints", DESCENDING)]
+    )
+    await db.weeklyLeaderboards.create_index(
+        [("tenantId", ASCENDING), ("weekStart", DESCENDING)], unique=True
+    )
+
+    # Admin dashboard counters, one document per tenant (see crud/tenant_stats.py)
+    await db.tenantStats.create_index([("tenantId", ASCENDING)], unique=True)
+    # ... and the per-tenant recounts / admin listings behind them
+    await db.students.create_index([("tenantId", ASCENDING)])
+    await db.teachers.create_index([("tenantId", ASCENDING)])
+    await db.assignmentSubmissions.create_index([("tenantId", ASCENDING), ("gradedAt", ASCENDING)])
+    await db.quizSubmissions.create_index([("tenantId", ASCENDING), ("status", ASCENDING)])
+
+    # Background jobs (startup resume + status polling)
+    await db.jobs.create_index([("status", ASCENDING), ("createdAt", ASCENDING)])
+
+    # Course dependents, cleaned up by the cascade delete job
+    await db.quizzes.create_index([("courseId", ASCENDING)])
+    await db.quizSubmissions.create_index([("courseId", ASCENDING)])
+    await db.assignments.create_index([("courseId", ASCENDING)])
+    await db.assignmentSubmissions.create_index([("courseId", ASCENDING)])
+    await db.studentPerformanceHistory.create_index([("courseStats.courseId", ASCENDING)])
+
+    # Login / current-user lookups
+    await db.users.create_index([("email", ASCENDING)])
+    await db.teachers.create_index([("userId", ASCENDING)])
+    await db.students.create_index([("userId", ASCENDING)])
+    await db.admins.create_index([("userId", ASCENDING)])
+
+    # Revoked tokens disappear once the token itself would have expired
+    await db.revokedTokens.create_index([("expiresAt", ASCENDING)], expireAfterSeconds=0)
+
+    # Shared rate-limit buckets (RATE_LIMIT_BACKEND=mongo) expire once idle
+    await db.rateLimits.create_index([("expiresAt", ASCENDING)], expireAfterSeconds=0)
+
+    # One study-time bucket per student per month (see crud/study_time.py)
+    await db.studyTime.create_index(
+        [("studentId", ASCENDING), ("tenantId", ASCENDING), ("month", ASCENDING)], unique=True
+    )
+
+    # Expiry sweeper (see services/subscriptions.py)
+    await db.subscriptions.create_index([("status", ASCENDING), ("expiry_date", ASCENDING)])
+    # One subscription per tenant. Last: it fails while duplicates from before
+    # the unique key exist (see migrations/normalize_subscription_tenant_ids)
+    await db.subscriptions.create_index([("tenantId", ASCENDING)], unique=True)
@@ -0,0 +1,104 @@
+"""
+Move studentPerformance.weeklyStudyTime arrays into studyTime buckets.
+
+add_weekly_time used to $push one {weekStart, minutes} element per call onto
+the performance document. This folds every legacy array into the monthly
+studyTime buckets (see app/crud/study_time.py), summing repeated weeks, then
+removes the array from the performance document.
+
+Run from the project root:
+
+    python -m app.db.migrations.bucket_study_time [--dry-run]
+
+Safe to re-run: each bucket records which performance documents it already
+absorbed (migratedFrom), so a run interrupted between the two steps never
+counts minutes twice.
+"""
+import argparse
+import asyncio
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.crud.study_time import month_of, parse_day, study_time_collection
+from app.db.database import db
+
+DUPLICATE_KEY = 11000
+
+
+def _buckets(entries: list) -> dict | None:
+    """{month: {week: minutes}}, or None if any entry can't be parsed."""
+    buckets: dict = {}
+    for entry in entries:
+        try:
+            day = parse_day(str(entry.get("weekStart"))[:10])
+        except HTTPException:
+            return None
+        weeks = buckets.setdefault(month_of(day), {})
+        weeks[day.isoformat()] = weeks.get(day.isoformat(), 0) + int(entry.get("minutes") or 0)
+    return buckets
+
+
+async def migrate_document(doc: dict, dry_run: bool) -> bool:
+    buckets = _buckets(doc["weeklyStudyTime"])
+    if buckets is None:
+        return False
+    if dry_run:
+        return True
+
+    ops = []
+    for month, weeks in buckets.items():
+        inc = {f"weeks.{week}": minutes for week, minutes in weeks.items()}
+        inc["totalMinutes"] = sum(weeks.values())
+        ops.append(
+            UpdateOne(
+                # A bucket that already absorbed this document no longer matches; the
+                # upsert then collides with the unique index and is skipped below.
+                {
+                    "studentId": doc["studentId"],
+                    "tenantId": doc["tenantId"],
+                    "month": month,
+                    "migratedFrom": {"$ne": doc["_id"]},
+                },
+                {"$inc": inc, "$addToSet": {"migratedFrom": doc["_id"]}},
+                upsert=True,
+            )
+        )
+
+    try:
+        await study_time_collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        if any(err["code"] != DUPLICATE_KEY for err in e.details["writeErrors"]):
+            raise
+
+    await db.studentPerformance.update_one(
+        {"_id": doc["_id"], "weeklyStudyTime": doc["weeklyStudyTime"]},
+        {"$unset": {"weeklyStudyTime": ""}},
+    )
+    return True
+
+
+async def main(dry_run: bool = False):
+    scanned = migrated = skipped = 0
+
+    query = {"weeklyStudyTime": {"$exists": True}}
+    projection = {"studentId": 1, "tenantId": 1, "weeklyStudyTime": 1}
+
+    async for doc in db.studentPerformance.find(query, projection):
+        scanned += 1
+        if await migrate_document(doc, dry_run):
+            migrated += 1
+        else:
+            skipped += 1
+            print(f"skipped {doc['_id']}: unparseable weekStart, left in place")
+
+    print(f"studentPerformance: {scanned} document(s) with weeklyStudyTime, {migrated} migrated, {skipped} skipped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(dry_run=args.dry_run))
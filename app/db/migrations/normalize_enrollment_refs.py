@@ -0,0 +1,84 @@
+"""
+Normalize course references to ObjectId.
+
+Older enrollments stored course ids as strings in students.enrolledCourses
+(and completedCourses) while teachers.assignedCourses used ObjectId. This
+rewrites every string reference as ObjectId so $in / $lookup joins can use
+the _id and enrolledCourses indexes directly.
+
+Run from the project root:
+
+    python -m app.db.migrations.normalize_enrollment_refs [--dry-run] [--batch-size 500]
+
+Safe to re-run: only documents that still contain a string reference are touched.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from app.db.database import db
+from app.utils.mongo import object_id_refs
+
+
+REF_FIELDS = {
+    "students": ["enrolledCourses", "completedCourses"],
+    "teachers": ["assignedCourses"],
+}
+
+
+async def _flush(collection, ops: list, dry_run: bool) -> int:
+    if dry_run or not ops:
+        return 0
+    result = await collection.bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def normalize_collection(name: str, fields: list, batch_size: int, dry_run: bool):
+    collection = db[name]
+
+    # $type on an array field matches if ANY element is a string
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+
+    scanned = 0
+    modified = 0
+    ops = []
+
+    async for doc in collection.find(query, projection).batch_size(batch_size):
+        scanned += 1
+        present = [field for field in fields if field in doc]
+
+        # Filter on the original arrays so a concurrent enroll/unenroll is not
+        # overwritten; such documents are simply picked up on the next run.
+        match = {"_id": doc["_id"]}
+        match.update({field: doc[field] for field in present})
+
+        ops.append(
+            UpdateOne(
+                match,
+                {"$set": {field: object_id_refs(doc[field]) for field in present}},
+            )
+        )
+
+        if len(ops) >= batch_size:
+            modified += await _flush(collection, ops, dry_run)
+            ops = []
+
+    modified += await _flush(collection, ops, dry_run)
+    return scanned, modified
+
+
+async def main(batch_size: int = 500, dry_run: bool = False):
+    for name, fields in REF_FIELDS.items():
+        scanned, modified = await normalize_collection(name, fields, batch_size, dry_run)
+        print(f"{name}: {scanned} document(s) with string references, {modified} updated")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(batch_size=args.batch_size, dry_run=args.dry_run))
@@ -0,0 +1,70 @@
+"""
+Normalize subscriptions.tenantId to ObjectId and report duplicates.
+
+Subscriptions used to be stored with the tenant id as a string. They are now
+looked up by ObjectId and tenantId is unique, which index creation can only
+enforce once every tenant has a single subscription.
+
+Run from the project root:
+
+    python -m app.db.migrations.normalize_subscription_tenant_ids [--dry-run] [--drop-duplicates]
+
+--drop-duplicates keeps each tenant's subscription with the latest expiry_date
+and deletes the others. Safe to re-run.
+"""
+import argparse
+import asyncio
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db.database import db
+
+
+async def convert_tenant_ids(dry_run: bool) -> tuple[int, int]:
+    ops = []
+    invalid = 0
+    async for doc in db.subscriptions.find({"tenantId": {"$type": "string"}}, {"tenantId": 1}):
+        if not ObjectId.is_valid(doc["tenantId"]):
+            invalid += 1
+            print(f"  {doc['_id']}: tenantId {doc['tenantId']!r} is not an ObjectId, left as is")
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"], "tenantId": doc["tenantId"]}, {"$set": {"tenantId": ObjectId(doc["tenantId"])}}))
+
+    if dry_run or not ops:
+        return len(ops), invalid
+    result = await db.subscriptions.bulk_write(ops, ordered=False)
+    return result.modified_count, invalid
+
+
+async def find_duplicates() -> list[dict]:
+    pipeline = [
+        {"$sort": {"expiry_date": -1}},
+        {"$group": {"_id": "$tenantId", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return await db.subscriptions.aggregate(pipeline).to_list(length=None)
+
+
+async def main(dry_run: bool = False, drop_duplicates: bool = False):
+    converted, invalid = await convert_tenant_ids(dry_run)
+    print(f"subscriptions: {converted} tenantId(s) converted to ObjectId, {invalid} invalid")
+
+    duplicates = await find_duplicates()
+    extra = [i for group in duplicates for i in group["ids"][1:]]
+    print(f"subscriptions: {len(duplicates)} tenant(s) with more than one subscription ({len(extra)} extra)")
+    for group in duplicates:
+        print(f"  tenant {group['_id']}: keeping {group['ids'][0]}, extra {[str(i) for i in group['ids'][1:]]}")
+
+    if extra and drop_duplicates and not dry_run:
+        result = await db.subscriptions.delete_many({"_id": {"$in": extra}})
+        print(f"subscriptions: {result.deleted_count} duplicate(s) deleted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--drop-duplicates", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(dry_run=args.dry_run, drop_duplicates=args.drop_duplicates))
@@ -0,0 +1,141 @@
+"""
+Move badges, certificates and courseStats off studentPerformance.
+
+studentPerformance used to hold a student's whole history next to the point
+counters, so every read and every write response grew with it. This moves
+the three arrays into the student's studentPerformanceHistory document (see
+app/crud/student_performance.py) and removes them from studentPerformance,
+then creates the (empty) history document of every student that has none:
+progress updates only write to an existing one, so run this before
+deploying them.
+
+Run from the project root:
+
+    python -m app.db.migrations.split_student_performance [--dry-run]
+
+Safe to re-run: each history document records which performance documents
+it already absorbed (migratedFrom), so a run interrupted between the two
+steps never copies entries twice. Entries written to the history since the
+deploy win over the same legacy entry, and course stats and completion
+badges over a legacy entry for the same course.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.db.database import db
+
+HISTORY_FIELDS = ["badges", "certificates", "courseStats"]
+
+BATCH_SIZE = 1000
+
+
+def _merge_pipeline(doc: dict) -> list:
+    def existing(field):
+        return {"$ifNull": [f"${field}", []]}
+
+    def merged(field):
+        # Legacy entries first, minus any the history already has, or already
+        # has an entry for the same course (course stats, completion badges)
+        duplicate = {"$in": ["$$this", existing(field)]}
+        if field != "certificates":
+            duplicate = {
+                "$or": [
+                    duplicate,
+                    {
+                        "$and": [
+                            {"$ne": [{"$ifNull": ["$$this.courseId", None]}, None]},
+                            {"$in": ["$$this.courseId", existing(f"{field}.courseId")]},
+                        ]
+                    },
+                ]
+            }
+
+        return {
+            "$concatArrays": [
+                {"$filter": {"input": {"$literal": doc.get(field) or []}, "cond": {"$not": [duplicate]}}},
+                existing(field),
+            ]
+        }
+
+    return [
+        {
+            "$set": {
+                **{field: merged(field) for field in HISTORY_FIELDS},
+                "migratedFrom": {"$concatArrays": [{"$ifNull": ["$migratedFrom", []]}, [doc["_id"]]]},
+            }
+        }
+    ]
+
+
+async def migrate_document(doc: dict, dry_run: bool):
+    if dry_run:
+        return
+
+    try:
+        # A history document that already absorbed this one no longer matches;
+        # the upsert then collides with the unique (studentId, tenantId) index.
+        await db.studentPerformanceHistory.update_one(
+            {"studentId": doc["studentId"], "tenantId": doc["tenantId"], "migratedFrom": {"$ne": doc["_id"]}},
+            _merge_pipeline(doc),
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        pass
+
+    # Only unset what was copied; a write racing the migration is picked up next run
+    await db.studentPerformance.update_one(
+        {"_id": doc["_id"], **{field: doc[field] for field in HISTORY_FIELDS if field in doc}},
+        {"$unset": {field: "" for field in HISTORY_FIELDS}},
+    )
+
+
+async def main(dry_run: bool = False):
+    migrated = 0
+
+    query = {"$or": [{field: {"$exists": True}} for field in HISTORY_FIELDS]}
+    projection = {"studentId": 1, "tenantId": 1, **{field: 1 for field in HISTORY_FIELDS}}
+
+    async for doc in db.studentPerformance.find(query, projection):
+        await migrate_document(doc, dry_run)
+        migrated += 1
+
+    print(f"studentPerformance: {migrated} document(s) with history fields moved to studentPerformanceHistory")
+
+    created = await create_missing_histories(dry_run)
+    print(f"studentPerformanceHistory: {created} document(s) created")
+
+
+async def create_missing_histories(dry_run: bool) -> int:
+    """Upsert an empty history document for every student without one."""
+    created = 0
+    batch = []
+
+    async def flush():
+        nonlocal created
+        if batch and not dry_run:
+            result = await db.studentPerformanceHistory.bulk_write(batch, ordered=False)
+            created += result.upserted_count
+        batch.clear()
+
+    async for doc in db.studentPerformance.find({}, {"studentId": 1, "tenantId": 1, "createdAt": 1}):
+        batch.append(UpdateOne(
+            {"studentId": doc["studentId"], "tenantId": doc["tenantId"]},
+            {"$setOnInsert": {"createdAt": doc.get("createdAt")}},
+            upsert=True,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            await flush()
+
+    await flush()
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(dry_run=args.dry_run))
@@ -0,0 +1,225 @@
+"""
+Mongo command instrumentation.
+
+CommandMetricsListener is registered on the Motor client (app/db/database.py).
+pymongo calls it from the thread running each command; Motor copies the
+caller's contextvars into that thread, so commands can be attributed to the
+HTTP request that issued them (see app/middleware/metrics.py).
+
+Every command is also recorded in `query_stats`, per collection/command and
+per query shape: the filter or pipeline with every value replaced by "?", so
+`{"quizId": ObjectId(...), "status": "graded"}` and the same query for another
+quiz count as one shape. Commands slower than MONGO_SLOW_QUERY_MS are logged
+with their shape (never their values).
+"""
+import json
+import logging
+import math
+import threading
+from collections import deque
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+from app.core.settings import MONGO_SLOW_QUERY_MS, MONGO_STATS_MAX_SHAPES, MONGO_STATS_SAMPLE_SIZE
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds",
+    "Mongo command round-trip time",
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+    labelnames=["collection", "command"],
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total",
+    "Mongo commands that returned an error",
+    labelnames=["collection", "command"],
+)
+
+# Commands issued by the current request; None outside a request
+_request_commands: ContextVar[list | None] = ContextVar("request_mongo_commands", default=None)
+
+
+def track_request_commands():
+    """Start counting commands for the current request; returns (commands, reset token)."""
+    commands = []
+    return commands, _request_commands.set(commands)
+
+
+def stop_tracking(token):
+    _request_commands.reset(token)
+
+
+# -------------------------
+# Query shapes
+# -------------------------
+
+# command name -> field holding its filter
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+
+def redact(value, depth: int = 0):
+    """Keep keys and operators, replace every value with "?"."""
+    if depth > 8:
+        return "?"
+    if isinstance(value, dict):
+        return {key: redact(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, list):
+        # $in: [...] / $and: [...] -> one redacted element is enough for the shape
+        shapes = []
+        for item in value:
+            shape = redact(item, depth + 1)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def command_shape(name: str, command: dict):
+    if name in _FILTER_FIELDS:
+        return redact(command.get(_FILTER_FIELDS[name], {}))
+    if name == "aggregate":
+        return [redact(stage) for stage in command.get("pipeline", [])]
+    if name == "update":
+        return [redact(u.get("q", {})) for u in command.get("updates", [])[:1]]
+    if name == "delete":
+        return [redact(d.get("q", {})) for d in command.get("deletes", [])[:1]]
+    return None
+
+
+def command_collection(name: str, command: dict) -> str:
+    if name == "getMore":
+        return command.get("collection", "")
+    target = command.get(name)
+    return target if isinstance(target, str) else ""
+
+
+def _percentile(ordered: list, q: float) -> float:
+    # nearest-rank
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class QueryStats:
+    """Per collection/command and per query-shape counters; safe to update from any thread."""
+
+    def __init__(self, sample_size: int, max_shapes: int):
+        self.sample_size = sample_size
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._commands: dict[tuple, dict] = {}
+        self._shapes: dict[tuple, dict] = {}
+
+    def record(self, collection: str, command: str, shape_key: str | None, seconds: float, failed: bool):
+        with self._lock:
+            stats = self._commands.get((collection, command))
+            if stats is None:
+                stats = self._commands[(collection, command)] = {
+                    "count": 0, "failures": 0, "total": 0.0, "samples": deque(maxlen=self.sample_size),
+                }
+            stats["count"] += 1
+            stats["failures"] += failed
+            stats["total"] += seconds
+            stats["samples"].append(seconds)
+
+            if shape_key is None:
+                return
+            key = (collection, command, shape_key)
+            shape = self._shapes.get(key)
+            if shape is None:
+                if len(self._shapes) >= self.max_shapes:
+                    return  # keep tracking the shapes already seen
+                shape = self._shapes[key] = {"count": 0, "total": 0.0, "max": 0.0}
+            shape["count"] += 1
+            shape["total"] += seconds
+            shape["max"] = max(shape["max"], seconds)
+
+    def snapshot(self, limit: int = 20) -> dict:
+        with self._lock:
+            commands = [(key, dict(s, samples=sorted(s["samples"]))) for key, s in self._commands.items()]
+            shapes = [(key, dict(s)) for key, s in self._shapes.items()]
+
+        collections = []
+        for (collection, command), s in sorted(commands, key=lambda item: -item[1]["total"]):
+            samples = s["samples"]
+            collections.append({
+                "collection": collection,
+                "command": command,
+                "count": s["count"],
+                "failures": s["failures"],
+                "totalMs": round(s["total"] * 1000, 3),
+                "p50Ms": round(_percentile(samples, 0.50) * 1000, 3) if samples else None,
+                "p95Ms": round(_percentile(samples, 0.95) * 1000, 3) if samples else None,
+                "p99Ms": round(_percentile(samples, 0.99) * 1000, 3) if samples else None,
+            })
+
+        top = sorted(shapes, key=lambda item: -item[1]["total"])[:limit]
+        return {
+            "commands": collections,
+            "topShapes": [
+                {
+                    "collection": collection,
+                    "command": command,
+                    "shape": json.loads(shape_key),
+                    "count": s["count"],
+                    "totalMs": round(s["total"] * 1000, 3),
+                    "avgMs": round(s["total"] / s["count"] * 1000, 3),
+                    "maxMs": round(s["max"] * 1000, 3),
+                }
+                for (collection, command, shape_key), s in top
+            ],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+            self._shapes.clear()
+
+
+query_stats = QueryStats(MONGO_STATS_SAMPLE_SIZE, MONGO_STATS_MAX_SHAPES)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+
+    def __init__(self):
+        # (connection, request id) -> (collection, shape key) between started and succeeded/failed
+        self._pending: dict[tuple, tuple[str, str | None]] = {}
+
+    def started(self, event):
+        commands = _request_commands.get()
+        if commands is not None:
+            commands.append(event.command_name)  # list.append is atomic across threads
+
+        shape = command_shape(event.command_name, event.command)
+        self._pending[(event.connection_id, event.request_id)] = (
+            command_collection(event.command_name, event.command),
+            json.dumps(shape, sort_keys=True) if shape is not None else None,
+        )
+
+    def _finish(self, event, failed: bool):
+        collection, shape_key = self._pending.pop((event.connection_id, event.request_id), ("", None))
+        seconds = event.duration_micros / 1e6
+
+        MONGO_COMMAND_SECONDS.observe(seconds, collection=collection, command=event.command_name)
+        if failed:
+            MONGO_COMMAND_FAILURES.inc(collection=collection, command=event.command_name)
+        query_stats.record(collection, event.command_name, shape_key, seconds, failed)
+
+        if seconds * 1000 >= MONGO_SLOW_QUERY_MS:
+            logger.warning(
+                "Slow Mongo %s on %s: %.1f ms, shape %s",
+                event.command_name, collection or "-", seconds * 1000, shape_key,
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
@@ -1,25 +1,81 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.settings import PROFILING_ENABLED
+from app.db.indexes import ensure_indexes
+from app.middleware.limits import RequestLimitMiddleware
+from app.middleware.metrics import RequestMetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.jobs import job_runner
+from app.services.passwords import password_service
+from app.services.progress_ingest import progress_ingest
+from app.services.rankings import rankings
+from app.services.scheduler import scheduler
+from app.services.write_behind import write_behind
+from app.utils.tasks import drain
 from app.routers.roles import admins, students, super_admin, teachers
 from app.routers.dashboards import admin_dashboard
 from app.routers import (
     assignment_submissions,
     assignments,
     courses,
+    jobs,
+    metrics,
     quiz_submissions,
     quizzes,
     student_performance,
     subscription,
+    system,
     tenants,
 )
 from app.routers.auth import admin_auth, student_auth, teacher_auth, login
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        # Don't refuse to boot if Mongo is briefly unreachable
+        logger.warning("Index creation skipped: %s", e)
+
+    await rankings.start()
+    await job_runner.start()
+    await write_behind.start()
+    await progress_ingest.start()
+    await scheduler.start()
+
+    yield
+
+    await scheduler.stop()
+    await job_runner.stop()
+    await progress_ingest.stop()
+    await write_behind.stop()
+    await rankings.stop()
+    await drain()
+    password_service.shutdown()
+
+
 app = FastAPI(
     title="EduVerse AI Backend",
     description="Multi-Tenant E-Learning Platform API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Per-tenant rate limits and per-route concurrency caps. Added before CORS so
+# CORS stays outermost and 429/503 responses still carry CORS headers.
+app.add_middleware(RequestLimitMiddleware)
+# Outside the limiter so rejected (429/503) requests are measured too
+app.add_middleware(RequestMetricsMiddleware)
+if PROFILING_ENABLED:
+    # Opt-in per request by a super-admin; not installed at all otherwise
+    app.add_middleware(ProfilingMiddleware)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -44,9 +100,11 @@ def root():
 app.include_router(admin_auth.router)
 app.include_router(student_auth.router)
 app.include_router(teacher_auth.router)
-# app.include_router(admin_dashboard.router)
+app.include_router(admin_dashboard.router)
 
 app.include_router(login.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
 
 app.include_router(super_admin.router)
 app.include_router(admins.router)
@@ -58,6 +116,7 @@ app.include_router(student_performance.router)
 
 # Tayyaba
 app.include_router(courses.router)
+app.include_router(jobs.router)
 
 # Ayesha
 app.include_router(assignments.router)
@@ -0,0 +1,152 @@
+"""
+Admission control for API requests, applied before routing so a rejected
+request never reaches Mongo.
+
+1. Rate limit: a token bucket per principal (see app/services/rate_limit.py).
+   Requests with a bearer token are keyed by the token's tenant_id (user_id
+   for tenant-less roles such as super-admin); anonymous requests by client
+   address, read from RATE_LIMIT_CLIENT_IP_HEADER behind a proxy. Over the
+   limit -> 429 with Retry-After.
+2. Concurrency: each top-level route ("/courses", "/quiz-submissions", ...)
+   has its own cap on in-flight requests. A request that cannot get a slot
+   within ROUTE_CONCURRENCY_WAIT_SECONDS is shed with 503 + Retry-After,
+   instead of queueing on a saturated Motor connection pool and dragging
+   every other route down with it. Event streams (".../stream") are not
+   counted.
+"""
+import asyncio
+import math
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.settings import (
+    RATE_LIMIT_CLIENT_BURST,
+    RATE_LIMIT_CLIENT_IP_HEADER,
+    RATE_LIMIT_CLIENT_RPS,
+    RATE_LIMIT_PROXY_HOPS,
+    RATE_LIMIT_TENANT_BURST,
+    RATE_LIMIT_TENANT_RPS,
+    ROUTE_CONCURRENCY_DEFAULT,
+    ROUTE_CONCURRENCY_LIMITS,
+    ROUTE_CONCURRENCY_WAIT_SECONDS,
+)
+from app.services.rate_limit import get_backend
+from app.utils.metrics import register_gauge
+from app.utils.security import decode_token
+
+
+EXEMPT_PATHS = {"/", "/docs", "/redoc", "/openapi.json", "/docs/oauth2-redirect"}
+
+# Long-lived event streams are rate limited on connect but hold no Mongo
+# connection while open, so they don't take one of their route's slots.
+STREAM_SUFFIX = "/stream"
+
+# Bounds the segment -> semaphore map against requests for random paths;
+# the app itself has a couple dozen top-level routes.
+MAX_LIMITED_ROUTES = 256
+
+_stats = {"rate_limited": 0, "shed": 0}
+
+
+def _parse_limits(spec: str) -> dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip().strip("/")] = int(value)
+    return limits
+
+
+def _client_address(scope) -> str:
+    if RATE_LIMIT_CLIENT_IP_HEADER:
+        header = RATE_LIMIT_CLIENT_IP_HEADER.encode("latin-1")
+        for name, value in scope["headers"]:
+            if name == header:
+                hops = [part.strip() for part in value.decode("latin-1").split(",") if part.strip()]
+                if hops:
+                    return hops[-min(max(RATE_LIMIT_PROXY_HOPS, 1), len(hops))]
+                break
+
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _principal(scope) -> tuple[str, float, int]:
+    """Bucket key plus its rate and burst."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    claims = decode_token(token)
+                except HTTPException:
+                    break  # the route will answer 401; limit it like anonymous traffic
+                if claims.get("tenant_id"):
+                    return f"tenant:{claims['tenant_id']}", RATE_LIMIT_TENANT_RPS, RATE_LIMIT_TENANT_BURST
+                return f"user:{claims.get('user_id')}", RATE_LIMIT_TENANT_RPS, RATE_LIMIT_TENANT_BURST
+            break
+
+    return f"ip:{_client_address(scope)}", RATE_LIMIT_CLIENT_RPS, RATE_LIMIT_CLIENT_BURST
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RequestLimitMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+        self._overrides = _parse_limits(ROUTE_CONCURRENCY_LIMITS)
+        self._limiters: dict[str, asyncio.Semaphore] = {}
+
+    def _limiter_for(self, path: str) -> asyncio.Semaphore | None:
+        segment = path.strip("/").split("/")[0]
+        limiter = self._limiters.get(segment)
+        if limiter is None:
+            limit = self._overrides.get(segment, ROUTE_CONCURRENCY_DEFAULT)
+            if limit <= 0 or len(self._limiters) >= MAX_LIMITED_ROUTES:
+                return None
+            limiter = self._limiters[segment] = asyncio.Semaphore(limit)
+        return limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        key, rate, burst = _principal(scope)
+        if rate > 0:
+            wait = await get_backend().take(key, rate, burst)
+            if wait > 0:
+                _stats["rate_limited"] += 1
+                await _reject(429, "Rate limit exceeded", wait)(scope, receive, send)
+                return
+
+        limiter = None if scope["path"].endswith(STREAM_SUFFIX) else self._limiter_for(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if limiter.locked():
+            try:
+                await asyncio.wait_for(limiter.acquire(), ROUTE_CONCURRENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                _stats["shed"] += 1
+                await _reject(503, "Server busy, please retry", 1)(scope, receive, send)
+                return
+        else:
+            await limiter.acquire()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+register_gauge("requests_rate_limited", "Requests rejected with 429 by the rate limiter", lambda: _stats["rate_limited"])
+register_gauge("requests_shed", "Requests rejected with 503 by a route concurrency limit", lambda: _stats["shed"])
@@ -0,0 +1,84 @@
+"""
+Per-route request metrics.
+
+Latency, response size and Mongo commands per request are labelled with the
+route template ("/courses/{course_id}"), not the raw path, so series stay
+bounded; requests that match no route are grouped under "<unmatched>".
+In-flight requests are counted per top-level router ("courses",
+"quiz-submissions", ...) because the route is only known after routing.
+
+A route whose mongo-commands-per-request distribution grows with the size of
+the result (rather than staying flat) is issuing one query per item.
+"""
+import time
+
+from app.db.monitoring import stop_tracking, track_request_commands
+from app.utils.metrics import Counter, Histogram, UpDownGauge
+
+
+UNMATCHED = "<unmatched>"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", labelnames=["method", "route", "status"]
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, including streaming the response",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    labelnames=["method", "route"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size",
+    buckets=[100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+    labelnames=["method", "route"],
+)
+MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands",
+    "Mongo commands issued while handling a request",
+    buckets=[0, 1, 2, 3, 5, 10, 20, 50, 100],
+    labelnames=["method", "route"],
+)
+IN_FLIGHT = UpDownGauge(
+    "http_requests_in_flight", "Requests currently being handled", labelnames=["router"]
+)
+
+
+class RequestMetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        router = scope["path"].strip("/").split("/")[0] or "/"
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc(router=router)
+        commands, token = track_request_commands()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            stop_tracking(token)
+            IN_FLIGHT.dec(router=router)
+
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", None) or UNMATCHED}
+            REQUESTS.inc(status=status, **labels)
+            LATENCY.observe(elapsed, **labels)
+            RESPONSE_SIZE.observe(size, **labels)
+            MONGO_COMMANDS.observe(len(commands), **labels)
@@ -0,0 +1,97 @@
+"""
+On-demand profiling of a single request (PROFILING_ENABLED=true only).
+
+A super-admin adds `X-Profile: store` (or `?_profile=store`) to any request.
+The request runs under the sampling profiler in app/utils/profiling.py, and
+the profile is kept in memory; its id comes back in the X-Profile-Id
+response header and it can be fetched from GET /system/profiles/{id}.
+With `return` instead of `store`, the collapsed stacks replace the response
+body. The flag is ignored for anyone else.
+
+When PROFILING_ENABLED is false this middleware is not installed, so normal
+requests pay nothing.
+"""
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.responses import PlainTextResponse
+
+from app.core.settings import PROFILING_INTERVAL_MS, PROFILING_KEEP
+from app.utils.profiling import ProfileStore, RequestProfiler
+from app.utils.security import decode_token
+
+
+profile_store = ProfileStore(PROFILING_KEEP)
+
+MODES = {"store", "return"}
+
+
+def _profile_mode(scope) -> str | None:
+    mode = None
+    authorization = None
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+        elif name == b"authorization":
+            authorization = value.decode("latin-1")
+
+    if mode is None and b"_profile=" in scope["query_string"]:
+        mode = parse_qs(scope["query_string"].decode("latin-1")).get("_profile", [""])[0].lower()
+
+    if mode not in MODES or not authorization:
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        claims = decode_token(token)
+    except HTTPException:
+        return None
+    return mode if claims.get("role") == "super-admin" else None
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler(asyncio.current_task(), PROFILING_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        profile_id = None
+
+        def finish():
+            nonlocal profile_id
+            if profile_id is None:
+                profiler.stop()
+                profile_id = profile_store.add(
+                    scope["method"], scope["path"], time.perf_counter() - started, profiler
+                )
+
+        async def send_wrapper(message):
+            if mode == "return":
+                return  # the profile is sent instead
+            if message["type"] == "http.response.start":
+                # the handler is done once it starts responding
+                finish()
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+
+        if mode == "return":
+            # from the profiler itself: with PROFILING_KEEP=0 the store keeps nothing
+            response = PlainTextResponse(profiler.collapsed(), headers={"X-Profile-Id": profile_id})
+            await response(scope, receive, send)
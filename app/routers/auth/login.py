@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from app.auth.auth_service import login_user
+from app.auth.auth_service import login_user, logout_user
+from app.auth.router import oauth2_scheme
 
 router = APIRouter(prefix="/auth", tags=["Generate Token / Login"])
 
@@ -18,3 +19,10 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         "token_type": "bearer",
         "user": result["user"],
     }
+
+
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    # Revokes this token for every worker; other sessions stay valid
+    await logout_user(token)
+    return {"message": "Logged out"}
@@ -25,6 +25,7 @@ async def create_course(course: CourseCreate):
     
     Returns:
     - 400: Invalid IDs, teacher/tenant not found, or belongs to different tenant
+    - 403: The tenant's subscription allows no more courses
     - 201: Course created successfully
     """
     try:
@@ -131,7 +132,7 @@ async def update_course(
     return updated_course
 
 
-@router.delete("/{course_id}", status_code=204)
+@router.delete("/{course_id}", status_code=202)
 async def delete_course(
     course_id: str,
     tenantId: str = Query(..., description="Tenant ID (required)")  
@@ -139,16 +140,16 @@ async def delete_course(
     """
     Delete a course permanently.
     
-     UPDATED: Now automatically:
-    - Removes course from teacher's assignedCourses array
-    - Removes course from all enrolled students' enrolledCourses arrays
+    The course and the teacher's assignedCourses entry are removed immediately.
+    Quizzes, assignments, submissions, student enrollments and course stats
+    are removed by a background job; poll statusUrl to follow it.
     
     tenantId is required as a query parameter.
     
     Returns:
     - 400: Invalid course ID or tenant ID format
     - 404: Course not found or belongs to different tenant
-    - 204: Successfully deleted (No Content)
+    - 202: Course deleted, clean-up job queued
     """
     result = await course_crud.delete_course(course_id, tenantId)
     
@@ -162,7 +163,11 @@ async def delete_course(
         else:
             raise HTTPException(status_code=400, detail=message)
     
-    return None
+    return {
+        "message": result["message"],
+        "jobId": result["jobId"],
+        "statusUrl": f"/jobs/{result['jobId']}?tenantId={tenantId}",
+    }
 
 
 # Enrollment Endpoints
@@ -215,15 +220,29 @@ async def unenroll_from_course(enrollment: CourseEnrollment):
     return result
 
 
+def _raise_student_courses_error(message: str):
+    if "Invalid" in message and "format" in message:
+        raise HTTPException(status_code=400, detail=message)
+    elif "different tenant" in message:
+        raise HTTPException(status_code=403, detail=message)
+    elif "not found" in message:
+        raise HTTPException(status_code=404, detail=message)
+    else:
+        raise HTTPException(status_code=400, detail=message)
+
+
 @router.get("/student/{student_id}", response_model=List[CourseResponse])
 async def get_student_courses(
     student_id: str,
-    tenantId: str = Query(..., description="Tenant ID (required)")  
+    tenantId: str = Query(..., description="Tenant ID (required)"),
+    skip: int = Query(0, ge=0, description="Number of courses to skip (pagination)"),
+    limit: int = Query(100, ge=1, le=100, description="Maximum courses to return")
 ):
     """
-    Get all courses a student is enrolled in.
+    Get the courses a student is enrolled in.
     
     tenantId is required as a query parameter.
+    Only courses belonging to that tenant are returned.
     
     Returns:
     - 400: Invalid student ID or tenant ID format
@@ -231,18 +250,52 @@ async def get_student_courses(
     - 404: Student not found
     - 200: List of courses (can be empty if not enrolled)
     """
-    result = await course_crud.get_student_courses(student_id, tenantId)
+    result = await course_crud.get_student_courses(student_id, tenantId, skip=skip, limit=limit)
     
     if not result["success"]:
-        message = result["message"]
-        
-        if "Invalid" in message and "format" in message:
-            raise HTTPException(status_code=400, detail=message)
-        elif "different tenant" in message:
-            raise HTTPException(status_code=403, detail=message)
-        elif "not found" in message:
-            raise HTTPException(status_code=404, detail=message)
-        else:
-            raise HTTPException(status_code=400, detail=message)
+        _raise_student_courses_error(result["message"])
+    
+    return result["courses"]
+
+
+@router.get("/student/{student_id}/home")
+async def get_student_home_courses(
+    student_id: str,
+    tenantId: str = Query(..., description="Tenant ID (required)"),
+    skip: int = Query(0, ge=0, description="Number of courses to skip (pagination)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum courses to return"),
+    fields: Optional[str] = Query(
+        "title,category,status,thumbnailUrl,teacherId",
+        description="Comma-separated course fields to return (id is always included)"
+    ),
+    includeProgress: bool = Query(True, description="Join completion data from course stats")
+):
+    """
+    Student home page: one page of enrolled courses with progress, in one query.
+    
+    Returns:
+    - 400: Invalid IDs or unknown field names
+    - 403: Student belongs to different tenant
+    - 404: Student not found
+    - 200: { courses, total, skip, limit }
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    result = await course_crud.get_student_courses_page(
+        student_id,
+        tenantId,
+        skip=skip,
+        limit=limit,
+        fields=field_list,
+        include_progress=includeProgress,
+    )
     
-    return result["courses"]
\ No newline at end of file
+    if not result["success"]:
+        _raise_student_courses_error(result["message"])
+    
+    return {
+        "courses": result["courses"],
+        "total": result["total"],
+        "skip": result["skip"],
+        "limit": result["limit"],
+    }
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.crud.dashboards import admin_dashboard as crud_admin
 from app.auth.dependencies import get_current_user, require_role
 
@@ -8,19 +10,50 @@ router = APIRouter(prefix="/admin/dashboard", tags=["Admin Dashboard"])
 admin_roles = ["admin", "super-admin"]
 
 
+def dashboard_tenant(
+    tenantId: Optional[str] = Query(None, description="Tenant to inspect (super-admin only)"),
+    current_user=Depends(require_role(*admin_roles)),
+) -> str:
+    """Admins see their own tenant; a super-admin picks one with ?tenantId=."""
+    tenant_id = tenantId if current_user["role"] == "super-admin" else current_user["tenant_id"]
+    if not tenant_id or not ObjectId.is_valid(tenant_id):
+        raise HTTPException(status_code=400, detail="A valid tenantId is required")
+    return tenant_id
+
+
+@router.get("")
+async def dashboard_summary(tenant_id: str = Depends(dashboard_tenant)):
+    return await crud_admin.get_summary(tenant_id)
+
+
 @router.get("/teachers")
-async def list_teachers(current_user=Depends(require_role(*admin_roles))):
-    teachers = await crud_admin.get_all_teachers(current_user["tenantId"])
-    return {"total": len(teachers), "teachers": teachers}
+async def list_teachers(
+    tenant_id: str = Depends(dashboard_tenant),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+):
+    summary = await crud_admin.get_summary(tenant_id)
+    teachers = await crud_admin.get_all_teachers(tenant_id, skip, limit)
+    return {"total": summary["teachers"], "teachers": teachers}
 
 
 @router.get("/students")
-async def list_students(current_user=Depends(require_role(*admin_roles))):
-    students = await crud_admin.get_all_students(current_user["tenantId"])
-    return {"total": len(students), "students": students}
+async def list_students(
+    tenant_id: str = Depends(dashboard_tenant),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+):
+    summary = await crud_admin.get_summary(tenant_id)
+    students = await crud_admin.get_all_students(tenant_id, skip, limit)
+    return {"total": summary["students"], "students": students}
 
 
 @router.get("/courses")
-async def list_courses(current_user=Depends(require_role(*admin_roles))):
-    courses = await crud_admin.get_all_courses(current_user["tenantId"])
-    return {"total": len(courses), "courses": courses}
+async def list_courses(
+    tenant_id: str = Depends(dashboard_tenant),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+):
+    summary = await crud_admin.get_summary(tenant_id)
+    courses = await crud_admin.get_all_courses(tenant_id, skip, limit)
+    return {"total": summary["courses"], "courses": courses}
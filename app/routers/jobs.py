@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.crud.jobs import get_job
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    tenantId: str = Query(..., description="Tenant ID (required)")
+):
+    """
+    Status and progress counters of a background job (e.g. course cascade delete).
+
+    Returns:
+    - 404: Job not found for this tenant
+    - 200: Job document
+    """
+    job = await get_job(job_id, tenantId)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,21 @@
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.settings import METRICS_TOKEN
+from app.utils.metrics import render_prometheus
+
+router = APIRouter(tags=["System"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(authorization: str | None = Header(default=None)):
+    """
+    Prometheus scrape endpoint for this worker process.
+
+    If METRICS_TOKEN is set, scrapers must send `Authorization: Bearer <token>`.
+    """
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,15 @@
-from fastapi import APIRouter
+import asyncio
+from datetime import date
+from typing import Literal
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.core.settings import LEADERBOARD_STREAM_KEEPALIVE_SECONDS
 from app.crud.student_performance import StudentPerformanceCRUD
+from app.crud.study_time import StudyTimeCRUD
+from app.schemas.student_performance import ActivityEventsRequest, BulkCourseProgressRequest
+from app.services.leaderboard_stream import format_sse, leaderboard_hub
+from app.services.progress_ingest import progress_ingest
 
 router = APIRouter(prefix="/studentPerformance", tags=["Student Performance"])
 
@@ -26,12 +36,79 @@ async def tenant_top5(tenantId: str):
     return await StudentPerformanceCRUD.tenant_top5(tenantId)
 
 
+@router.get("/{tenantId}/leaderboard/stream")
+async def tenant_leaderboard_stream(tenantId: str, limit: int = Query(10, ge=1)):
+    """
+    Server-Sent Events: one "snapshot" of the top `limit` students, then
+    "diff" events carrying only the rows ({rank, studentId, studentName,
+    points}) that changed, and under "removed" the ranks that no longer
+    exist (a student left the board).
+    """
+    if not ObjectId.is_valid(tenantId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId")
+
+    subscriber = await leaderboard_hub.subscribe(tenantId, limit)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), LEADERBOARD_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(message)
+        finally:
+            leaderboard_hub.unsubscribe(tenantId, subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{tenantId}/leaderboard/weekly")
+async def tenant_weekly_leaderboard(tenantId: str, weekStart: date | None = None):
+    """Archived ranking by points earned in one week (default: the latest archived week)."""
+    if not ObjectId.is_valid(tenantId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId")
+
+    week = await StudentPerformanceCRUD.weekly_leaderboard(tenantId, weekStart.isoformat() if weekStart else None)
+    if week is None:
+        raise HTTPException(status_code=404, detail="No weekly leaderboard archived for this week")
+    return week
+
+
+@router.get("/{tenantId}/leaderboard/weeks")
+async def tenant_weekly_leaderboard_weeks(tenantId: str, limit: int = Query(12, ge=1, le=104)):
+    if not ObjectId.is_valid(tenantId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId")
+    return await StudentPerformanceCRUD.weekly_leaderboard_weeks(tenantId, limit)
+
+
 # -------------------- STUDENT PERFORMANCE --------------------
 @router.get("/{tenantId}/{studentId}")
 async def get_student_performance(tenantId: str, studentId: str):
     return await StudentPerformanceCRUD.get_student_performance(studentId, tenantId)
 
 
+@router.get("/{tenantId}/{studentId}/rank")
+async def student_rank(tenantId: str, studentId: str):
+    rank = await StudentPerformanceCRUD.student_rank(studentId, tenantId)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Student not ranked in this tenant")
+    return rank
+
+
+@router.get("/{tenantId}/{studentId}/leaderboard-around")
+async def students_around(tenantId: str, studentId: str, radius: int = Query(5, ge=0, le=50)):
+    rows = await StudentPerformanceCRUD.students_around(studentId, tenantId, radius)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Student not ranked in this tenant")
+    return rows
+
+
 # -------------------- BADGES --------------------
 @router.get("/{tenantId}/{studentId}/badges")
 async def get_badges(tenantId: str, studentId: str):
@@ -62,13 +139,59 @@ async def course_stats(tenantId: str, studentId: str):
 
 @router.post("/{tenantId}/{studentId}/course-progress/{courseId}")
 async def update_course_progress(tenantId: str, studentId: str, courseId: str, completion: int, lastActive: str):
-    return await StudentPerformanceCRUD.update_course_progress(studentId, tenantId, courseId, completion, lastActive)
+    if not ObjectId.is_valid(tenantId) or not ObjectId.is_valid(studentId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId or studentId")
+    result = await StudentPerformanceCRUD.update_course_progress(studentId, tenantId, courseId, completion, lastActive)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Student performance record not found")
+    return result
+
+
+@router.post("/{tenantId}/course-progress/bulk")
+async def bulk_course_progress(tenantId: str, body: BulkCourseProgressRequest):
+    if not ObjectId.is_valid(tenantId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId")
+    for e in body.events:
+        if not ObjectId.is_valid(e.studentId):
+            raise HTTPException(status_code=400, detail=f"Invalid studentId: {e.studentId}")
+
+    events = [
+        {**e.model_dump(), "lastActive": e.lastActive.isoformat()}
+        for e in body.events
+    ]
+    return await StudentPerformanceCRUD.bulk_update_course_progress(tenantId, events)
+
+
+@router.post("/{tenantId}/events")
+async def ingest_events(tenantId: str, body: ActivityEventsRequest):
+    """
+    Progress, study-time and points events in one call. Responds once the
+    events are stored; retry on 503.
+    """
+    events = [e.model_dump(mode="json") for e in body.events]
+    return await progress_ingest.submit(tenantId, events)
 
 
 # -------------------- WEEKLY TIME --------------------
 @router.post("/{tenantId}/{studentId}/weekly-time")
 async def weekly_time(tenantId: str, studentId: str, weekStart: str, minutes: int):
-    return await StudentPerformanceCRUD.add_weekly_time(studentId, tenantId, weekStart, minutes)
+    if not ObjectId.is_valid(tenantId) or not ObjectId.is_valid(studentId):
+        raise HTTPException(status_code=400, detail="Invalid tenantId or studentId")
+    result = await StudentPerformanceCRUD.add_weekly_time(studentId, tenantId, weekStart, minutes)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Student performance record not found")
+    return result
+
+
+@router.get("/{tenantId}/{studentId}/study-time")
+async def study_time(
+    tenantId: str,
+    studentId: str,
+    start: str = Query(..., alias="from", description="First day, YYYY-MM-DD"),
+    end: str = Query(..., alias="to", description="Last day, YYYY-MM-DD"),
+    granularity: Literal["week", "month"] = "week",
+):
+    return await StudyTimeCRUD.get_range(studentId, tenantId, start, end, granularity)
 
 
 # -------------------- POINTS --------------------
@@ -1,56 +1,53 @@
 # app/routes/subscription.py
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.db.database import db  # your MongoDB client
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from app.crud import subscription as crud_subscription
 from app.schemas.subscription import Subscription
+from app.services.quotas import quotas
 from bson import ObjectId
 
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
 
-# Helper to convert _id to string
-def convert_id(sub):
-    if "_id" in sub:
-        sub["_id"] = str(sub["_id"])
-    return sub
-
-# Get all subscriptions
+# Get all subscriptions (paginated, optionally by status)
 @router.get("/", response_model=List[Subscription])
-async def get_subscriptions():
-    subscriptions = await db.subscriptions.find().to_list(100)
-    return [convert_id(sub) for sub in subscriptions]
+async def get_subscriptions(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[str] = Query(None, description="e.g. active, expired"),
+):
+    return await crud_subscription.get_subscriptions(skip, limit, status)
 
 # Get subscription by tenantId
 @router.get("/{tenant_id}", response_model=Subscription)
 async def get_subscription(tenant_id: str):
-    subscription = await db.subscriptions.find_one({"tenantId": tenant_id})
+    subscription = await crud_subscription.get_subscription(tenant_id)
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
-    return convert_id(subscription)
+    return subscription
+
+# Plan limits and current usage by tenantId
+@router.get("/{tenant_id}/usage")
+async def get_subscription_usage(tenant_id: str):
+    if not ObjectId.is_valid(tenant_id):
+        raise HTTPException(status_code=400, detail="Invalid tenant ID")
+    return await quotas.usage(tenant_id)
 
 # Create a new subscription
 @router.post("/", response_model=Subscription)
 async def create_subscription(sub: Subscription):
-    sub_dict = sub.dict()
-    result = await db.subscriptions.insert_one(sub_dict)
-    sub_dict["_id"] = str(result.inserted_id)
-    return sub_dict
+    return await crud_subscription.create_subscription(sub)
 
 # Update subscription by tenantId
 @router.put("/{tenant_id}", response_model=Subscription)
 async def update_subscription(tenant_id: str, sub: Subscription):
-    result = await db.subscriptions.update_one(
-        {"tenantId": tenant_id},
-        {"$set": sub.dict()}
-    )
-    if result.modified_count == 0:
+    updated_sub = await crud_subscription.update_subscription(tenant_id, sub)
+    if not updated_sub:
         raise HTTPException(status_code=404, detail="Subscription not found")
-    updated_sub = await db.subscriptions.find_one({"tenantId": tenant_id})
-    return convert_id(updated_sub)
+    return updated_sub
 
 # Delete subscription by tenantId
 @router.delete("/{tenant_id}")
 async def delete_subscription(tenant_id: str):
-    result = await db.subscriptions.delete_one({"tenantId": tenant_id})
-    if result.deleted_count == 0:
+    if not await crud_subscription.delete_subscription(tenant_id):
         raise HTTPException(status_code=404, detail="Subscription not found")
     return {"detail": "Subscription deleted successfully"}
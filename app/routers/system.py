@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.auth.dependencies import require_role
+from app.db.monitoring import query_stats
+from app.middleware.profiling import profile_store
+from app.services.rankings import rankings
+from app.utils.metrics import read_gauges
+
+router = APIRouter(
+    prefix="/system",
+    tags=["System"],
+    dependencies=[Depends(require_role("super-admin"))],
+)
+
+
+@router.get("/stats")
+async def get_stats():
+    """Current values of the in-process gauges (queue depths, in-flight work)."""
+    return read_gauges()
+
+
+@router.get("/queries")
+async def get_query_stats(limit: int = Query(20, ge=1, le=200)):
+    """
+    Mongo commands seen by this worker since start (or the last reset):
+    count, failures and latency percentiles per collection/command, and the
+    query shapes (values redacted) that cost the most total time. A shape with
+    a high total and a high average is usually a query missing an index.
+    """
+    return query_stats.snapshot(limit)
+
+
+@router.delete("/queries")
+async def reset_query_stats():
+    """Start a fresh measurement window."""
+    query_stats.reset()
+    return {"message": "Query stats reset"}
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Request profiles recorded by this worker (PROFILING_ENABLED + X-Profile header), newest first."""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """A stored profile in collapsed-stack format (flamegraph.pl / speedscope)."""
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile["collapsed"])
+
+
+@router.get("/rankings")
+async def get_ranking_stats():
+    """In-memory leaderboards of this worker: tenants, students and approximate memory use."""
+    return rankings.stats()
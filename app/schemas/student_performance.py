@@ -1,6 +1,6 @@
-from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel
+from typing import Annotated, List, Literal, Optional, Union
+from datetime import date, datetime
+from pydantic import BaseModel, Field
 
 
 class AddPointsRequest(BaseModel):
@@ -33,10 +33,6 @@ class StudentPerformanceResponse(BaseModel):
     xp: int
     xpToNextLevel: int
 
-    courseStats: Optional[List[dict]] = []
-    badges: Optional[List[dict]] = []
-    certificates: Optional[List[dict]] = []
-    weeklyStudyTime: Optional[List[dict]] = []
     LeaderBoard: Optional[List[dict]] = []
 
     createdAt: Optional[datetime] = None
@@ -49,3 +45,42 @@ class CourseProgressRequest(BaseModel):
     courseId: str
     completionPercentage: int
     lastActive: datetime
+
+
+class CourseProgressEvent(CourseProgressRequest):
+    studentId: str
+
+
+class BulkCourseProgressRequest(BaseModel):
+    # oldest first; later events for the same student + course win
+    events: List[CourseProgressEvent] = Field(..., max_length=1000)
+
+
+# -------------------- ACTIVITY EVENTS (batched ingestion) --------------------
+class ProgressEvent(BaseModel):
+    type: Literal["progress"]
+    studentId: str
+    courseId: str
+    completionPercentage: int
+    lastActive: datetime
+
+
+class StudyTimeEvent(BaseModel):
+    type: Literal["time"]
+    studentId: str
+    weekStart: date
+    minutes: int
+
+
+class PointsEvent(BaseModel):
+    type: Literal["points"]
+    studentId: str
+    points: int
+
+
+ActivityEvent = Annotated[Union[ProgressEvent, StudyTimeEvent, PointsEvent], Field(discriminator="type")]
+
+
+class ActivityEventsRequest(BaseModel):
+    # oldest first
+    events: List[ActivityEvent] = Field(..., max_length=1000)
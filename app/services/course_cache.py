@@ -0,0 +1,89 @@
+"""
+Read-through cache for course documents.
+
+Entries are keyed by course id and keep the course's tenantId, so callers
+still apply tenant isolation on a hit. Writers call invalidate(); each call
+bumps a per-course version and a load that started before the bump is not
+stored, so a slow read can never re-insert a document that was just changed.
+
+The cache is per worker process; COURSE_CACHE_TTL_SECONDS bounds how long
+another worker can serve a stale copy.
+"""
+import copy
+from typing import Awaitable, Callable, Optional
+
+from bson import ObjectId
+
+from app.core.settings import (
+    COURSE_CACHE_SIZE,
+    COURSE_CACHE_TTL_SECONDS,
+    COURSE_NEGATIVE_CACHE_TTL_SECONDS,
+)
+from app.utils.cache import TTLCache
+
+
+class CourseCache:
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self.maxsize = maxsize
+        self._entries = TTLCache(maxsize, ttl)
+        self._not_found = TTLCache(maxsize, negative_ttl) if negative_ttl > 0 else None
+        self._versions: dict[ObjectId, int] = {}
+        self._epoch = 0  # bumped by clear(), invalidates every in-flight load
+
+    async def get(
+        self, course_id: ObjectId, loader: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """Return a copy of the cached course, or load, cache and return it."""
+        course = self._entries.get(course_id)
+        if course is not None:
+            # deep: callers may edit nested lists (modules, lessons) of what they get
+            return copy.deepcopy(course)
+
+        if self._not_found is not None and self._not_found.get(course_id):
+            return None
+
+        version = self._version(course_id)
+        course = await loader()
+
+        # Skip the store if a writer invalidated this course while we were reading
+        if self._version(course_id) == version:
+            if course is not None:
+                self._entries.set(course_id, course)
+            elif self._not_found is not None:
+                self._not_found.set(course_id, True)
+
+        return copy.deepcopy(course) if course is not None else None
+
+    def _version(self, course_id: ObjectId) -> tuple:
+        return self._epoch, self._versions.get(course_id, 0)
+
+    def invalidate(self, course_id: ObjectId):
+        self._entries.pop(course_id)
+        if self._not_found is not None:
+            self._not_found.pop(course_id)
+
+        self._versions[course_id] = self._versions.get(course_id, 0) + 1
+
+        # Versions only need to outlive in-flight loads; flushing everything
+        # is always safe and keeps the map bounded.
+        if len(self._versions) > self.maxsize * 4:
+            self.clear()
+
+    def clear(self):
+        self._entries.clear()
+        if self._not_found is not None:
+            self._not_found.clear()
+        self._versions = {}
+        self._epoch += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": self._entries.stats(),
+            "notFound": self._not_found.stats() if self._not_found is not None else None,
+        }
+
+
+course_cache = CourseCache(
+    COURSE_CACHE_SIZE, COURSE_CACHE_TTL_SECONDS, COURSE_NEGATIVE_CACHE_TTL_SECONDS
+)
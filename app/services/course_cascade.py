@@ -0,0 +1,89 @@
+"""
+Cascade delete for courses.
+
+CourseCRUD.delete_course removes the course document itself and enqueues a
+"course.cascade_delete" job; this handler then cleans up everything that
+referenced the course, in batches so a large course does not hold an HTTP
+request open or flood the primary with one huge multi-document write.
+"""
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.core.settings import CASCADE_BATCH_PAUSE_SECONDS, CASCADE_BATCH_SIZE
+from app.crud import tenant_stats as crud_tenant_stats
+from app.db.database import db
+from app.services.jobs import JobContext, job_runner
+from app.utils.mongo import ref_variants
+
+
+JOB_TYPE = "course.cascade_delete"
+
+
+async def _delete_in_batches(collection, query: dict, counter: str, ctx: JobContext):
+    while True:
+        batch = await collection.find(query, {"_id": 1}).limit(CASCADE_BATCH_SIZE).to_list(
+            length=CASCADE_BATCH_SIZE
+        )
+        if not batch:
+            return
+
+        result = await collection.delete_many({"_id": {"$in": [d["_id"] for d in batch]}})
+        await ctx.progress(**{counter: result.deleted_count})
+        await asyncio.sleep(CASCADE_BATCH_PAUSE_SECONDS)
+
+
+async def _update_in_batches(collection, query: dict, update: dict, counter: str, ctx: JobContext):
+    # `update` must make documents stop matching `query`, otherwise this never ends
+    while True:
+        batch = await collection.find(query, {"_id": 1}).limit(CASCADE_BATCH_SIZE).to_list(
+            length=CASCADE_BATCH_SIZE
+        )
+        if not batch:
+            return
+
+        result = await collection.update_many(
+            {"_id": {"$in": [d["_id"] for d in batch]}}, update
+        )
+        await ctx.progress(**{counter: result.modified_count})
+        await asyncio.sleep(CASCADE_BATCH_PAUSE_SECONDS)
+
+
+async def cascade_delete_course(job: dict, ctx: JobContext):
+    course_id = ObjectId(job["params"]["courseId"])
+    tenant_id = job["tenantId"]
+    scope = {"courseId": course_id, "tenantId": tenant_id}
+
+    # submissions first so a failure never leaves submissions without a parent
+    await _delete_in_batches(db.quizSubmissions, scope, "quizSubmissionsDeleted", ctx)
+    await _delete_in_batches(db.quizzes, scope, "quizzesDeleted", ctx)
+    await _delete_in_batches(db.assignmentSubmissions, scope, "assignmentSubmissionsDeleted", ctx)
+    await _delete_in_batches(db.assignments, scope, "assignmentsDeleted", ctx)
+
+    # enrollment references (either stored form, see normalize_enrollment_refs)
+    await _update_in_batches(
+        db.students,
+        {"enrolledCourses": {"$in": ref_variants(course_id)}},
+        {
+            "$pull": {"enrolledCourses": {"$in": ref_variants(course_id)}},
+            "$set": {"updatedAt": datetime.utcnow()},
+        },
+        "studentsUpdated",
+        ctx,
+    )
+
+    # per-course progress entries
+    await _update_in_batches(
+        db.studentPerformanceHistory,
+        {"courseStats.courseId": {"$in": ref_variants(course_id)}},
+        {"$pull": {"courseStats": {"courseId": {"$in": ref_variants(course_id)}}}},
+        "courseStatsRemoved",
+        ctx,
+    )
+
+    # submissions and enrollments just removed in bulk
+    await crud_tenant_stats.reconcile(tenant_id)
+
+
+job_runner.register(JOB_TYPE, cascade_delete_course)
@@ -0,0 +1,100 @@
+"""
+In-process background job runner.
+
+Jobs are persisted in the `jobs` collection (see app/crud/jobs.py) and executed
+by a small pool of asyncio worker tasks started from the application lifespan.
+Handlers must be idempotent: a job interrupted by a restart is re-queued and
+runs again from the beginning.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from bson import ObjectId
+
+from app.core.settings import JOB_STALE_SECONDS, JOB_WORKERS
+from app.crud import jobs as crud_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """Handed to a job handler so it can report progress."""
+
+    def __init__(self, job_id: ObjectId):
+        self.job_id = job_id
+
+    async def progress(self, **counts: int):
+        await crud_jobs.add_progress(self.job_id, counts)
+
+
+Handler = Callable[[dict, JobContext], Awaitable[None]]
+
+
+class JobRunner:
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._handlers: dict[str, Handler] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def register(self, job_type: str, handler: Handler):
+        self._handlers[job_type] = handler
+
+    async def enqueue(self, job_type: str, params: dict, tenant_id: Optional[ObjectId] = None) -> str:
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = await crud_jobs.create_job(job_type, params, tenant_id)
+        self._queue.put_nowait(job_id)
+        return str(job_id)
+
+    async def start(self):
+        # Resume work left behind by a previous process
+        try:
+            await crud_jobs.requeue_stale_jobs(JOB_STALE_SECONDS)
+            for job_id in await crud_jobs.get_queued_job_ids():
+                self._queue.put_nowait(job_id)
+        except Exception as e:
+            logger.warning("Could not resume pending jobs: %s", e)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # In-flight jobs stay "running" and are re-queued once they go stale
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: ObjectId):
+        job = await crud_jobs.claim_job(job_id)
+        if not job:
+            return  # already claimed by another worker/process
+
+        handler = self._handlers.get(job["type"])
+        if handler is None:
+            await crud_jobs.finish_job(job_id, error=f"No handler for job type {job['type']}")
+            return
+
+        try:
+            await handler(job, JobContext(job_id))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job["type"])
+            await crud_jobs.finish_job(job_id, error=str(e))
+        else:
+            await crud_jobs.finish_job(job_id)
+
+
+job_runner = JobRunner(workers=JOB_WORKERS)
@@ -0,0 +1,130 @@
+"""
+Live tenant leaderboards pushed over Server-Sent Events.
+
+Classroom screens used to poll /studentPerformance/{tenantId}/leaderboard,
+each poll re-reading and re-sorting every student of the tenant. Now every
+subscriber is fed from the in-memory rankings (app/services/rankings.py):
+
+- each subscriber gets the top `limit` rows once ("snapshot"), then only the
+  rows whose rank/student/points changed ("diff", keyed by rank), plus the
+  ranks that no longer exist when the board shrinks ("removed");
+- the hub observes the rankings, so every points update in this worker, and
+  every resync picking up other workers' updates, becomes a diff.
+"""
+import asyncio
+import json
+import logging
+
+from fastapi import HTTPException
+
+from app.core.settings import LEADERBOARD_STREAM_MAX_LIMIT
+from app.services.rankings import rankings
+from app.utils.metrics import register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Messages buffered per subscriber; a slower client is sent a fresh snapshot instead
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class Subscriber:
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+
+def _message(kind: str, payload: dict) -> dict:
+    return {"event": kind, "data": payload}
+
+
+class LeaderboardHub:
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self._subscribers: dict[str, set[Subscriber]] = {}
+        self.diffs_sent = 0
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    def tenant_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self, tenant_id: str, limit: int) -> Subscriber:
+        subscriber = Subscriber(min(limit, self.max_limit))
+
+        try:
+            entries = await rankings.top(tenant_id, subscriber.limit)
+        except Exception as e:
+            logger.warning("Leaderboard load for tenant %s failed: %s", tenant_id, e)
+            raise HTTPException(
+                status_code=503,
+                detail="Leaderboard unavailable, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        # no await between reading the snapshot and registering: no update is missed
+        self._subscribers.setdefault(tenant_id, set()).add(subscriber)
+        subscriber.queue.put_nowait(_message("snapshot", {"entries": entries}))
+        return subscriber
+
+    def unsubscribe(self, tenant_id: str, subscriber: Subscriber):
+        subscribers = self._subscribers.get(tenant_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[tenant_id]
+
+    # -------------------- rankings observer --------------------
+    def watched(self, tenant_id: str) -> int:
+        return max((s.limit for s in self._subscribers.get(tenant_id, ())), default=0)
+
+    def changed(self, tenant_id: str, before: list[dict], after: list[dict]):
+        changes = [row for i, row in enumerate(after) if i >= len(before) or before[i] != row]
+        # a student left the top N and nobody moved up to replace them
+        removed = [row["rank"] for row in before[len(after):]]
+        if not changes and not removed:
+            return
+
+        for subscriber in list(self._subscribers.get(tenant_id, ())):
+            rows = [row for row in changes if row["rank"] <= subscriber.limit]
+            gone = [rank for rank in removed if rank <= subscriber.limit]
+            if rows or gone:
+                diff = {"changes": rows, **({"removed": gone} if gone else {})}
+                self._offer(subscriber, _message("diff", diff), after)
+
+    def _offer(self, subscriber: Subscriber, message: dict, current: list[dict]):
+        try:
+            subscriber.queue.put_nowait(message)
+            self.diffs_sent += 1
+        except asyncio.QueueFull:
+            # too far behind for diffs to be useful; start it over from a snapshot
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(_message("snapshot", {"entries": current[:subscriber.limit]}))
+
+
+def format_sse(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+leaderboard_hub = LeaderboardHub(LEADERBOARD_STREAM_MAX_LIMIT)
+rankings.add_observer(leaderboard_hub)
+
+register_gauge(
+    "leaderboard_stream_subscribers",
+    "Open leaderboard streams in this worker",
+    leaderboard_hub.subscriber_count,
+)
+register_gauge(
+    "leaderboard_stream_tenants",
+    "Tenants with at least one open leaderboard stream",
+    leaderboard_hub.tenant_count,
+)
+register_gauge(
+    "leaderboard_stream_diffs_sent",
+    "Leaderboard diff messages queued to subscribers",
+    lambda: leaderboard_hub.diffs_sent,
+)
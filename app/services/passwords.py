@@ -0,0 +1,95 @@
+"""
+Async password hashing on a bounded worker pool.
+
+bcrypt is deliberately slow; calling it inline in an async handler blocks the
+event loop for the full hash cost and stalls every other request on the
+worker. PasswordService runs hash/verify on an executor and caps how many
+run at once. Callers beyond PASSWORD_HASH_MAX_QUEUE get a 503 instead of
+piling up behind a login rush.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.core.settings import (
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_QUEUE,
+    PASSWORD_HASH_WORKERS,
+)
+from app.utils import security
+from app.utils.metrics import register_gauge
+
+
+class PasswordService:
+
+    def __init__(self, workers: int, max_queue: int, executor: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self.waiting = 0
+        self.running = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        if self.waiting >= self.max_queue:
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(security.verify_password, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_service = PasswordService(
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_EXECUTOR
+)
+
+register_gauge(
+    "password_hash_queue_depth",
+    "Password hash/verify calls waiting for a worker",
+    lambda: password_service.waiting,
+)
+register_gauge(
+    "password_hash_in_flight",
+    "Password hash/verify calls currently running",
+    lambda: password_service.running,
+)
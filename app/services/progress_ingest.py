@@ -0,0 +1,225 @@
+"""
+Batched ingestion of student activity events (course progress, study time,
+points).
+
+Player heartbeats arrive as many small requests. Instead of writing each one,
+POST /studentPerformance/{tenantId}/events hands its events to this ingestor:
+requests queue up for INGEST_FLUSH_SECONDS (or until INGEST_MAX_BATCH_EVENTS
+events are waiting), then the whole batch is collapsed per student and
+written with one unordered bulk_write per collection:
+
+- progress: last event per student + course (see progress_ops)
+- time:     minutes summed per student + month bucket
+- points:   points summed per student, then levels recomputed in one pass
+
+A request only gets its response once its batch is stored, and gets a 503
+if the write fails, so a client that retries until it sees a 2xx has every
+event applied at least once (progress is idempotent; retried time/points
+events can count twice). Backpressure: at most INGEST_QUEUE_SIZE requests
+wait for a batch; beyond that, callers wait up to
+INGEST_ENQUEUE_TIMEOUT_SECONDS for room and then get 503 + Retry-After.
+"""
+import asyncio
+import logging
+import time
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.core.settings import (
+    INGEST_ENQUEUE_TIMEOUT_SECONDS,
+    INGEST_FLUSH_SECONDS,
+    INGEST_MAX_BATCH_EVENTS,
+    INGEST_QUEUE_SIZE,
+)
+from app.crud.student_performance import StudentPerformanceCRUD
+from app.crud.study_time import StudyTimeCRUD, study_time_collection
+from app.db.database import student_performance_collection, student_performance_history_collection
+from app.utils.metrics import register_gauge
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("progress", "time", "points")
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+class ProgressIngestor:
+
+    def __init__(self, flush_seconds: float, max_batch_events: int, queue_size: int, enqueue_timeout: float):
+        self.flush_seconds = flush_seconds
+        self.max_batch_events = max_batch_events
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        # (tenant_id, events, future) per request; None tells the worker to stop
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.events_written = 0
+        self.batches_written = 0
+        self.flush_errors = 0
+        self.last_batch_events = 0
+        self.last_batch_operations = 0
+        self.last_flush_seconds = 0.0
+
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, tenant_id: str, events: list[dict]) -> dict:
+        """Queue a request's events and return once they are stored."""
+        if not events:
+            return {"accepted": 0}
+
+        # reject bad input here; inside a batch it would fail everyone's events
+        if not ObjectId.is_valid(tenant_id):
+            raise HTTPException(status_code=400, detail="Invalid tenantId")
+        for event in events:
+            if not ObjectId.is_valid(event["studentId"]):
+                raise HTTPException(status_code=400, detail=f"Invalid studentId: {event['studentId']}")
+
+        if self._task is None:
+            # not started (scripts, tests): write straight through
+            await self._write([(tenant_id, events)])
+            return {"accepted": len(events)}
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((tenant_id, events, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise _busy()
+
+        return await future
+
+    async def _write(self, items: list[tuple[str, list[dict]]]) -> int:
+        by_tenant: dict[str, dict[str, list]] = {}
+        for tenant_id, events in items:
+            kinds = by_tenant.setdefault(tenant_id, {kind: [] for kind in EVENT_TYPES})
+            for event in events:
+                kinds[event["type"]].append(event)
+
+        history_ops, time_ops, points_ops, scored = [], [], [], set()
+        for tenant_id, kinds in by_tenant.items():
+            history_ops += StudentPerformanceCRUD.progress_ops(tenant_id, kinds["progress"])
+            # time buckets are upserted (one per month); only for existing students
+            known = await StudyTimeCRUD.existing_students(tenant_id, [e["studentId"] for e in kinds["time"]])
+            time_ops += StudyTimeCRUD.add_minutes_ops(tenant_id, kinds["time"], known)
+            points_ops += StudentPerformanceCRUD.points_ops(tenant_id, kinds["points"])
+            scored.update((tenant_id, event["studentId"]) for event in kinds["points"])
+
+        for collection, ops in [
+            (student_performance_history_collection, history_ops),
+            (study_time_collection, time_ops),
+            (student_performance_collection, points_ops),
+        ]:
+            if ops:
+                await collection.bulk_write(ops, ordered=False)
+
+        await StudentPerformanceCRUD.recompute_levels(sorted(scored))
+        return len(history_ops) + len(time_ops) + len(points_ops)
+
+    async def _flush(self, batch: list):
+        started = time.perf_counter()
+        events = sum(len(item[1]) for item in batch)
+        try:
+            operations = await self._write([(tenant_id, request_events) for tenant_id, request_events, _ in batch])
+        except Exception as e:
+            self.flush_errors += 1
+            logger.warning("Event batch of %d request(s) failed: %s", len(batch), e)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(_busy())
+            return
+        finally:
+            self.last_flush_seconds = time.perf_counter() - started
+
+        self.events_written += events
+        self.batches_written += 1
+        self.last_batch_events = events
+        self.last_batch_operations = operations
+        for _, request_events, future in batch:
+            if not future.done():
+                future.set_result({"accepted": len(request_events)})
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                return
+
+            batch, events = [item], len(item[1])
+            deadline = loop.time() + self.flush_seconds
+            while events < self.max_batch_events:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                events += len(item[1])
+
+            try:
+                await self._flush(batch)
+            except Exception:
+                logger.exception("Event ingest loop error")
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything already queued, then stop."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None  # new submits write straight through
+        await self._queue.put(None)
+        await asyncio.gather(task, return_exceptions=True)
+
+
+progress_ingest = ProgressIngestor(
+    INGEST_FLUSH_SECONDS, INGEST_MAX_BATCH_EVENTS, INGEST_QUEUE_SIZE, INGEST_ENQUEUE_TIMEOUT_SECONDS
+)
+
+register_gauge(
+    "ingest_queued_requests",
+    "Event ingestion requests waiting for their batch to be written",
+    progress_ingest.queued,
+)
+register_gauge(
+    "ingest_events_written",
+    "Activity events stored by the batched ingestor",
+    lambda: progress_ingest.events_written,
+)
+register_gauge(
+    "ingest_batches_written",
+    "Event batches stored by the batched ingestor",
+    lambda: progress_ingest.batches_written,
+)
+register_gauge(
+    "ingest_last_batch_events",
+    "Events in the most recent batch",
+    lambda: progress_ingest.last_batch_events,
+)
+register_gauge(
+    "ingest_last_batch_operations",
+    "Database writes the most recent batch collapsed into",
+    lambda: progress_ingest.last_batch_operations,
+)
+register_gauge(
+    "ingest_last_flush_seconds",
+    "Duration of the most recent batch write",
+    lambda: progress_ingest.last_flush_seconds,
+)
+register_gauge(
+    "ingest_flush_errors",
+    "Event batches that failed (their requests got 503)",
+    lambda: progress_ingest.flush_errors,
+)
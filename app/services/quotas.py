@@ -0,0 +1,89 @@
+"""
+Subscription plan quotas.
+
+Usage lives in each tenant's tenantStats counters (app/crud/tenant_stats.py),
+which the create/delete paths already maintain. A create reserves its slot
+with one conditional $inc ("only while below the limit") before writing, and
+releases it if the write fails, so a check is O(1) and two concurrent
+requests can never both take the last slot.
+
+Plan limits come from the tenant's subscription via the per-worker cache in
+app/services/subscriptions.py. Tenants without a subscription are not
+limited; a tenant whose subscription is expired (or otherwise not active)
+can't create anything that counts against a plan.
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.crud import tenant_stats as crud_tenant_stats
+from app.services.subscriptions import is_active, subscription_service
+
+# Counter -> plan field
+LIMIT_FIELDS = {
+    "students": "max_students",
+    "teachers": "max_teachers",
+    "courses": "max_courses",
+    "aiCredits": "ai_credits",
+}
+
+
+class QuotaService:
+
+    async def limits(self, tenant_id) -> dict:
+        """Counter -> limit (None: unlimited) for the tenant's plan; 403 if its subscription is not active."""
+        subscription = await subscription_service.get(tenant_id)
+        if subscription is None:
+            return {}
+        if not is_active(subscription):
+            raise HTTPException(status_code=403, detail="The tenant's subscription is not active")
+        return {counter: subscription.get(field) for counter, field in LIMIT_FIELDS.items()}
+
+    @staticmethod
+    def _exceeded(counter: str, limit: Optional[int]):
+        return HTTPException(
+            status_code=403,
+            detail=f"Subscription limit reached: {LIMIT_FIELDS[counter]} is {limit}",
+        )
+
+    async def reserve(self, tenant_id, counter: str):
+        """Take one students/teachers/courses slot, or raise 403 if the plan is full."""
+        limit = (await self.limits(tenant_id)).get(counter)
+        if not await crud_tenant_stats.reserve(tenant_id, counter, limit):
+            raise self._exceeded(counter, limit)
+
+    async def release(self, tenant_id, counter: str):
+        await crud_tenant_stats.increment(tenant_id, **{counter: -1})
+
+    async def use_ai_credit(self, tenant_id) -> str:
+        """Spend one of this month's AI credits, or raise 403. Returns the month, for release_ai_credit()."""
+        limit = (await self.limits(tenant_id)).get("aiCredits")
+        month = datetime.utcnow().strftime("%Y-%m")
+        if not await crud_tenant_stats.use_monthly(tenant_id, "aiCredits", limit, month):
+            raise self._exceeded("aiCredits", limit)
+        return month
+
+    async def release_ai_credit(self, tenant_id, month: str):
+        await crud_tenant_stats.release_monthly(tenant_id, "aiCredits", month)
+
+    async def usage(self, tenant_id) -> dict:
+        subscription = await subscription_service.get(tenant_id)
+        stats = await crud_tenant_stats.get_stats(str(tenant_id))
+        month = datetime.utcnow().strftime("%Y-%m")
+        used = {
+            "students": stats.get("students", 0),
+            "teachers": stats.get("teachers", 0),
+            "courses": stats.get("courses", 0),
+            "aiCredits": stats.get("aiCreditsUsed", 0) if stats.get("aiCreditsMonth") == month else 0,
+        }
+        return {
+            "active": subscription is None or is_active(subscription),
+            **{
+                counter: {"used": used[counter], "limit": subscription.get(field) if subscription else None}
+                for counter, field in LIMIT_FIELDS.items()
+            },
+        }
+
+
+quotas = QuotaService()
@@ -0,0 +1,294 @@
+"""
+In-memory leaderboards: one RankedSet (app/utils/ranking.py) per tenant,
+keyed by (-totalPoints, studentId).
+
+Warmed from studentPerformance at startup and kept current by the
+points-award paths (add_points, batched ingestion), so leaderboard reads
+never scan or sort:
+
+- top(tenant, k)               O(log n + k)
+- rank_of(tenant, student)     O(log n)
+- around(tenant, student, r)   O(log n + r)
+
+Each worker process holds its own copy. Points awarded by another worker
+reach it on the next resync (every LEADERBOARD_RESYNC_SECONDS), which reads
+only the documents whose updatedAt moved since the previous one (the points
+writers set it). Every LEADERBOARD_FULL_RESYNC_SECONDS a projected scan of
+the whole collection also catches documents changed without it (deletes,
+manual edits). Both apply only the differences, skipping students this
+worker changed since the read began.
+
+Observers (the live leaderboard stream) are told which rows of the top N
+changed with every update.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core.settings import LEADERBOARD_FULL_RESYNC_SECONDS, LEADERBOARD_RESYNC_SECONDS
+from app.db.database import student_performance_collection
+from app.utils.metrics import register_gauge
+from app.utils.ranking import RankedSet
+
+logger = logging.getLogger(__name__)
+
+PROJECTION = {"_id": 0, "tenantId": 1, "studentId": 1, "studentName": 1, "totalPoints": 1}
+
+# Incremental resyncs re-read this much before the previous one, for clock skew between workers
+CLOCK_SKEW = timedelta(seconds=60)
+
+
+class _TenantRanking:
+
+    __slots__ = ("order", "students")
+
+    def __init__(self, students: dict | None = None):
+        # studentId -> (points, name, monotonic time of the last local update)
+        self.students: dict[str, tuple[int, str | None, float]] = students or {}
+        self.order = RankedSet((-points, student_id) for student_id, (points, _, _) in self.students.items())
+
+    def set(self, student_id: str, points: int, name: str | None, stamp: float):
+        old = self.students.get(student_id)
+        if old is not None:
+            if name is None:
+                name = old[1]
+            if old[0] != points:
+                self.order.remove((-old[0], student_id))
+                self.order.add((-points, student_id))
+        else:
+            self.order.add((-points, student_id))
+        self.students[student_id] = (points, name, stamp)
+
+    def discard(self, student_id: str):
+        old = self.students.pop(student_id, None)
+        if old is not None:
+            self.order.remove((-old[0], student_id))
+
+    def row(self, rank: int, key: tuple) -> dict:
+        student_id = key[1]
+        return {"rank": rank, "studentId": student_id, "studentName": self.students[student_id][1], "points": -key[0]}
+
+    def rows(self, start: int, stop: int) -> list[dict]:
+        return [self.row(rank, key) for rank, key in enumerate(self.order.slice(start, stop), start=start + 1)]
+
+
+class LeaderboardRankings:
+
+    def __init__(self, resync_seconds: float, full_resync_seconds: float):
+        self.resync_seconds = resync_seconds
+        self.full_resync_seconds = full_resync_seconds
+        self._tenants: dict[str, _TenantRanking] = {}
+        self._observers: list = []
+        self._task: asyncio.Task | None = None
+        self._synced_at: datetime | None = None  # wall clock at the start of the last read
+        self.warmed = False
+        self.last_resync_seconds = 0.0
+        self.last_resync_documents = 0
+
+    def tenant_count(self) -> int:
+        return len(self._tenants)
+
+    def student_count(self) -> int:
+        return sum(len(r.students) for r in self._tenants.values())
+
+    def add_observer(self, observer):
+        """observer.watched(tenant_id) -> top-N it cares about (0: none);
+        observer.changed(tenant_id, before_rows, after_rows)."""
+        self._observers.append(observer)
+
+    # -------------------- loading --------------------
+    @staticmethod
+    def _entry(doc: dict, stamp: float) -> tuple[str, tuple]:
+        return str(doc["studentId"]), (doc.get("totalPoints", 0), doc.get("studentName"), stamp)
+
+    async def warm(self):
+        """Build every tenant's ranking from one projected scan."""
+        synced_at = datetime.utcnow()
+        by_tenant: dict[str, dict] = {}
+        async for doc in student_performance_collection.find({}, PROJECTION):
+            student_id, entry = self._entry(doc, 0.0)
+            by_tenant.setdefault(str(doc["tenantId"]), {})[student_id] = entry
+
+        self._tenants = {tenant_id: _TenantRanking(students) for tenant_id, students in by_tenant.items()}
+        self._synced_at = synced_at
+        self.warmed = True
+
+    async def _tenant(self, tenant_id: str) -> _TenantRanking:
+        ranking = self._tenants.get(tenant_id)
+        if ranking is not None:
+            return ranking
+        if self.warmed:
+            return _TenantRanking()  # no students yet; not stored until one scores
+
+        # warm-up failed (e.g. Mongo was down at startup): load this tenant alone
+        students = {}
+        async for doc in student_performance_collection.find({"tenantId": ObjectId(tenant_id)}, PROJECTION):
+            student_id, entry = self._entry(doc, 0.0)
+            students[student_id] = entry
+        return self._tenants.setdefault(tenant_id, _TenantRanking(students))
+
+    # -------------------- updates --------------------
+    def _mutate(self, tenant_id: str, ranking: _TenantRanking, change):
+        watched = max((o.watched(tenant_id) for o in self._observers), default=0)
+        before = ranking.rows(0, watched) if watched else None
+        change()
+        if watched:
+            after = ranking.rows(0, watched)
+            for observer in self._observers:
+                observer.changed(tenant_id, before, after)
+
+    def set_points(self, tenant_id, student_id, points: int, name: str | None = None):
+        """A student's totalPoints changed (called after the write succeeded)."""
+        tenant_id, student_id = str(tenant_id), str(student_id)
+        ranking = self._tenants.get(tenant_id)
+        if ranking is None:
+            if not self.warmed:
+                return  # loaded from Mongo (with this change) on first read
+            ranking = self._tenants[tenant_id] = _TenantRanking()
+        self._mutate(tenant_id, ranking, lambda: ranking.set(student_id, points, name, time.monotonic()))
+
+    async def resync(self, full: bool = False):
+        """Apply changes since the last sync (full: reconcile with the whole collection)."""
+        if not self.warmed:
+            await self.warm()
+            return
+
+        started, synced_at = time.monotonic(), datetime.utcnow()
+        query = {} if full else {"updatedAt": {"$gte": self._synced_at - CLOCK_SKEW}}
+        seen: dict[str, dict] = {}
+        documents = 0
+        async for doc in student_performance_collection.find(query, PROJECTION):
+            student_id, entry = self._entry(doc, started)
+            seen.setdefault(str(doc["tenantId"]), {})[student_id] = entry
+            documents += 1
+
+        for tenant_id in (set(self._tenants) | set(seen)) if full else set(seen):
+            ranking = self._tenants.setdefault(tenant_id, _TenantRanking())
+            scanned = seen.get(tenant_id, {})
+
+            def apply(ranking=ranking, scanned=scanned):
+                for student_id, entry in scanned.items():
+                    current = ranking.students.get(student_id)
+                    if current is None:
+                        ranking.set(student_id, entry[0], entry[1], 0.0)
+                    elif current[2] <= started and entry[:2] != current[:2]:
+                        ranking.set(student_id, entry[0], entry[1], current[2])
+                if full:
+                    for student_id, current in list(ranking.students.items()):
+                        # gone from Mongo, unless updated here after the scan began
+                        if student_id not in scanned and current[2] <= started:
+                            ranking.discard(student_id)
+
+            self._mutate(tenant_id, ranking, apply)
+            if not ranking.students:
+                del self._tenants[tenant_id]
+
+        self._synced_at = synced_at
+        self.last_resync_seconds = time.monotonic() - started
+        self.last_resync_documents = documents
+
+    async def _run(self):
+        last_full = time.monotonic()
+        while True:
+            await asyncio.sleep(self.resync_seconds)
+            full = 0 < self.full_resync_seconds <= time.monotonic() - last_full
+            try:
+                await self.resync(full)
+            except Exception as e:
+                logger.warning("Leaderboard resync failed: %s", e)
+            else:
+                if full:
+                    last_full = time.monotonic()
+
+    async def start(self):
+        try:
+            await self.warm()
+        except Exception as e:
+            # Don't refuse to boot; tenants are then loaded on first use
+            logger.warning("Leaderboard warm-up skipped: %s", e)
+        if self.resync_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # -------------------- queries --------------------
+    async def top(self, tenant_id: str, k: int) -> list[dict]:
+        return (await self._tenant(tenant_id)).rows(0, k)
+
+    async def size(self, tenant_id: str) -> int:
+        return len((await self._tenant(tenant_id)).students)
+
+    async def rank_of(self, tenant_id: str, student_id: str) -> dict | None:
+        ranking = await self._tenant(tenant_id)
+        entry = ranking.students.get(student_id)
+        if entry is None:
+            return None
+        key = (-entry[0], student_id)
+        return {**ranking.row(ranking.order.rank(key) + 1, key), "outOf": len(ranking.students)}
+
+    async def around(self, tenant_id: str, student_id: str, radius: int) -> list[dict] | None:
+        """The student's row plus up to `radius` rows above and below."""
+        ranking = await self._tenant(tenant_id)
+        entry = ranking.students.get(student_id)
+        if entry is None:
+            return None
+        index = ranking.order.rank((-entry[0], student_id))
+        return ranking.rows(max(0, index - radius), index + radius + 1)
+
+    def global_top(self, k: int | None = None) -> list[dict]:
+        """Across all tenants: a k-way merge of the per-tenant orders."""
+        def entries(ranking):
+            for key in ranking.order:
+                yield key, ranking
+
+        merged = heapq.merge(*(entries(r) for r in self._tenants.values()), key=lambda item: item[0])
+
+        rows = []
+        for rank, (key, ranking) in enumerate(merged, start=1):
+            if k is not None and rank > k:
+                break
+            rows.append(ranking.row(rank, key))
+        return rows
+
+    def stats(self) -> dict:
+        tenants = sorted(self._tenants.items(), key=lambda item: -len(item[1].students))
+        memory = {tenant_id: ranking.order.memory_bytes() for tenant_id, ranking in tenants}
+        return {
+            "warmed": self.warmed,
+            "tenants": len(tenants),
+            "students": self.student_count(),
+            "approxBytes": sum(memory.values()),
+            "lastResyncSeconds": round(self.last_resync_seconds, 3),
+            "lastResyncDocuments": self.last_resync_documents,
+            "largest": [
+                {"tenantId": tenant_id, "students": len(ranking.students), "approxBytes": memory[tenant_id]}
+                for tenant_id, ranking in tenants[:10]
+            ],
+        }
+
+
+rankings = LeaderboardRankings(LEADERBOARD_RESYNC_SECONDS, LEADERBOARD_FULL_RESYNC_SECONDS)
+
+register_gauge(
+    "leaderboard_tenants",
+    "Tenant leaderboards held in memory",
+    rankings.tenant_count,
+)
+register_gauge(
+    "leaderboard_students",
+    "Students ranked in the in-memory leaderboards",
+    rankings.student_count,
+)
+register_gauge(
+    "leaderboard_last_resync_seconds",
+    "Duration of the most recent leaderboard resync",
+    lambda: rankings.last_resync_seconds,
+)
@@ -0,0 +1,130 @@
+"""
+Token-bucket rate limiting.
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per second;
+each request takes one token. Backends only decide whether a key may proceed:
+
+- LocalRateLimitBackend keeps buckets in this worker's memory. Limits are
+  per process, so the effective limit is multiplied by the worker count.
+- MongoRateLimitBackend keeps buckets in the `rateLimits` collection and
+  updates them atomically with the server's clock, so every worker shares one
+  bucket per key. It costs one write per request; if Mongo is unreachable it
+  falls back to the local buckets rather than rejecting traffic.
+
+get_backend() picks one from RATE_LIMIT_BACKEND; any object with the same
+`take` coroutine can be plugged in through set_backend().
+"""
+import logging
+import time
+from collections import OrderedDict
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.core.settings import RATE_LIMIT_BACKEND
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend:
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token for `key`: 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill on the monotonic clock); LRU-bounded
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - last) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return wait
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+
+    def __init__(self, fallback: RateLimitBackend):
+        self.fallback = fallback
+
+    @staticmethod
+    def _update(rate: float, burst: int) -> list:
+        # Refill from elapsed server time, then take a token if one is available.
+        # Idle buckets expire (TTL index on expiresAt) once they would be full again.
+        idle_ms = int((burst / rate + 60) * 1000)
+        elapsed_seconds = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$ts", "$$NOW"]}]}, 1000]}
+        return [
+            {
+                "$set": {
+                    "tokens": {
+                        "$min": [
+                            burst,
+                            {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed_seconds, rate]}]},
+                        ]
+                    },
+                    "ts": "$$NOW",
+                }
+            },
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {
+                "$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expiresAt": {"$add": ["$$NOW", idle_ms]},
+                }
+            },
+        ]
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            try:
+                bucket = await self._take(key, rate, burst)
+            except DuplicateKeyError:
+                # Two workers created the same bucket at once; the retry updates it
+                bucket = await self._take(key, rate, burst)
+        except PyMongoError as e:
+            logger.warning("Shared rate limit unavailable, using local buckets: %s", e)
+            return await self.fallback.take(key, rate, burst)
+
+        if bucket["allowed"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+    async def _take(self, key: str, rate: float, burst: int) -> dict:
+        return await db.rateLimits.find_one_and_update(
+            {"_id": key},
+            self._update(rate, burst),
+            projection={"tokens": 1, "allowed": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+_local = LocalRateLimitBackend()
+_backend: RateLimitBackend = MongoRateLimitBackend(_local) if RATE_LIMIT_BACKEND == "mongo" else _local
+
+
+def get_backend() -> RateLimitBackend:
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend):
+    global _backend
+    _backend = backend
@@ -0,0 +1,72 @@
+"""
+In-process scheduler for periodic maintenance, driven by the application
+lifespan.
+
+Each entry has a next_run(now) function returning the next UTC datetime it
+is due. The scheduler only decides *when*; anything heavy should enqueue a
+job (app/services/jobs.py) so it is persisted, survives restarts and runs
+once even when several workers all schedule it.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Sleep in slices so a suspended host or a clock change delays a run by at most this much
+MAX_SLEEP_SECONDS = 300
+
+
+class _Entry:
+
+    def __init__(self, name: str, next_run: Callable[[datetime], datetime], action: Callable[[], Awaitable], run_at_start: bool):
+        self.name = name
+        self.next_run = next_run
+        self.action = action
+        self.run_at_start = run_at_start
+
+
+class Scheduler:
+
+    def __init__(self):
+        self._entries: list[_Entry] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def add(
+        self,
+        name: str,
+        next_run: Callable[[datetime], datetime],
+        action: Callable[[], Awaitable],
+        run_at_start: bool = False,
+    ):
+        """run_at_start: also run once on startup, to catch up on a run missed while down."""
+        self._entries.append(_Entry(name, next_run, action, run_at_start))
+
+    async def _run_action(self, entry: _Entry):
+        try:
+            await entry.action()
+        except Exception:
+            logger.exception("Scheduled task %s failed", entry.name)
+
+    async def _loop(self, entry: _Entry):
+        if entry.run_at_start:
+            await self._run_action(entry)
+
+        while True:
+            due = entry.next_run(datetime.utcnow())
+            while (remaining := (due - datetime.utcnow()).total_seconds()) > 0:
+                await asyncio.sleep(min(remaining, MAX_SLEEP_SECONDS))
+            await self._run_action(entry)
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._loop(entry), name=f"schedule-{entry.name}") for entry in self._entries]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+scheduler = Scheduler()
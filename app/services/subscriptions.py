@@ -0,0 +1,142 @@
+"""
+Per-tenant subscription cache and expiry sweeper.
+
+Subscription plan and status are checked on hot paths (every quota check,
+see app/services/quotas.py), so each worker keeps a read-through cache keyed
+by tenant id. Writers in app/crud/subscription.py call invalidate(); as in
+the course cache, a load that started before an invalidate is not stored.
+A tenant without a subscription is cached too.
+
+Expiry does not depend on the cache: is_active() also compares expiry_date,
+so a cached subscription stops counting as active the moment it lapses. The
+sweeper only makes the stored status match, flipping overdue subscriptions
+to "expired" in batches: every SUBSCRIPTION_SWEEP_SECONDS the scheduler
+enqueues a "subscriptions.expire" job, unless one is already pending or
+finished within the last interval (several workers all schedule it).
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+
+from app.core.settings import (
+    SUBSCRIPTION_CACHE_SIZE,
+    SUBSCRIPTION_CACHE_TTL_SECONDS,
+    SUBSCRIPTION_SWEEP_SECONDS,
+)
+from app.crud import jobs as crud_jobs
+from app.db.database import db
+from app.services.jobs import JobContext, job_runner
+from app.services.scheduler import scheduler
+from app.utils.cache import TTLCache
+
+ACTIVE = "active"
+EXPIRED = "expired"
+
+SWEEP_BATCH_SIZE = 500
+
+JOB_TYPE = "subscriptions.expire"
+
+_NONE = {}  # cached "no subscription"
+
+
+def is_active(subscription: Optional[dict], now: Optional[datetime] = None) -> bool:
+    if not subscription or subscription.get("status") != ACTIVE:
+        return False
+    expiry = subscription.get("expiry_date")
+    return expiry is None or expiry > (now or datetime.utcnow())
+
+
+class SubscriptionService:
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self._entries = TTLCache(maxsize, ttl)
+        self._versions: dict[ObjectId, int] = {}
+        self.expired_total = 0
+
+    async def get(self, tenant_id) -> Optional[dict]:
+        """The tenant's subscription document (a shallow copy), or None."""
+        tenant_id = ObjectId(tenant_id)
+        subscription = self._entries.get(tenant_id)
+        if subscription is None:
+            version = self._versions.get(tenant_id, 0)
+            subscription = await db.subscriptions.find_one({"tenantId": tenant_id}) or _NONE
+
+            # Skip the store if a writer invalidated this tenant while we were reading
+            if self._versions.get(tenant_id, 0) == version:
+                self._entries.set(tenant_id, subscription)
+
+        return dict(subscription) if subscription else None
+
+    def invalidate(self, tenant_id):
+        tenant_id = ObjectId(tenant_id)
+        self._entries.pop(tenant_id)
+        self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+
+        # Versions only need to outlive in-flight loads
+        if len(self._versions) > self.maxsize * 4:
+            self._entries.clear()
+            self._versions = {}
+
+    async def expire_overdue(self) -> int:
+        """Flip active subscriptions past their expiry_date to expired, in batches."""
+        expired = 0
+        while True:
+            now = datetime.utcnow()
+            overdue = {"status": ACTIVE, "expiry_date": {"$lte": now}}
+            batch = await db.subscriptions.find(overdue, {"tenantId": 1}).limit(SWEEP_BATCH_SIZE).to_list(
+                length=SWEEP_BATCH_SIZE
+            )
+            if not batch:
+                break
+
+            result = await db.subscriptions.update_many(
+                {"_id": {"$in": [doc["_id"] for doc in batch]}, **overdue},
+                {"$set": {"status": EXPIRED, "expiredAt": now}},
+            )
+            for doc in batch:
+                self.invalidate(doc["tenantId"])
+            expired += result.modified_count
+
+            if len(batch) < SWEEP_BATCH_SIZE:
+                break
+
+        self.expired_total += expired
+        return expired
+
+    def stats(self) -> dict:
+        return {"entries": self._entries.stats(), "expiredBySweeper": self.expired_total}
+
+
+subscription_service = SubscriptionService(SUBSCRIPTION_CACHE_SIZE, SUBSCRIPTION_CACHE_TTL_SECONDS)
+
+
+async def expire_overdue(job: dict, ctx: JobContext):
+    await ctx.progress(expired=await subscription_service.expire_overdue())
+
+
+async def enqueue_expire_overdue():
+    recent = datetime.utcnow() - timedelta(seconds=SUBSCRIPTION_SWEEP_SECONDS / 2)
+    pending = await db.jobs.find_one(
+        {
+            "type": JOB_TYPE,
+            "$or": [
+                {"status": {"$in": [crud_jobs.QUEUED, crud_jobs.RUNNING]}},
+                {"finishedAt": {"$gte": recent}},
+            ],
+        },
+        {"_id": 1},
+    )
+    if pending is None:
+        await job_runner.enqueue(JOB_TYPE, {})
+
+
+job_runner.register(JOB_TYPE, expire_overdue)
+if SUBSCRIPTION_SWEEP_SECONDS > 0:
+    scheduler.add(
+        "subscription-expiry",
+        lambda now: now + timedelta(seconds=SUBSCRIPTION_SWEEP_SECONDS),
+        enqueue_expire_overdue,
+        run_at_start=True,
+    )
@@ -0,0 +1,60 @@
+"""
+Periodic reconciliation of the admin dashboard counters (app/crud/tenant_stats.py).
+
+Every TENANT_STATS_RECONCILE_SECONDS the scheduler enqueues a
+"tenant_stats.reconcile" job, unless one is already pending or finished
+within the last interval (several workers all schedule it). The job
+recounts every tenant with one grouped aggregation per source collection.
+"""
+from datetime import datetime, timedelta
+
+from app.core.settings import TENANT_STATS_RECONCILE_SECONDS
+from app.crud import jobs as crud_jobs
+from app.crud import tenant_stats as crud_tenant_stats
+from app.db.database import db
+from app.services.jobs import JobContext, job_runner
+from app.services.scheduler import scheduler
+
+
+JOB_TYPE = "tenant_stats.reconcile"
+
+
+async def reconcile_all(job: dict, ctx: JobContext):
+    await ctx.progress(tenantsReconciled=await crud_tenant_stats.reconcile())
+
+
+async def enqueue_reconcile():
+    recent = datetime.utcnow() - timedelta(seconds=TENANT_STATS_RECONCILE_SECONDS / 2)
+    pending = await db.jobs.find_one(
+        {
+            "type": JOB_TYPE,
+            "$or": [
+                {"status": {"$in": [crud_jobs.QUEUED, crud_jobs.RUNNING]}},
+                {"finishedAt": {"$gte": recent}},
+            ],
+        },
+        {"_id": 1},
+    )
+    if pending is None:
+        await job_runner.enqueue(JOB_TYPE, {})
+
+
+async def tenant_dashboard(tenant_id: str) -> dict:
+    stats = await crud_tenant_stats.get_stats(tenant_id)
+    scored = stats.get("quizScoreCount", 0)
+    return {
+        "tenantId": tenant_id,
+        **{field: stats.get(field, 0) for field in ("students", "teachers", "courses", "activeEnrollments", "pendingSubmissions")},
+        "averageQuizScore": round(stats.get("quizScoreSum", 0) / scored, 2) if scored else None,
+        "updatedAt": stats.get("updatedAt"),
+        "reconciledAt": stats.get("reconciledAt"),
+    }
+
+
+job_runner.register(JOB_TYPE, reconcile_all)
+if TENANT_STATS_RECONCILE_SECONDS > 0:
+    scheduler.add(
+        "tenant-stats-reconcile",
+        lambda now: now + timedelta(seconds=TENANT_STATS_RECONCILE_SECONDS),
+        enqueue_reconcile,
+    )
@@ -0,0 +1,116 @@
+"""
+Weekly leaderboard rollover.
+
+pointsThisWeek is incremented by every points award. Once a week (at
+WEEKLY_ROLLOVER_WEEKDAY / WEEKLY_ROLLOVER_HOUR_UTC) the scheduler enqueues a
+"leaderboard.weekly_rollover" job, which per tenant:
+
+1. moves each student's pointsThisWeek into lastWeekPoints and zeroes it,
+   with a single pipeline update_many (each document is updated atomically,
+   so points awarded during the rollover count for the new week). Only a
+   counter that started with the archived week (pointsWeekStart) becomes
+   lastWeekPoints; older ones (documents from before weekly counting, missed
+   rollovers) span more than a week and are just reset;
+2. archives the ranking of lastWeekPoints (top WEEKLY_LEADERBOARD_KEEP) in
+   `weeklyLeaderboards`, one document per tenant and week.
+
+Both steps are idempotent: documents already rolled over for this week
+carry pointsWeekStart and are skipped, and the archive is an upsert. A
+re-run after a crash, or the same job enqueued by several workers, is
+harmless.
+"""
+from datetime import datetime, timedelta
+
+from pymongo import DESCENDING
+
+from app.core.settings import WEEKLY_LEADERBOARD_KEEP, WEEKLY_ROLLOVER_HOUR_UTC, WEEKLY_ROLLOVER_WEEKDAY
+from app.crud import jobs as crud_jobs
+from app.db.database import db, student_performance_collection, weekly_leaderboards_collection
+from app.services.jobs import JobContext, job_runner
+from app.services.scheduler import scheduler
+
+
+JOB_TYPE = "leaderboard.weekly_rollover"
+
+
+def week_boundary(now: datetime) -> datetime:
+    """Start of the leaderboard week containing `now` (UTC)."""
+    boundary = (now - timedelta(days=(now.weekday() - WEEKLY_ROLLOVER_WEEKDAY) % 7)).replace(
+        hour=WEEKLY_ROLLOVER_HOUR_UTC, minute=0, second=0, microsecond=0
+    )
+    if boundary > now:
+        boundary -= timedelta(days=7)
+    return boundary
+
+
+def next_rollover(now: datetime) -> datetime:
+    return week_boundary(now) + timedelta(days=7)
+
+
+async def rollover_tenant(tenant_id, week_start: str, archived_week: str) -> int:
+    counted_last_week = {"$eq": ["$pointsWeekStart", {"$literal": archived_week}]}
+    result = await student_performance_collection.update_many(
+        {"tenantId": tenant_id, "pointsWeekStart": {"$ne": week_start}},
+        [
+            {
+                "$set": {
+                    "lastWeekPoints": {
+                        "$cond": [counted_last_week, {"$ifNull": ["$pointsThisWeek", 0]}, "$lastWeekPoints"]
+                    },
+                    "lastWeekStart": {"$cond": [counted_last_week, {"$literal": archived_week}, "$lastWeekStart"]},
+                    "pointsThisWeek": 0,
+                    "pointsWeekStart": week_start,
+                }
+            }
+        ],
+    )
+
+    match = {"tenantId": tenant_id, "lastWeekStart": archived_week, "lastWeekPoints": {"$gt": 0}}
+    cursor = student_performance_collection.find(
+        match, {"_id": 0, "studentId": 1, "studentName": 1, "lastWeekPoints": 1}
+    ).sort([("lastWeekPoints", DESCENDING), ("studentId", 1)]).limit(WEEKLY_LEADERBOARD_KEEP)
+
+    entries = [
+        {"rank": rank, "studentId": doc["studentId"], "studentName": doc.get("studentName"), "points": doc["lastWeekPoints"]}
+        for rank, doc in enumerate(await cursor.to_list(length=WEEKLY_LEADERBOARD_KEEP), start=1)
+    ]
+
+    await weekly_leaderboards_collection.update_one(
+        {"tenantId": tenant_id, "weekStart": archived_week},
+        {
+            "$set": {
+                "weekEnd": week_start,
+                "entries": entries,
+                "participants": await student_performance_collection.count_documents(match),
+                "createdAt": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
+    return result.modified_count
+
+
+async def weekly_rollover(job: dict, ctx: JobContext):
+    week_start = job["params"]["weekStart"]
+    archived_week = (datetime.fromisoformat(week_start) - timedelta(days=7)).date().isoformat()
+
+    for tenant_id in await student_performance_collection.distinct("tenantId"):
+        reset = await rollover_tenant(tenant_id, week_start, archived_week)
+        await ctx.progress(tenantsArchived=1, studentsReset=reset)
+
+
+async def enqueue_weekly_rollover():
+    """Enqueue this week's rollover unless it is already queued, running or done."""
+    week_start = week_boundary(datetime.utcnow()).date().isoformat()
+
+    existing = await db.jobs.find_one(
+        {"type": JOB_TYPE, "params.weekStart": week_start, "status": {"$ne": crud_jobs.FAILED}},
+        {"_id": 1},
+    )
+    if existing is None:
+        await job_runner.enqueue(JOB_TYPE, {"weekStart": week_start})
+
+
+job_runner.register(JOB_TYPE, weekly_rollover)
+# also at startup, in case the process was down at the boundary
+scheduler.add("weekly-rollover", next_rollover, enqueue_weekly_rollover, run_at_start=True)
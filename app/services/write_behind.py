@@ -0,0 +1,138 @@
+"""
+Write-behind buffer for "last seen" style timestamps.
+
+Fields such as users.lastLogin are written on every login, but only the
+latest value matters. Instead of one
+update per call, writers hand the $set to this buffer: updates to the same
+document (same collection + filter) are merged in memory, and the buffer is
+flushed as one unordered bulk_write per collection every
+WRITE_BEHIND_FLUSH_SECONDS, or as soon as WRITE_BEHIND_MAX_ENTRIES documents
+are pending.
+
+Buffered values are lost if the process dies before a flush; only use it for
+data where that is acceptable. The application lifespan flushes on shutdown.
+"""
+import asyncio
+import logging
+import time
+
+from pymongo import UpdateOne
+
+from app.core.settings import WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_MAX_ENTRIES
+from app.db.database import db
+from app.utils.metrics import register_gauge
+from app.utils.tasks import spawn
+
+logger = logging.getLogger(__name__)
+
+
+def _key(collection: str, filter: dict) -> tuple:
+    return collection, tuple(sorted(filter.items()))
+
+
+class WriteBehindBuffer:
+
+    def __init__(self, flush_seconds: float, max_entries: int):
+        self.flush_seconds = flush_seconds
+        self.max_entries = max_entries
+        # (collection, filter items) -> (filter, merged $set fields)
+        self._pending: dict[tuple, tuple[dict, dict]] = {}
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self.last_flush_seconds = 0.0
+        self.last_flush_size = 0
+        self.flush_errors = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def set(self, collection: str, filter: dict, fields: dict):
+        """Queue `{"$set": fields}` for the document matching `filter`; later values win."""
+        key = _key(collection, filter)
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = (filter, dict(fields))
+        else:
+            entry[1].update(fields)
+
+        # Fires once per crossing; after a failed flush the periodic loop retries
+        if len(self._pending) == self.max_entries and self._task is not None:
+            spawn(self.flush(), name="write-behind-flush")
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            by_collection: dict[str, list] = {}
+            for (collection, _), (filter, fields) in pending.items():
+                by_collection.setdefault(collection, []).append(
+                    UpdateOne(filter, {"$set": fields})
+                )
+
+            started = time.perf_counter()
+            try:
+                for collection, ops in by_collection.items():
+                    await db[collection].bulk_write(ops, ordered=False)
+            except Exception as e:
+                self.flush_errors += 1
+                logger.warning("Write-behind flush failed, retrying later: %s", e)
+                self._requeue(pending)
+            finally:
+                self.last_flush_seconds = time.perf_counter() - started
+                self.last_flush_size = len(pending)
+
+    def _requeue(self, pending: dict):
+        # Values queued since the failed flush are newer; keep them on top
+        for key, (filter, fields) in pending.items():
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = (filter, fields)
+            else:
+                self._pending[key] = (filter, {**fields, **entry[1]})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Write-behind flush loop error")
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+write_behind = WriteBehindBuffer(WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_MAX_ENTRIES)
+
+register_gauge(
+    "write_behind_pending",
+    "Documents with buffered timestamp updates not yet flushed",
+    lambda: len(write_behind),
+)
+register_gauge(
+    "write_behind_last_flush_seconds",
+    "Duration of the most recent write-behind flush",
+    lambda: write_behind.last_flush_seconds,
+)
+register_gauge(
+    "write_behind_last_flush_size",
+    "Documents written by the most recent write-behind flush",
+    lambda: write_behind.last_flush_size,
+)
+register_gauge(
+    "write_behind_flush_errors",
+    "Write-behind flushes that failed and were re-queued",
+    lambda: write_behind.flush_errors,
+)
@@ -0,0 +1,136 @@
+"""
+Process-local metrics registry.
+
+Subsystems register gauges: callables sampled whenever metrics are read, so
+recording costs nothing on the hot path. Request-level measurements use
+Counter / Histogram, which keep one series per label combination and may be
+updated from any thread (pymongo calls command listeners from Motor's
+executor threads).
+
+render_prometheus() returns everything in the Prometheus text format.
+"""
+import bisect
+import threading
+from typing import Callable, Iterable
+
+
+_gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+_metrics: dict[str, "_LabelledMetric"] = {}
+
+
+def register_gauge(name: str, help_text: str, fn: Callable[[], float]):
+    _gauges[name] = (help_text, fn)
+
+
+def read_gauges() -> dict:
+    return {name: fn() for name, (_, fn) in _gauges.items()}
+
+
+class _LabelledMetric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _metrics[name] = self
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_LabelledMetric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in series]
+
+
+class UpDownGauge(Counter):
+    """
+    Labelled gauge moved up and down by the code (e.g. in-flight requests).
+    A series that returns to zero is dropped, so short-lived label values
+    don't accumulate.
+    """
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            value = self._series.get(key, 0) - amount
+            if value:
+                self._series[key] = value
+            else:
+                self._series.pop(key, None)
+
+
+class Histogram(_LabelledMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float], labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = self._label_text(key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    lines = []
+    for name, (help_text, fn) in _gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {fn()}")
+
+    for metric in list(_metrics.values()):
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+
+    return "\n".join(lines) + "\n"
@@ -13,3 +13,64 @@ def fix_object_ids(data):
         return {k: fix_object_ids(v) for k, v in data.items()}
 
     return data
+
+
+def to_object_id(value):
+    """Return value as an ObjectId, or None if it is not a valid id."""
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+def object_id_refs(values) -> list:
+    """
+    Normalize a list of id references to ObjectIds.
+
+    Dual-read helper for reference arrays that may still hold legacy string ids
+    (see app/db/migrations/normalize_enrollment_refs.py). Invalid entries are
+    dropped and duplicates (string + ObjectId form of the same id) collapse.
+    """
+    refs = (to_object_id(v) for v in values or [])
+    return list(dict.fromkeys(r for r in refs if r is not None))
+
+
+def ref_variants(oid: ObjectId) -> list:
+    """Both stored forms of a reference, for filters/$pull during the migration window."""
+    return [oid, str(oid)]
+
+
+# Outcomes of find_in_tenant()
+FOUND = "found"
+NOT_FOUND = "not_found"
+OTHER_TENANT = "other_tenant"
+
+
+async def find_in_tenant(collection, _id: ObjectId, tenant_id: ObjectId, projection: dict = None):
+    """
+    Fetch a document by _id and classify it against the caller's tenant.
+
+    Replaces the "tenant-scoped find_one, then unscoped find_one to choose the
+    error message" pattern: every outcome costs one round trip. `projection`
+    must be an inclusion projection; tenantId is always added to it.
+
+    Returns (document, status); document is None unless status is FOUND.
+    """
+    if projection is not None:
+        projection = {**projection, "tenantId": 1}
+
+    doc = await collection.find_one({"_id": _id}, projection)
+
+    if doc is None:
+        return None, NOT_FOUND
+    if str(doc.get("tenantId")) != str(tenant_id):
+        return None, OTHER_TENANT
+    return doc, FOUND
+
+
+def lookup_error(label: str, _id, status: str) -> str:
+    """Error message for a failed find_in_tenant(), e.g. lookup_error("Course", cid, status)."""
+    if status == OTHER_TENANT:
+        return f"{label} found but belongs to different tenant"
+    return f"{label} not found with ID: {_id}"
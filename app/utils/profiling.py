@@ -0,0 +1,115 @@
+"""
+Sampling profiler for a single request.
+
+A background thread wakes every `interval` seconds and looks at the event
+loop thread:
+
+- if it is running Python code, that stack is recorded (on-CPU time);
+- if the loop is idle in its selector, the profiled request is waiting on
+  I/O, so the request task's await chain is recorded under an "[await]" root
+  (e.g. time spent waiting for a Mongo cursor).
+
+Other requests served concurrently can show up in on-CPU samples; profile
+on a quiet worker for a clean picture. Output is the collapsed-stack format
+("root;caller;callee count" per line) read by flamegraph.pl and speedscope.
+"""
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+_IDLE_FUNCTIONS = {"select", "poll", "epoll", "_run_once"}
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(task: asyncio.Task) -> list[str]:
+    stack = ["[await]"]
+    awaitable = task.get_coro()
+    # Read from another thread while the loop may be mutating it; the GIL keeps
+    # each attribute read consistent and a torn chain only costs one sample.
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_label(frame.f_code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack
+
+
+class RequestProfiler(threading.Thread):
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.task = task
+        self.interval = interval
+        self.target_thread = threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                continue  # a racy read, skip this sample
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.target_thread)
+        if frame is None:
+            return
+        if frame.f_code.co_name in _IDLE_FUNCTIONS:
+            stack = _await_stack(self.task)
+        else:
+            stack = _thread_stack(frame)
+        self.samples[";".join(stack)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Last few profiles, kept in memory for GET /system/profiles."""
+
+    def __init__(self, keep: int):
+        self._profiles: deque = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    def add(self, method: str, path: str, seconds: float, profiler: RequestProfiler) -> str:
+        profile_id = f"{os.getpid()}-{next(self._ids)}"
+        self._profiles.append({
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "durationMs": round(seconds * 1000, 3),
+            "samples": sum(profiler.samples.values()),
+            "intervalMs": profiler.interval * 1000,
+            "createdAt": time.time(),
+            "collapsed": profiler.collapsed(),
+        })
+        return profile_id
+
+    def list(self) -> list[dict]:
+        return [{k: v for k, v in p.items() if k != "collapsed"} for p in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> dict | None:
+        return next((p for p in self._profiles if p["id"] == profile_id), None)
@@ -0,0 +1,176 @@
+"""
+Indexable skip list: a sorted set of comparable keys with O(log n) insert,
+remove, rank-of-key and key-at-rank.
+
+Each forward link also stores its width (how many elements it skips), so a
+search can count positions on the way down, the same trick as an
+order-statistics tree without the rebalancing. Used for leaderboards keyed
+by (-points, studentId); see app/services/rankings.py.
+"""
+import math
+import random
+import sys
+
+MAX_LEVELS = 24  # plenty for 2**24 (16M) keys per set
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: list = [None] * levels
+        self.width: list[int] = [1] * levels
+
+
+class RankedSet:
+
+    def __init__(self, keys=()):
+        self._head = _Node(None, MAX_LEVELS)
+        self._size = 0
+        self._build(sorted(keys))
+
+    def _build(self, ordered: list):
+        """Link already-sorted unique keys in O(n), appending at the tail."""
+        tails = [self._head] * MAX_LEVELS
+        tail_positions = [0] * MAX_LEVELS
+        for position, key in enumerate(ordered, start=1):
+            node = _Node(key, self._random_levels())
+            for level in range(len(node.next)):
+                tails[level].next[level] = node
+                tails[level].width[level] = position - tail_positions[level]
+                tails[level] = node
+                tail_positions[level] = position
+
+        self._size = len(ordered)
+        for level in range(MAX_LEVELS):
+            # the last link at each level points past the end
+            tails[level].width[level] = self._size + 1 - tail_positions[level]
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        node = self._predecessors(key)[0].next[0]
+        return node is not None and node.key == key
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    @staticmethod
+    def _random_levels() -> int:
+        # geometric distribution with p = 1/2
+        return min(MAX_LEVELS, 1 - int(math.log(1.0 - random.random(), 2.0)))
+
+    def _predecessors(self, key) -> list[_Node]:
+        """Per level, the last node whose key is < key."""
+        chain = [self._head] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        return chain
+
+    def add(self, key):
+        """Insert key (keys must be unique)."""
+        chain = [self._head] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS  # positions skipped at each level on the way down
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new = _Node(key, levels)
+        skipped = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - skipped
+            prev.width[level] = skipped + 1
+            skipped += steps[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+
+        self._size += 1
+
+    def remove(self, key):
+        """Remove key; KeyError if it is not present."""
+        chain = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        levels = len(target.next)
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+
+    def rank(self, key) -> int:
+        """0-based position of key; KeyError if it is not present."""
+        position = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key <= key:
+                position += node.width[level]
+                node = node.next[level]
+        if node is self._head or node.key != key:
+            raise KeyError(key)
+        return position - 1
+
+    def _node_at(self, index: int) -> _Node:
+        remaining = index + 1
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RankedSet index out of range")
+        return self._node_at(index).key
+
+    def iter_from(self, index: int):
+        """Keys from position `index` on, in order (O(log n) to start, O(1) per key)."""
+        if index >= self._size:
+            return
+        node = self._node_at(max(0, index))
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def slice(self, start: int, stop: int) -> list:
+        start, stop = max(0, start), min(stop, self._size)
+        result = []
+        if start >= stop:
+            return result
+        for key in self.iter_from(start):
+            result.append(key)
+            if len(result) == stop - start:
+                break
+        return result
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the nodes, their link lists and key tuples (not the tuples' elements)."""
+        total = sys.getsizeof(self._head) + sys.getsizeof(self._head.next) + sys.getsizeof(self._head.width)
+        node = self._head.next[0]
+        while node is not None:
+            total += (
+                sys.getsizeof(node) + sys.getsizeof(node.next) + sys.getsizeof(node.width)
+                + sys.getsizeof(node.key)
+            )
+            node = node.next[0]
+        return total
@@ -1,13 +1,55 @@
+import hashlib
 import jwt
+import logging
+import time
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 from dotenv import load_dotenv
 import os
 from passlib.context import CryptContext
+from passlib.hash import argon2
+
+from app.core.settings import (
+    ARGON2_MEMORY_COST_KIB,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    BCRYPT_ROUNDS,
+    JWT_CACHE_SIZE,
+    JWT_CACHE_TTL_SECONDS,
+    PASSWORD_HASH_SCHEME,
+)
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_gauge
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+
+def _build_pwd_context() -> CryptContext:
+    """
+    Hashing policy: the configured scheme hashes new passwords, every other
+    scheme stays verifiable but is marked deprecated so needs_update() flags it.
+    """
+    schemes = ["bcrypt"]
+    if PASSWORD_HASH_SCHEME == "argon2":
+        if argon2.has_backend():
+            schemes = ["argon2", "bcrypt"]
+        else:
+            logger.warning("PASSWORD_HASH_SCHEME=argon2 but argon2-cffi is not installed; using bcrypt")
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__time_cost=ARGON2_TIME_COST,
+        argon2__memory_cost=ARGON2_MEMORY_COST_KIB,
+        argon2__parallelism=ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = _build_pwd_context()
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -15,6 +57,10 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash uses a deprecated scheme or different cost parameters (cheap, no hashing)."""
+    return pwd_context.needs_update(hashed_password)
+
 SECRET_KEY = os.getenv("JWT_SECRET", "secret123")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
@@ -25,10 +71,40 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Clients send the same bearer token on every request; remember verified claims
+# by token digest so the signature check runs once per token, not per request.
+# Only successfully verified tokens are cached, and never past their exp.
+_token_cache = TTLCache(JWT_CACHE_SIZE, JWT_CACHE_TTL_SECONDS)
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 def decode_token(token: str):
+    key = token_digest(token)
+    claims = _token_cache.get(key)
+    if claims is not None:
+        return dict(claims)
+
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+    ttl = JWT_CACHE_TTL_SECONDS
+    if "exp" in claims:
+        ttl = min(ttl, claims["exp"] - time.time())
+    if JWT_CACHE_SIZE > 0 and ttl > 0:
+        _token_cache.set(key, claims, ttl)
+
+    return dict(claims)
+
+def evict_token(token: str):
+    """Drop a token's cached claims (on revocation)."""
+    _token_cache.pop(token_digest(token))
+
+
+register_gauge("jwt_cache_size", "Verified tokens held in the claims cache", lambda: len(_token_cache))
+register_gauge("jwt_cache_hits", "Token decodes served from the claims cache", lambda: _token_cache.hits)
+register_gauge("jwt_cache_misses", "Token decodes that ran signature verification", lambda: _token_cache.misses)
@@ -0,0 +1,28 @@
+# app/utils/tasks.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# asyncio only keeps weak references to tasks; hold them until they finish
+_background: set[asyncio.Task] = set()
+
+
+def _done(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
+
+
+def spawn(coro, name: str | None = None) -> asyncio.Task:
+    """Run a coroutine in the background (fire-and-forget), logging failures."""
+    task = asyncio.create_task(coro, name=name)
+    _background.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+async def drain(timeout: float = 5.0):
+    """Wait for outstanding background tasks, e.g. on shutdown."""
+    if _background:
+        await asyncio.wait(set(_background), timeout=timeout)
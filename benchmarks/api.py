@@ -0,0 +1,277 @@
+"""
+API benchmark: seeds multi-tenant data, drives the FastAPI app in-process
+through an ASGI client and reports latency percentiles and Mongo operations
+per request for each endpoint scenario.
+
+Run from the project root (needs the "bench" dependency group):
+
+    python -m benchmarks.api                                   # in-memory mongomock-motor
+    python -m benchmarks.api --mongo-uri mongodb://localhost   # real mongod, scratch database
+
+    python -m benchmarks.api --save bench.json                 # record a baseline
+    python -m benchmarks.api --compare bench.json              # exit 1 on regression
+
+mongomock implements only part of the aggregation language (no $convert or
+$lookup with a sub-pipeline, for example); scenarios that use those show up
+as errors there.
+Use a local mongod for those, and for latencies that mean anything: against
+mongomock, numbers show Python-side cost and op counts only.
+
+With --mongo-uri, the harness uses (and drops) the database named by
+--database, never the application database.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+# Limits would throttle the benchmark itself; settings are read at import time
+os.environ.setdefault("RATE_LIMIT_TENANT_RPS", "0")
+os.environ.setdefault("RATE_LIMIT_CLIENT_RPS", "0")
+os.environ.setdefault("ROUTE_CONCURRENCY_DEFAULT", "0")
+
+
+@dataclass
+class Scenario:
+    name: str
+    # (tenant ids, rng) -> path with query string
+    path: Callable
+
+
+def _pick(rng, values):
+    return str(rng.choice(values))
+
+
+SCENARIOS = [
+    Scenario("courses.list", lambda t, r: f"/courses/?tenantId={t.tenant_id}&limit=20"),
+    Scenario("courses.get", lambda t, r: f"/courses/{_pick(r, t.course_ids)}?tenantId={t.tenant_id}"),
+    Scenario("courses.student", lambda t, r: f"/courses/student/{_pick(r, t.student_ids)}?tenantId={t.tenant_id}"),
+    Scenario("courses.student_home", lambda t, r: f"/courses/student/{_pick(r, t.student_ids)}/home?tenantId={t.tenant_id}"),
+    Scenario("quizzes.list", lambda t, r: f"/quizzes/?tenant_id={t.tenant_id}&course_id={_pick(r, t.course_ids)}"),
+    Scenario("quizzes.get", lambda t, r: f"/quizzes/{_pick(r, t.quiz_ids)}"),
+    Scenario("quiz_submissions.by_quiz", lambda t, r: f"/quiz-submissions/quiz/{_pick(r, t.quiz_ids)}"),
+    Scenario("quiz_submissions.by_student", lambda t, r: f"/quiz-submissions/student/{_pick(r, t.student_ids)}"),
+    Scenario("quiz_submissions.summary", lambda t, r: f"/quiz-submissions/summary/quiz/{_pick(r, t.quiz_ids)}"),
+    Scenario("quiz_submissions.analytics", lambda t, r: f"/quiz-submissions/analytics/student/{_pick(r, t.student_ids)}"),
+    Scenario("quiz_submissions.teacher_dashboard", lambda t, r: f"/quiz-submissions/dashboard/teacher/{_pick(r, t.teacher_ids)}"),
+    Scenario("performance.student", lambda t, r: f"/studentPerformance/{t.tenant_id}/{_pick(r, t.student_ids)}"),
+    Scenario("performance.study_time", lambda t, r: f"/studentPerformance/{t.tenant_id}/{_pick(r, t.student_ids)}/study-time?from=2000-01-01&to=2100-01-01"),
+    Scenario("performance.student_rank", lambda t, r: f"/studentPerformance/{t.tenant_id}/{_pick(r, t.student_ids)}/rank"),
+    Scenario("performance.tenant_leaderboard", lambda t, r: f"/studentPerformance/{t.tenant_id}/leaderboard"),
+    Scenario("performance.tenant_top5", lambda t, r: f"/studentPerformance/{t.tenant_id}/leaderboard-top5"),
+    Scenario("performance.global_full", lambda t, r: "/studentPerformance/leaderboard/global-full"),
+]
+
+
+def _use_mongomock():
+    """Swap the Motor client for mongomock-motor before any app module binds `db`."""
+    import mongomock
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.db.database as database
+
+    client = AsyncMongoMockClient()
+    database.client = client
+    database.db = client[database.MONGO_DB]
+    for name, collection in [
+        ("student_performance_collection", "studentPerformance"),
+        ("student_performance_history_collection", "studentPerformanceHistory"),
+        ("weekly_leaderboards_collection", "weeklyLeaderboards"),
+        ("students_collection", "students"),
+        ("courses_collection", "courses"),
+        ("assignments_collection", "assignments"),
+        ("assignment_submissions_collection", "assignmentSubmissions"),
+        ("quizzes_collection", "quizzes"),
+        ("quiz_submissions_collection", "quizSubmissions"),
+    ]:
+        setattr(database, name, database.db[collection])
+
+    _count_mongomock_operations(mongomock.collection.Collection)
+
+
+def _count_mongomock_operations(collection_cls):
+    # mongomock never fires pymongo command events; record each top-level
+    # collection call the way CommandMetricsListener records a command.
+    from app.db import monitoring
+
+    nested = contextvars.ContextVar("mongomock_nested", default=False)
+    methods = [
+        "find", "find_one", "aggregate", "count_documents", "distinct", "insert_one", "insert_many",
+        "update_one", "update_many", "replace_one", "delete_one", "delete_many", "bulk_write",
+        "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    ]
+
+    def wrap(name, method):
+        def counted(self, *args, **kwargs):
+            if nested.get():
+                return method(self, *args, **kwargs)
+            token = nested.set(True)
+            try:
+                commands = monitoring._request_commands.get()
+                if commands is not None:
+                    commands.append(name)
+                monitoring.query_stats.record(self.name, name, None, 0.0, False)
+                return method(self, *args, **kwargs)
+            finally:
+                nested.reset(token)
+        return counted
+
+    for name in methods:
+        setattr(collection_cls, name, wrap(name, getattr(collection_cls, name)))
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _total_operations() -> int:
+    from app.db.monitoring import query_stats
+    return sum(c["count"] for c in query_stats.snapshot(limit=1)["commands"])
+
+
+async def run_scenario(client, scenario: Scenario, tenants, requests: int, concurrency: int, rng) -> dict:
+    latencies, errors = [], 0
+    statuses: dict = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        path = scenario.path(rng.choice(tenants), rng)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code >= 400:
+            errors += 1
+
+    # warm-up (caches, first-call imports) is not measured
+    await client.get(scenario.path(tenants[0], rng))
+
+    operations_before = _total_operations()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    operations = _total_operations() - operations_before
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "p50Ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95Ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99Ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "opsPerRequest": round(operations / requests, 2),
+    }
+
+
+def print_report(results: dict):
+    header = f"{'scenario':<36} {'req':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/req':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<36} {r['requests']:>5} {r['errors']:>4} {r['p50Ms']:>9.2f} "
+            f"{r['p95Ms']:>9.2f} {r['p99Ms']:>9.2f} {r['opsPerRequest']:>8.2f}"
+        )
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Scenarios whose p95 grew by more than max_regression, or that issue more Mongo ops."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if r["opsPerRequest"] > base["opsPerRequest"]:
+            regressions.append(f"{name}: ops/request {base['opsPerRequest']} -> {r['opsPerRequest']}")
+        if base["p95Ms"] and r["p95Ms"] > base["p95Ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {base['p95Ms']} ms -> {r['p95Ms']} ms")
+        if r["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {r['errors']}")
+    return regressions
+
+
+async def main(args) -> int:
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        os.environ["MONGO_DB"] = args.database
+    else:
+        _use_mongomock()
+
+    import httpx
+
+    from app.db.database import client as mongo_client, db
+    from app.main import app, lifespan
+    from app.utils.security import hash_password
+    from benchmarks.seed import SeedConfig, seed
+
+    if args.mongo_uri:
+        await mongo_client.drop_database(args.database)
+
+    config = SeedConfig(
+        tenants=args.tenants,
+        students_per_tenant=args.students,
+        courses_per_tenant=args.courses,
+        seed=args.seed,
+    )
+    started = time.perf_counter()
+    tenants = await seed(db, config, hash_password("bench-password"))
+    print(f"seeded {config.tenants} tenants in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    selected = [s for s in SCENARIOS if not args.only or any(s.name.startswith(p) for p in args.only)]
+    rng = random.Random(args.seed)
+    results = {}
+
+    try:
+        async with lifespan(app):
+            # unhandled errors (e.g. operators mongomock lacks) count as 500s, not crashes
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for scenario in selected:
+                    results[scenario.name] = await run_scenario(
+                        client, scenario, tenants, args.requests, args.concurrency, rng
+                    )
+    finally:
+        if args.mongo_uri:
+            await mongo_client.drop_database(args.database)
+
+    print_report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri", help="run against a real mongod instead of mongomock-motor")
+    parser.add_argument("--database", default="eduverse_bench", help="scratch database (dropped) with --mongo-uri")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--students", type=int, default=200, help="students per tenant")
+    parser.add_argument("--courses", type=int, default=20, help="courses per tenant")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="scenario name prefixes, e.g. courses quiz_submissions.summary")
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from --save; exit 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 growth (0.25 = 25%%)")
+
+    sys.exit(asyncio.run(main(parser.parse_args())))
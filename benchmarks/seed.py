@@ -0,0 +1,233 @@
+"""
+Deterministic multi-tenant fixture data for benchmarks.
+
+seed() fills an (empty) database with tenants, users with their role
+profiles, courses with modules, quizzes, graded quiz submissions,
+studentPerformance counters with their history and study-time buckets,
+shaped like the documents the CRUD layer writes. It returns the generated
+ids so benchmark scenarios can pick real tenants/courses/students.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+
+CATEGORIES = ["Mathematics", "Science", "Programming", "History", "Languages", "Design"]
+
+
+@dataclass
+class SeedConfig:
+    tenants: int = 3
+    teachers_per_tenant: int = 5
+    students_per_tenant: int = 200
+    courses_per_tenant: int = 20
+    modules_per_course: int = 8
+    quizzes_per_course: int = 3
+    questions_per_quiz: int = 10
+    enrollments_per_student: int = 4
+    submission_rate: float = 0.7  # share of enrolled students who submitted each quiz
+    seed: int = 42
+
+
+@dataclass
+class TenantIds:
+    tenant_id: ObjectId
+    teacher_ids: list = field(default_factory=list)
+    student_ids: list = field(default_factory=list)
+    course_ids: list = field(default_factory=list)
+    quiz_ids: list = field(default_factory=list)
+
+
+def _user(rng: random.Random, role: str, n: int, tenant_no: int, password_hash: str, now: datetime) -> dict:
+    return {
+        "_id": ObjectId(),
+        "fullName": f"{role.title()} {tenant_no}-{n}",
+        "email": f"{role}{n}@tenant{tenant_no}.example.com",
+        "password": password_hash,
+        "role": role,
+        "status": "studying" if role == "student" else "active",
+        "profileImageURL": None,
+        "contactNo": f"+1555{rng.randint(1000000, 9999999)}",
+        "country": rng.choice(["PK", "US", "GB", "DE"]),
+        "createdAt": now,
+        "updatedAt": now,
+        "lastLogin": None,
+    }
+
+
+def _questions(rng: random.Random, count: int) -> list:
+    questions = []
+    for n in range(count):
+        options = [f"Option {c}" for c in "ABCD"]
+        questions.append({"question": f"Question number {n + 1}?", "options": options, "answer": rng.choice(options)})
+    return questions
+
+
+async def seed(db, config: SeedConfig, password_hash: str) -> list[TenantIds]:
+    rng = random.Random(config.seed)
+    now = datetime.utcnow()
+    tenants = []
+
+    for t in range(config.tenants):
+        ids = TenantIds(tenant_id=ObjectId())
+        await db.tenants.insert_one({
+            "_id": ids.tenant_id,
+            "tenantName": f"Tenant {t}",
+            "adminEmail": f"admin@tenant{t}.example.com",
+            "status": "active",
+            "createdAt": now,
+        })
+
+        users, teachers, students = [], [], []
+        admin = _user(rng, "admin", 0, t, password_hash, now)
+        users.append(admin)
+        await db.admins.insert_one({"userId": admin["_id"], "tenantId": ids.tenant_id, "createdAt": now})
+
+        for n in range(config.teachers_per_tenant):
+            user = _user(rng, "teacher", n, t, password_hash, now)
+            users.append(user)
+            teacher = {"_id": ObjectId(), "userId": user["_id"], "tenantId": ids.tenant_id,
+                       "assignedCourses": [], "qualifications": [], "subjects": [], "status": "active",
+                       "createdAt": now, "updatedAt": now}
+            teachers.append(teacher)
+            ids.teacher_ids.append(teacher["_id"])
+
+        for n in range(config.students_per_tenant):
+            user = _user(rng, "student", n, t, password_hash, now)
+            users.append(user)
+            student = {"_id": ObjectId(), "userId": user["_id"], "tenantId": ids.tenant_id,
+                       "enrolledCourses": [], "completedCourses": [], "status": "active",
+                       "createdAt": now, "updatedAt": now}
+            students.append(student)
+            ids.student_ids.append(student["_id"])
+
+        courses = []
+        for n in range(config.courses_per_tenant):
+            teacher = rng.choice(teachers)
+            course = {
+                "_id": ObjectId(),
+                "title": f"{rng.choice(CATEGORIES)} {100 + n}",
+                "description": "Benchmark course " * 5,
+                "category": rng.choice(CATEGORIES),
+                "status": rng.choice(["Active", "Active", "Active", "Upcoming"]),
+                "courseCode": f"C{t}{n:03d}",
+                "duration": f"{rng.randint(4, 16)} weeks",
+                "thumbnailUrl": "",
+                "modules": [
+                    {"title": f"Module {m + 1}", "description": "Module description", "content": "x" * 200, "order": m}
+                    for m in range(config.modules_per_course)
+                ],
+                "teacherId": teacher["_id"],
+                "tenantId": ids.tenant_id,
+                "enrolledStudents": 0,
+                "createdAt": now - timedelta(days=rng.randint(1, 365)),
+                "updatedAt": now,
+            }
+            teacher["assignedCourses"].append(course["_id"])
+            courses.append(course)
+            ids.course_ids.append(course["_id"])
+
+        course_students: dict = {c["_id"]: [] for c in courses}
+        for student in students:
+            for course in rng.sample(courses, min(config.enrollments_per_student, len(courses))):
+                student["enrolledCourses"].append(course["_id"])
+                course_students[course["_id"]].append(student["_id"])
+                course["enrolledStudents"] += 1
+
+        quizzes, submissions = [], []
+        for course in courses:
+            for q in range(config.quizzes_per_course):
+                questions = _questions(rng, config.questions_per_quiz)
+                quiz = {
+                    "_id": ObjectId(),
+                    "courseId": course["_id"],
+                    "courseName": course["title"],
+                    "teacherId": course["teacherId"],
+                    "tenantId": ids.tenant_id,
+                    "quizNumber": q + 1,
+                    "description": f"Quiz {q + 1} for {course['title']}",
+                    "dueDate": now + timedelta(days=7 * (q + 1)),
+                    "questions": questions,
+                    "timeLimitMinutes": 30,
+                    "totalMarks": config.questions_per_quiz,
+                    "aiGenerated": False,
+                    "status": "active",
+                    "createdAt": now,
+                    "updatedAt": None,
+                    "isDeleted": False,
+                    "deletedAt": None,
+                }
+                quizzes.append(quiz)
+                ids.quiz_ids.append(quiz["_id"])
+
+                for student_id in course_students[course["_id"]]:
+                    if rng.random() > config.submission_rate:
+                        continue
+                    answers = [{"questionIndex": i, "selected": rng.choice(question["options"])}
+                               for i, question in enumerate(questions)]
+                    correct = sum(a["selected"] == question["answer"] for a, question in zip(answers, questions))
+                    submissions.append({
+                        "studentId": student_id,
+                        "quizId": quiz["_id"],
+                        "courseId": course["_id"],
+                        "tenantId": ids.tenant_id,
+                        "submittedAt": now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                        "answers": answers,
+                        "obtainedMarks": correct,
+                        "percentage": round(correct / len(questions) * 100, 2),
+                        "status": "graded",
+                    })
+
+        performance, history, study_time = [], [], {}
+        for user, student in zip([u for u in users if u["role"] == "student"], students):
+            points = rng.randint(0, 5000)
+            performance.append({
+                "studentId": student["_id"],
+                "studentName": user["fullName"],
+                "tenantId": ids.tenant_id,
+                "totalPoints": points,
+                "pointsThisWeek": rng.randint(0, 300),
+                "xp": points,
+                "level": 1 + points // 300,
+                "xpToNextLevel": 300,
+                "createdAt": now,
+            })
+            history.append({
+                "studentId": student["_id"],
+                "tenantId": ids.tenant_id,
+                "badges": [],
+                "certificates": [],
+                "courseStats": [
+                    {"courseId": course_id, "completionPercentage": rng.randint(0, 100),
+                     "lastActive": now.isoformat()}
+                    for course_id in student["enrolledCourses"]
+                ],
+            })
+
+            # monthly study-time buckets (see app/crud/study_time.py), last 8 weeks
+            for w in range(8):
+                week = (now - timedelta(weeks=w)).date()
+                minutes = rng.randint(0, 600)
+                bucket = study_time.setdefault((student["_id"], week.strftime("%Y-%m")), {
+                    "studentId": student["_id"], "tenantId": ids.tenant_id, "month": week.strftime("%Y-%m"),
+                    "weeks": {}, "totalMinutes": 0, "updatedAt": now,
+                })
+                bucket["weeks"][week.isoformat()] = minutes
+                bucket["totalMinutes"] += minutes
+
+        await db.users.insert_many(users)
+        await db.teachers.insert_many(teachers)
+        await db.students.insert_many(students)
+        await db.courses.insert_many(courses)
+        await db.quizzes.insert_many(quizzes)
+        if submissions:
+            await db.quizSubmissions.insert_many(submissions)
+        await db.studentPerformance.insert_many(performance)
+        await db.studentPerformanceHistory.insert_many(history)
+        await db.studyTime.insert_many(list(study_time.values()))
+
+        tenants.append(ids)
+
+    return tenants